@@ -1,8 +1,6 @@
 """Virtual Gas Meter integration for Home Assistant."""
 import logging
-from homeassistant.core import HomeAssistant, ServiceCall
-from homeassistant.components.recorder.history import get_significant_states
-from homeassistant.components.recorder import get_instance
+from homeassistant.core import HomeAssistant, ServiceCall, ServiceResponse, SupportsResponse
 from homeassistant.util import dt as dt_util
 from homeassistant.config_entries import ConfigEntry
 from homeassistant.helpers import entity_registry as er
@@ -14,18 +12,88 @@ from .const import (
     CONF_LATEST_GAS_DATA,
     CONF_UNIT_SYSTEM,
     CONF_OPERATING_MODE,
+    CONF_BURNER_ATTRIBUTE,
+    CONF_BURNER_VALUES,
+    CONF_MODULATION_ENTITY,
+    CONF_PULSE_ENTITY,
+    CONF_PULSE_VOLUME,
+    CONF_APPLIANCE_ENTITIES,
+    CONF_APPLIANCE_RATES,
+    CONF_STORAGE_FORMAT,
+    CONF_BILLING_DAY,
+    CONF_OUTDOOR_TEMPERATURE_ENTITY,
+    CONF_HDD_BASE_TEMPERATURE,
+    CONF_UNIT_PRICE,
+    CONF_PRICE_UNIT,
+    CONF_CALORIFIC_VALUE,
+    CONF_TIERS,
+    CONF_TOU_RATES,
+    CONF_DAILY_CHARGE,
     DEFAULT_BOILER_AV_H,
     DEFAULT_BOILER_AV_M,
     DEFAULT_LATEST_GAS_DATA,
     DEFAULT_UNIT_SYSTEM,
     DEFAULT_OPERATING_MODE,
+    DEFAULT_STORAGE_FORMAT,
+    DEFAULT_BILLING_DAY,
+    DEFAULT_HDD_BASE_TEMPERATURE,
+    DEFAULT_UNIT_PRICE,
+    DEFAULT_PRICE_UNIT,
+    DEFAULT_CALORIFIC_VALUE,
+    DEFAULT_DAILY_CHARGE,
+    DEFAULT_PULSE_VOLUME,
+    DEFAULT_EXPORT_PAGE_SIZE,
+    EXPORT_FORMAT_CSV,
+    EXPORT_FORMAT_JSON,
+    EVENT_ANOMALY,
     MODE_BOILER_TRACKING,
     MODE_BILL_ENTRY,
+    MODE_PULSE_COUNTER,
 )
-from .unit_converter import to_canonical_unit, get_unit_label
+from .unit_converter import UnitEngine, to_canonical_unit
+from .modulation import ModulationIntegrator
+from .recorder_access import (
+    async_get_state_series,
+    on_minutes_in_intervals,
+    to_timestamps,
+    trapezoid_in_intervals,
+)
+from .appliances import ApplianceTracker, async_fit_appliance_rates
+from .burner import BurnerSignal, parse_values, series_arguments, signals_for
+from .period_meter import PeriodMeters
+from .flow_rate import FlowRateMeter
+from .pulse_counter import PulseCounter
+from .history_export import async_export_history, get_record_index
+from .websocket import HistoryDeltas, async_register_websocket_commands
+from .anomaly import RunningStats, check_interval
+from .degree_days import DegreeDayEngine
+from .tariff import CostEngine, Tariff, parse_tiers, parse_tou_rates
+from .compute import ComputeBackend, apply_columns, history_columns, recompute_cumulated
 
 _LOGGER = logging.getLogger(__name__)
 
+PLATFORMS = ["sensor", "binary_sensor"]
+
+# Live accumulators kept in the entry data, restarted at every gas reading
+LIVE_ACCUMULATORS = ("modulation_integrator", "appliance_tracker", "burner_tracker")
+
+
+def _get_entry_config(hass: HomeAssistant) -> dict:
+    """Return the stored config of the configured gas meter entry."""
+    entries = hass.data.get(DOMAIN, {})
+    return next(iter(entries.values()), {})
+
+
+def _modulation_calibration(hass: HomeAssistant) -> float:
+    """Return the fitted m³ per modulation unit·minute (0 until fitted)."""
+    calibration_state = hass.states.get(f"{DOMAIN}.modulation_calibration")
+    try:
+        calibration = float(calibration_state.state) if calibration_state else 0.0
+    except ValueError:
+        calibration = 0.0
+    return max(calibration, 0.0)
+
+
 async def _register_services(hass: HomeAssistant):
     """Register services for gas meter integration."""
     
@@ -62,7 +130,7 @@ async def _register_services(hass: HomeAssistant):
             # Convert input value to canonical unit (m³) if user is using imperial
             unit_system_state = hass.states.get(f"{DOMAIN}.unit_system")
             unit_system = unit_system_state.state if unit_system_state else DEFAULT_UNIT_SYSTEM
-            gas_new_data = to_canonical_unit(gas_new_data, unit_system)
+            gas_new_data = to_canonical_unit(gas_new_data, unit_system, _get_entry_config(hass).get(CONF_CALORIFIC_VALUE))
             _LOGGER.debug(f"consumed_gas in canonical units (m³): {gas_new_data}")
 
             gas_consume.add_record(gas_new_datetime, gas_new_data)
@@ -72,32 +140,28 @@ async def _register_services(hass: HomeAssistant):
                 gas_prev_datetime = gas_consume[-2]["datetime"]
                 gas_prev_data = gas_consume[-2]["consumed_gas"]
 
-                # Get the state history of the switch between the two timestamps
+                # Get the state history of the switch (and modulation sensor) between the two timestamps
                 start_time = dt_util.as_utc(gas_prev_datetime)
                 end_time = dt_util.as_utc(gas_new_datetime)
-                entity_id = f"{DOMAIN}.boiler_entity"
-                history_list = await get_instance(hass).async_add_executor_job(
-                    get_significant_states, hass, start_time, end_time, [entity_id]
-                    )
+                boiler_entity_state = hass.states.get(f"{DOMAIN}.boiler_entity")
+                entity_id = boiler_entity_state.state if boiler_entity_state else None
+                if entity_id in [None, "None", "unknown", "unavailable"]:
+                    entity_id = None
+                modulation_entity = _get_entry_config(hass).get(CONF_MODULATION_ENTITY)
+                burner_signals = signals_for([entity_id] if entity_id else [], _get_entry_config(hass).get("burner_signals"))
+                series = await async_get_state_series(
+                    hass,
+                    start_time,
+                    end_time,
+                    numeric_entities=[modulation_entity] if modulation_entity else [],
+                    **series_arguments(burner_signals),
+                )
+                starts, ends = to_timestamps([start_time]), to_timestamps([end_time])
 
                 # Calculate the total time the switch was "on"
-                total_on_time = 0
-                previous_state = None
-                previous_time = start_time
-                for state in history_list.get(entity_id, []):
-                    current_time = state.last_changed
-
-                    if previous_state == "on":
-                        total_on_time += (current_time - previous_time).total_seconds()
-
-                    previous_state = state.state
-                    previous_time = current_time
-
-                # Handle the last segment
-                if previous_state == "on":
-                    total_on_time += (end_time - previous_time).total_seconds()
-
-                total_min = total_on_time / 60  # Total time in minutes
+                total_min = 0  # Total time in minutes
+                if entity_id:
+                    total_min = float(on_minutes_in_intervals(series[entity_id], starts, ends)[0])
 
                 # Count m3/min for the current interval ("m3/min for interval")
                 gas_data_diff = gas_new_data - gas_prev_data
@@ -121,13 +185,79 @@ async def _register_services(hass: HomeAssistant):
                     gas_consume[-1]["average m3/min"] = av_min
 
                     hass.states.async_set(f"{DOMAIN}.average_m3_per_min", av_min)
-                    
+
+                    burner_tracker = _get_entry_config(hass).get("burner_tracker")
+                    if burner_tracker is not None:
+                        burner_tracker.async_set_rates({burner_tracker.appliances[0]: av_min})
+
+                # Modulating boilers: integrate the power/modulation signal over the interval
+                # and calibrate m³ per modulation unit·minute ("modulation_calibration").
+                # Only intervals the modulation history fully covers count, so a sensor added
+                # to an existing history is calibrated against its own gas ("modulation_gas_cumulated")
+                if modulation_entity:
+                    modulation_series = series[modulation_entity]
+                    modulation_integral = float(trapezoid_in_intervals(modulation_series, starts, ends)[0])
+                    gas_consume[-1]["modulation_integral"] = modulation_integral
+
+                    covered = bool(len(modulation_series.timestamps)) and modulation_series.timestamps[0] <= starts[0]
+                    modulation_cumulated = gas_consume[-2].get("modulation_cumulated", 0)
+                    modulation_gas_cumulated = gas_consume[-2].get("modulation_gas_cumulated", 0)
+                    if covered:
+                        modulation_cumulated += modulation_integral
+                        modulation_gas_cumulated += gas_data_diff
+                    gas_consume[-1]["modulation_cumulated"] = modulation_cumulated
+                    gas_consume[-1]["modulation_gas_cumulated"] = modulation_gas_cumulated
+
+                    if modulation_cumulated:
+                        calibration = modulation_gas_cumulated / modulation_cumulated
+                        gas_consume[-1]["modulation_calibration"] = calibration
+                        hass.states.async_set(f"{DOMAIN}.modulation_calibration", calibration)
+
+                # Several appliances on one meter: solve the per-appliance rates jointly ("appliance_rates")
+                tracker = _get_entry_config(hass).get("appliance_tracker")
+                if tracker is not None:
+                    rates = await async_fit_appliance_rates(
+                        hass, gas_consume, tracker.appliances, tracker.rates, modulation_entity,
+                        _get_entry_config(hass).get("compute"), tracker.signals,
+                    )
+                    gas_consume[-1]["appliance_rates"] = rates
+                    tracker.async_set_rates(rates)
+                    _LOGGER.info(f"Appliance rates fitted: {rates}")
+
+                # Leak/anomaly check against the running rate statistics ("anomaly_stats")
+                if entity_id:
+                    runtime = total_min + sum(
+                        minutes for appliance, minutes in gas_consume[-1].get("appliance_runtime", {}).items()
+                        if appliance != entity_id
+                    )
+                    # Without burner history back to the interval start, a zero runtime is no evidence of a leak
+                    burner_timestamps = series[entity_id].timestamps
+                    runtime_known = bool(len(burner_timestamps)) and burner_timestamps[0] <= starts[0]
+                    stats = RunningStats.from_dict(gas_consume[-2].get("anomaly_stats"))
+                    anomaly = check_interval(stats, gas_data_diff, runtime, check_rate=tracker is None, runtime_known=runtime_known)
+                    gas_consume[-1]["anomaly_stats"] = stats.to_dict()
+                    if anomaly is not None:
+                        gas_consume[-1]["anomaly"] = anomaly
+                        _LOGGER.warning(f"Gas consumption anomaly detected: {anomaly}")
+                        hass.bus.async_fire(EVENT_ANOMALY, {**anomaly, "datetime": str(gas_new_datetime)})
+
+            # Weather regression: add the interval's heating degree-days ("hdd", "degree_day_fit")
+            degree_days = _get_entry_config(hass).get("degree_days")
+            if degree_days is not None:
+                degree_days.async_add_reading(gas_consume)
+
             hass.states.async_set(f"{DOMAIN}.latest_gas_update", gas_new_datetime)
             hass.states.async_set(f"{DOMAIN}.latest_gas_data", gas_new_data)
 
             # Save updated gas consumption
             await fh.save_gas_actualdata(gas_consume, hass)
 
+            # Restart the live accumulators at the new reading
+            for key in LIVE_ACCUMULATORS:
+                accumulator = _get_entry_config(hass).get(key)
+                if accumulator is not None:
+                    await accumulator.async_reset(gas_new_datetime)
+
         except Exception as e:
             _LOGGER.error("Error in handle_trigger_service: %s", str(e))
             raise
@@ -200,7 +330,7 @@ async def _register_services(hass: HomeAssistant):
             # Convert input value to canonical unit (m³) if user is using imperial
             unit_system_state = hass.states.get(f"{DOMAIN}.unit_system")
             unit_system = unit_system_state.state if unit_system_state else DEFAULT_UNIT_SYSTEM
-            usage_canonical = to_canonical_unit(usage, unit_system)
+            usage_canonical = to_canonical_unit(usage, unit_system, _get_entry_config(hass).get(CONF_CALORIFIC_VALUE))
             _LOGGER.debug(f"usage in canonical units (m³): {usage_canonical}")
 
             # Calculate cumulative total (sum of all usage entries)
@@ -214,6 +344,11 @@ async def _register_services(hass: HomeAssistant):
             gas_consume.add_record(gas_datetime, usage_canonical)
             gas_consume[-1]["consumed_gas_cumulated"] = new_cumulative
 
+            # Weather regression: add the billing period's heating degree-days
+            degree_days = _get_entry_config(hass).get("degree_days")
+            if degree_days is not None:
+                degree_days.async_add_reading(gas_consume)
+
             # Update states - latest_gas_data is cumulative for Energy Dashboard
             hass.states.async_set(f"{DOMAIN}.latest_gas_update", gas_datetime)
             hass.states.async_set(f"{DOMAIN}.latest_gas_data", new_cumulative)
@@ -226,6 +361,78 @@ async def _register_services(hass: HomeAssistant):
             _LOGGER.error("Error in handle_bill_entry: %s", str(e))
             raise
 
+    async def handle_export_history(call: ServiceCall) -> ServiceResponse:
+        """Export the stored records to a CSV/NDJSON file or as a paged JSON response."""
+        try:
+            export_format = call.data.get("format", EXPORT_FORMAT_CSV)
+            if export_format == EXPORT_FORMAT_JSON and not call.return_response:
+                _LOGGER.error("The json export format is only available as a service response.")
+                return None
+
+            filters = {}
+            for key in ("start", "end"):
+                value = call.data.get(key)
+                if isinstance(value, str):
+                    try:
+                        value = fh.string_to_datetime(value)
+                    except Exception as e:
+                        _LOGGER.error(f"Error parsing '{key}' string: {e}")
+                        return None
+                filters[key] = value
+
+            gas_consume = await fh.load_gas_actualdata(hass)
+            result = await async_export_history(
+                hass,
+                gas_consume,
+                get_record_index(hass, gas_consume),
+                export_format,
+                start=filters["start"],
+                end=filters["end"],
+                offset=call.data.get("offset", 0),
+                limit=call.data.get("limit", DEFAULT_EXPORT_PAGE_SIZE),
+                filename=call.data.get("filename"),
+            )
+            return result if call.return_response else None
+        except Exception as e:
+            _LOGGER.error("Error in handle_export_history: %s", str(e))
+            raise
+
+    async def handle_recompute_history(call: ServiceCall) -> ServiceResponse:
+        """Re-derive the cumulative fields of all records on the compute backend."""
+        try:
+            gas_consume = await fh.load_gas_actualdata(hass)
+            if len(gas_consume) < 2:
+                _LOGGER.info("Not enough gas records to recompute.")
+                return {"records": len(gas_consume), "changed": 0} if call.return_response else None
+
+            entry_config = _get_entry_config(hass)
+            operating_mode = entry_config.get(CONF_OPERATING_MODE, DEFAULT_OPERATING_MODE)
+            compute = entry_config.get("compute")
+            if compute is not None:
+                result = await compute.async_run(recompute_cumulated, history_columns(gas_consume), operating_mode)
+            else:
+                # No configured entry to borrow the backend from: use a temporary one
+                compute = ComputeBackend(hass)
+                try:
+                    result = await compute.async_run(recompute_cumulated, history_columns(gas_consume), operating_mode)
+                finally:
+                    compute.async_stop()
+            changed = apply_columns(gas_consume, result)
+            _LOGGER.info(f"Recomputed {len(gas_consume)} gas records, {changed} changed.")
+
+            if changed:
+                average = gas_consume[-1].get("average m3/min")
+                if average:
+                    hass.states.async_set(f"{DOMAIN}.average_m3_per_min", average)
+                    burner_tracker = entry_config.get("burner_tracker")
+                    if burner_tracker is not None:
+                        burner_tracker.async_set_rates({burner_tracker.appliances[0]: average})
+                await fh.save_gas_actualdata(gas_consume, hass)
+            return {"records": len(gas_consume), "changed": changed} if call.return_response else None
+        except Exception as e:
+            _LOGGER.error("Error in handle_recompute_history: %s", str(e))
+            raise
+
     # Register the services
     hass.services.async_register(
         DOMAIN, "trigger_gas_update", handle_trigger_service
@@ -236,10 +443,34 @@ async def _register_services(hass: HomeAssistant):
     hass.services.async_register(
         DOMAIN, "read_gas_actualdata_file", read_gas_actualdata_file
     )
+    hass.services.async_register(
+        DOMAIN, "export_history", handle_export_history, supports_response=SupportsResponse.OPTIONAL
+    )
+    hass.services.async_register(
+        DOMAIN, "recompute_history", handle_recompute_history, supports_response=SupportsResponse.OPTIONAL
+    )
+
+def _setup_burner_signal(hass: HomeAssistant, config_entry: ConfigEntry) -> BurnerSignal | None:
+    """Store the burner signal: a switch state or e.g. a climate entity's hvac_action attribute."""
+    entry_data = hass.data[DOMAIN][config_entry.entry_id]
+    boiler_entity = config_entry.data.get(CONF_BOILER_ENTITY)
+    burner_signal = None
+    if boiler_entity:
+        burner_signal = BurnerSignal.for_entity(
+            boiler_entity,
+            config_entry.data.get(CONF_BURNER_ATTRIBUTE),
+            parse_values(config_entry.data.get(CONF_BURNER_VALUES)),
+        )
+        entry_data["burner_signal"] = burner_signal
+        _LOGGER.info(f"Burner signal: {burner_signal.entity_id} {burner_signal.attribute or 'state'} in {sorted(burner_signal.values)}")
+    entry_data["burner_signals"] = {boiler_entity: burner_signal} if burner_signal else {}
+    return burner_signal
+
 
 async def async_setup_entry(hass: HomeAssistant, config_entry: ConfigEntry):
     """Set up the integration from a config entry (UI setup)."""
     await _register_services(hass)
+    async_register_websocket_commands(hass)
 
     # Retrieve user input values
     unit_system = config_entry.data.get(CONF_UNIT_SYSTEM, DEFAULT_UNIT_SYSTEM)
@@ -252,8 +483,18 @@ async def async_setup_entry(hass: HomeAssistant, config_entry: ConfigEntry):
     hass.data[DOMAIN][config_entry.entry_id] = {
         CONF_UNIT_SYSTEM: unit_system,
         CONF_OPERATING_MODE: operating_mode,
+        CONF_STORAGE_FORMAT: config_entry.data.get(CONF_STORAGE_FORMAT, DEFAULT_STORAGE_FORMAT),
+        CONF_CALORIFIC_VALUE: config_entry.data.get(CONF_CALORIFIC_VALUE),
     }
 
+    # Process pool for full-history batch jobs (started on first use)
+    hass.data[DOMAIN][config_entry.entry_id]["compute"] = ComputeBackend(hass)
+
+    # Display unit conversions and the formatted history cache
+    unit_engine = UnitEngine(hass, unit_system, config_entry.data.get(CONF_CALORIFIC_VALUE))
+    unit_engine.async_start()
+    hass.data[DOMAIN][config_entry.entry_id]["unit_engine"] = unit_engine
+
     # Set common initial states
     hass.states.async_set(f"{DOMAIN}.unit_system", unit_system)
     hass.states.async_set(f"{DOMAIN}.operating_mode", operating_mode)
@@ -269,7 +510,68 @@ async def async_setup_entry(hass: HomeAssistant, config_entry: ConfigEntry):
         hass.states.async_set(f"{DOMAIN}.boiler_entity", boiler_entity)
         hass.states.async_set(f"{DOMAIN}.average_m3_per_min", boiler_av_min)
 
+        burner_signal = _setup_burner_signal(hass, config_entry)
+        burner_signals = {boiler_entity: burner_signal} if burner_signal else {}
+
+        gas_consume = await fh.load_gas_actualdata(hass)
+        since = gas_consume[-1]["datetime"] if gas_consume else now
+
+        # Modulating boiler: integrate the power/modulation sensor since the latest reading
+        modulation_entity = config_entry.data.get(CONF_MODULATION_ENTITY)
+        hass.data[DOMAIN][config_entry.entry_id][CONF_MODULATION_ENTITY] = modulation_entity
+        integrator = None
+        if modulation_entity:
+            calibration = gas_consume[-1].get("modulation_calibration", 0) if gas_consume else 0
+            hass.states.async_set(f"{DOMAIN}.modulation_calibration", calibration)
+
+            integrator = ModulationIntegrator(hass, modulation_entity)
+            await integrator.async_start(since)
+            hass.data[DOMAIN][config_entry.entry_id]["modulation_integrator"] = integrator
+            _LOGGER.info(f"Integrating burner modulation from {modulation_entity}")
+
+        # Further appliances on the same meter: per-appliance rates, the boiler comes first
+        appliance_entities = config_entry.data.get(CONF_APPLIANCE_ENTITIES, [])
+        hass.data[DOMAIN][config_entry.entry_id][CONF_APPLIANCE_ENTITIES] = appliance_entities
+        if appliance_entities:
+            appliances = [boiler_entity] + [a for a in appliance_entities if a != boiler_entity]
+            initial_rates = config_entry.data.get(CONF_APPLIANCE_RATES, {})
+            rates = {entity_id: initial_rates.get(entity_id, DEFAULT_BOILER_AV_H) / 60 for entity_id in appliances}
+            rates[boiler_entity] = calibration if modulation_entity else boiler_av_min
+            if gas_consume and "appliance_rates" in gas_consume[-1]:
+                rates.update(gas_consume[-1]["appliance_rates"])
+
+            tracker = ApplianceTracker(hass, appliances, rates, integrator, signals=burner_signals)
+            await tracker.async_start(since)
+            hass.data[DOMAIN][config_entry.entry_id]["appliance_tracker"] = tracker
+            _LOGGER.info(f"Tracking {len(appliances)} gas appliances: {appliances}")
+        elif not modulation_entity and boiler_entity:
+            # Plain on/off boiler: on-time since the latest reading for the period meters.
+            # The history stats sensor can only match states, attribute signals publish the estimate.
+            tracker = ApplianceTracker(
+                hass,
+                [boiler_entity],
+                {boiler_entity: boiler_av_min},
+                estimate_entity_id=f"{DOMAIN}.burner_estimate" if burner_signal.attribute else None,
+                signals=burner_signals,
+            )
+            await tracker.async_start(since)
+            hass.data[DOMAIN][config_entry.entry_id]["burner_tracker"] = tracker
+
         _LOGGER.info(f"Virtual Gas Meter configured in Boiler Tracking mode with {unit_system} units")
+    elif operating_mode == MODE_PULSE_COUNTER:
+        # Optional burner: its rate is calibrated from the metered pulses
+        boiler_entity = config_entry.data.get(CONF_BOILER_ENTITY)
+        _setup_burner_signal(hass, config_entry)
+        gas_consume = await fh.load_gas_actualdata(hass)
+        average_rate = gas_consume[-1].get("average m3/min", DEFAULT_BOILER_AV_M) if gas_consume else DEFAULT_BOILER_AV_M
+
+        hass.states.async_set(f"{DOMAIN}.boiler_entity", boiler_entity)
+        hass.states.async_set(f"{DOMAIN}.average_m3_per_min", average_rate if boiler_entity else 0)
+        if gas_consume:
+            hass.states.async_set(f"{DOMAIN}.latest_gas_data", gas_consume[-1]["consumed_gas"])
+            hass.states.async_set(f"{DOMAIN}.latest_gas_update", gas_consume[-1]["datetime"])
+
+        _LOGGER.info(f"Virtual Gas Meter configured in Pulse Counter mode with {unit_system} units")
     else:
         # Bill entry mode - no boiler entity needed
         hass.states.async_set(f"{DOMAIN}.boiler_entity", None)
@@ -278,9 +580,10 @@ async def async_setup_entry(hass: HomeAssistant, config_entry: ConfigEntry):
         _LOGGER.info(f"Virtual Gas Meter configured in Bill Entry mode with {unit_system} units")
 
     # Add the first record to the file if latest_gas_data is not 0
-    if latest_gas_data != 0:
+    # (pulse counter readings continue from the stored history)
+    if latest_gas_data != 0 and not (operating_mode == MODE_PULSE_COUNTER and await fh.load_gas_actualdata(hass)):
         # Convert initial value to canonical unit (m³) before storing
-        initial_gas_canonical = to_canonical_unit(latest_gas_data, unit_system)
+        initial_gas_canonical = unit_engine.to_canonical(latest_gas_data)
         _LOGGER.debug(f"Initial gas data: {latest_gas_data} ({unit_system}) -> {initial_gas_canonical} m³")
 
         # Add directly to storage instead of calling service to avoid conversion happening twice
@@ -292,7 +595,101 @@ async def async_setup_entry(hass: HomeAssistant, config_entry: ConfigEntry):
         hass.states.async_set(f"{DOMAIN}.latest_gas_data", initial_gas_canonical)
         _LOGGER.info("Added initial gas record to storage.")
 
-    await hass.config_entries.async_forward_entry_setups(config_entry, ["sensor"])
+    # Hourly/daily/weekly/monthly/billing cycle totals
+    def live_estimate() -> float:
+        """Return the estimated gas (m³) consumed since the latest reading."""
+        entry_data = hass.data[DOMAIN].get(config_entry.entry_id, {})
+        if entry_data.get("pulse_counter") is not None:
+            return entry_data["pulse_counter"].value
+        if entry_data.get("appliance_tracker") is not None:
+            return entry_data["appliance_tracker"].value
+        if entry_data.get("modulation_integrator") is not None:
+            return entry_data["modulation_integrator"].value * _modulation_calibration(hass)
+        if entry_data.get("burner_tracker") is not None:
+            return entry_data["burner_tracker"].value
+        return 0.0
+
+    def live_flow() -> float:
+        """Return the current gas flow (m³/min) of the rate model."""
+        entry_data = hass.data[DOMAIN].get(config_entry.entry_id, {})
+        if entry_data.get("pulse_counter") is not None:
+            return entry_data["pulse_counter"].flow
+        if entry_data.get("appliance_tracker") is not None:
+            return entry_data["appliance_tracker"].flow
+        if entry_data.get("modulation_integrator") is not None:
+            return entry_data["modulation_integrator"].current * _modulation_calibration(hass)
+        if entry_data.get("burner_tracker") is not None:
+            return entry_data["burner_tracker"].flow
+        return 0.0
+
+    period_meters = PeriodMeters(
+        hass,
+        operating_mode,
+        live_estimate,
+        int(config_entry.data.get(CONF_BILLING_DAY, DEFAULT_BILLING_DAY)),
+    )
+    gas_consume = await fh.load_gas_actualdata(hass)
+    period_meters.async_start(gas_consume)
+    hass.data[DOMAIN][config_entry.entry_id]["period_meters"] = period_meters
+
+    # Instantaneous flow from the burner state and the rate model
+    if operating_mode in (MODE_BOILER_TRACKING, MODE_PULSE_COUNTER):
+        flow_rate = FlowRateMeter(hass, live_flow)
+        flow_rate.async_start()
+        hass.data[DOMAIN][config_entry.entry_id]["flow_rate"] = flow_rate
+
+    # Heating degree-days from an outdoor temperature sensor
+    outdoor_temperature_entity = config_entry.data.get(CONF_OUTDOOR_TEMPERATURE_ENTITY)
+    if outdoor_temperature_entity:
+        degree_days = DegreeDayEngine(
+            hass,
+            outdoor_temperature_entity,
+            float(config_entry.data.get(CONF_HDD_BASE_TEMPERATURE, DEFAULT_HDD_BASE_TEMPERATURE)),
+            operating_mode,
+        )
+        await degree_days.async_start(gas_consume)
+        hass.data[DOMAIN][config_entry.entry_id]["degree_days"] = degree_days
+        _LOGGER.info(f"Tracking heating degree-days from {outdoor_temperature_entity}")
+
+    # Pulse counts aggregated into buckets and written to the history in batches
+    if operating_mode == MODE_PULSE_COUNTER:
+        entry_data = hass.data[DOMAIN][config_entry.entry_id]
+        pulse_counter = PulseCounter(
+            hass,
+            config_entry.data.get(CONF_PULSE_ENTITY),
+            float(config_entry.data.get(CONF_PULSE_VOLUME, DEFAULT_PULSE_VOLUME)),
+            entry_data.get("burner_signal"),
+            DEFAULT_BOILER_AV_M,
+            entry_data.get("degree_days"),
+        )
+        await pulse_counter.async_start(gas_consume)
+        entry_data["pulse_counter"] = pulse_counter
+        _LOGGER.info(f"Counting gas meter pulses of {pulse_counter.pulse_entity} ({pulse_counter.pulse_volume} m³ each)")
+
+    # Running cost accumulators (with a tariff)
+    unit_price = float(config_entry.data.get(CONF_UNIT_PRICE, DEFAULT_UNIT_PRICE))
+    if unit_price > 0 or config_entry.data.get(CONF_TIERS) or config_entry.data.get(CONF_TOU_RATES):
+        try:
+            tariff = Tariff(
+                unit_price,
+                config_entry.data.get(CONF_PRICE_UNIT, DEFAULT_PRICE_UNIT),
+                float(config_entry.data.get(CONF_CALORIFIC_VALUE, DEFAULT_CALORIFIC_VALUE)),
+                parse_tiers(config_entry.data.get(CONF_TIERS)),
+                parse_tou_rates(config_entry.data.get(CONF_TOU_RATES)),
+                float(config_entry.data.get(CONF_DAILY_CHARGE, DEFAULT_DAILY_CHARGE)),
+            )
+            cost_engine = CostEngine(hass, period_meters, tariff)
+            await cost_engine.async_start()
+            hass.data[DOMAIN][config_entry.entry_id]["cost_engine"] = cost_engine
+        except ValueError as e:
+            _LOGGER.error(f"Invalid gas tariff, cost sensors disabled: {e}")
+
+    # Record deltas for the gas_meter/subscribe websocket command
+    history_deltas = HistoryDeltas(hass)
+    history_deltas.async_start(gas_consume)
+    hass.data[DOMAIN][config_entry.entry_id]["history_deltas"] = history_deltas
+
+    await hass.config_entries.async_forward_entry_setups(config_entry, PLATFORMS)
     return True
 
 
@@ -300,7 +697,12 @@ async def async_unload_entry(hass: HomeAssistant, config_entry: ConfigEntry):
     """Unload the integration."""
     # Clean up hass.data
     if DOMAIN in hass.data and config_entry.entry_id in hass.data[DOMAIN]:
-        hass.data[DOMAIN].pop(config_entry.entry_id)
-
-    await hass.config_entries.async_forward_entry_unload(config_entry, "sensor")
-    return True
+        entry_data = hass.data[DOMAIN].pop(config_entry.entry_id)
+        for key in (*LIVE_ACCUMULATORS, "pulse_counter", "flow_rate", "period_meters", "history_deltas", "degree_days", "cost_engine", "unit_engine", "compute"):
+            if entry_data.get(key) is not None:
+                entry_data[key].async_stop()
+        if entry_data.get("pulse_counter") is not None:
+            # Keep the counts not yet in the history across a reload
+            await entry_data["pulse_counter"].async_save()
+
+    return await hass.config_entries.async_unload_platforms(config_entry, PLATFORMS)
@@ -0,0 +1,93 @@
+"""Leak and anomaly detection for the Virtual Gas Meter integration.
+
+Every reading interval has the gas consumed and the burner runtime. The
+detector keeps running statistics (Welford mean/variance) of the
+per-interval rate, stored with the latest record, so each new reading is
+checked in O(1) without rescanning the history. It flags gas consumed
+while the burner was off (leak or unknown consumer) and rates far outside
+the usual band.
+"""
+import math
+
+from .const import (
+    ANOMALY_MIN_GAS,
+    ANOMALY_MIN_MINUTES,
+    ANOMALY_MIN_SAMPLES,
+    ANOMALY_Z_THRESHOLD,
+)
+
+ANOMALY_CONSUMPTION_WHILE_OFF = "consumption_while_off"
+ANOMALY_RATE_OUT_OF_BAND = "rate_out_of_band"
+
+
+class RunningStats:
+    """Welford running mean and variance."""
+
+    def __init__(self, count: int = 0, mean: float = 0.0, m2: float = 0.0):
+        self.count = count
+        self.mean = mean
+        self.m2 = m2
+
+    @classmethod
+    def from_dict(cls, data: dict | None) -> "RunningStats":
+        """Restore the statistics stored with a record."""
+        if not data:
+            return cls()
+        return cls(int(data["count"]), float(data["mean"]), float(data["m2"]))
+
+    def to_dict(self) -> dict:
+        """Return the statistics for storing with a record."""
+        return {"count": self.count, "mean": self.mean, "m2": self.m2}
+
+    def add(self, value: float):
+        """Add one sample."""
+        self.count += 1
+        delta = value - self.mean
+        self.mean += delta / self.count
+        self.m2 += delta * (value - self.mean)
+
+    @property
+    def std(self) -> float:
+        """Return the sample standard deviation."""
+        return math.sqrt(self.m2 / (self.count - 1)) if self.count > 1 else 0.0
+
+
+def check_interval(stats: RunningStats, consumption: float, runtime: float, check_rate: bool = True, runtime_known: bool = True) -> dict | None:
+    """
+    Check one reading interval and update the statistics.
+
+    Args:
+        stats: Running statistics of the per-minute rate, updated in place
+        consumption: Gas consumed in the interval (m³)
+        runtime: Burner (and further appliance) runtime in minutes
+        check_rate: False when the rate is not comparable between intervals
+        runtime_known: False when the burner history does not cover the whole
+            interval (purged, recorder outage), so a zero runtime proves nothing
+
+    Returns:
+        None, or a dict with the anomaly type and details
+    """
+    if runtime <= 0:
+        if runtime_known and consumption > ANOMALY_MIN_GAS:
+            return {"type": ANOMALY_CONSUMPTION_WHILE_OFF, "consumption": consumption, "runtime": runtime}
+        return None
+
+    if not check_rate or runtime < ANOMALY_MIN_MINUTES:
+        return None
+
+    rate = consumption / runtime
+    if stats.count >= ANOMALY_MIN_SAMPLES and stats.std > 0:
+        z_score = (rate - stats.mean) / stats.std
+        if abs(z_score) > ANOMALY_Z_THRESHOLD:
+            # Keep anomalous rates out of the statistics
+            return {
+                "type": ANOMALY_RATE_OUT_OF_BAND,
+                "consumption": consumption,
+                "runtime": runtime,
+                "rate": rate,
+                "expected_rate": stats.mean,
+                "z_score": z_score,
+            }
+
+    stats.add(rate)
+    return None
@@ -0,0 +1,289 @@
+"""Multi-appliance tracking for the Virtual Gas Meter integration.
+
+A single gas meter often feeds several appliances (space-heating boiler,
+water heater, dryer, ...). Each appliance gets its own consumption rate;
+the rates are solved jointly over all stored reading intervals by least
+squares, and the live estimate sums the contribution of every appliance.
+"""
+import logging
+from datetime import datetime, timedelta
+
+import numpy as np
+
+from homeassistant.core import HomeAssistant, Event, callback
+from homeassistant.helpers.dispatcher import async_dispatcher_send
+from homeassistant.helpers.event import (
+    async_track_state_change_event,
+    async_track_time_interval,
+)
+from homeassistant.util import dt as dt_util
+from .burner import series_arguments, signals_for
+from .const import DOMAIN, SIGNAL_ESTIMATE_UPDATED
+from .recorder_access import (
+    async_get_state_series,
+    on_minutes_in_intervals,
+    to_timestamps,
+    trapezoid_in_intervals,
+)
+
+_LOGGER = logging.getLogger(__name__)
+
+# How often the live estimate is republished while no appliance changes state
+LIVE_REFRESH_INTERVAL = timedelta(minutes=1)
+
+
+async def async_get_interval_runtimes(hass: HomeAssistant, appliances: list, intervals: list, modulation_entity: str | None = None, signals: dict | None = None, covered_only: bool = False) -> list:
+    """
+    Compute the runtime of every appliance in every interval with one recorder query.
+
+    The first appliance is the boiler; when a modulation entity is given, its
+    runtime is the modulation integral (unit·minutes) instead of on-minutes.
+
+    Args:
+        appliances: Appliance entity ids
+        intervals: List of (start, end) UTC datetimes
+        modulation_entity: Optional boiler power/modulation sensor
+        signals: {entity_id: BurnerSignal} where an appliance does not
+            run on state "on" (e.g. a climate entity's hvac_action)
+        covered_only: Return None for intervals whose start is not covered
+            by the recorder history of every series (purged or partial)
+
+    Returns:
+        One {entity_id: runtime} dict (or None) per interval
+    """
+    if not intervals:
+        return []
+
+    starts = to_timestamps(start for start, _ in intervals)
+    ends = to_timestamps(end for _, end in intervals)
+    numeric_entities = [modulation_entity] if modulation_entity else []
+    series = await async_get_state_series(
+        hass,
+        min(start for start, _ in intervals),
+        max(end for _, end in intervals),
+        numeric_entities=numeric_entities,
+        **series_arguments(signals_for(appliances, signals)),
+    )
+
+    columns = {
+        entity_id: on_minutes_in_intervals(series[entity_id], starts, ends)
+        for entity_id in appliances
+    }
+    if modulation_entity:
+        columns[appliances[0]] = trapezoid_in_intervals(series[modulation_entity], starts, ends)
+
+    covered = np.ones(len(intervals), dtype=bool)
+    if covered_only:
+        for entity_series in series.values():
+            first = entity_series.timestamps[0] if len(entity_series.timestamps) else np.inf
+            covered &= starts >= first
+
+    return [
+        {entity_id: float(columns[entity_id][i]) for entity_id in appliances} if covered[i] else None
+        for i in range(len(intervals))
+    ]
+
+
+def fit_appliance_rates(runtimes: np.ndarray, consumption: np.ndarray, prior: np.ndarray) -> np.ndarray:
+    """
+    Solve per-appliance rates jointly by non-negative least squares.
+
+    Args:
+        runtimes: (intervals x appliances) matrix of runtimes
+        consumption: Gas consumed in each interval (m³)
+        prior: Rates to keep for appliances that cannot be determined
+
+    Returns:
+        Rates (m³ per runtime unit) for every appliance
+    """
+    rates = prior.astype(float).copy()
+    active = runtimes.any(axis=0)
+
+    # Drop appliances that would get a negative rate and solve again
+    while active.any():
+        matrix = runtimes[:, active]
+        if np.linalg.matrix_rank(matrix) < matrix.shape[1]:
+            _LOGGER.debug("Not enough independent intervals to fit appliance rates yet")
+            return rates
+        solution, *_ = np.linalg.lstsq(matrix, consumption, rcond=None)
+        if (solution >= 0).all():
+            rates[active] = solution
+            return rates
+        active[np.flatnonzero(active)[solution < 0]] = False
+        rates[~active & runtimes.any(axis=0)] = 0.0
+
+    return rates
+
+
+def fit_appliance_rates_job(columns: dict) -> np.ndarray:
+    """Compute backend job fitting the rates from the runtime/consumption columns."""
+    return fit_appliance_rates(columns["runtimes"], columns["consumption"], columns["prior"])
+
+
+async def async_fit_appliance_rates(hass: HomeAssistant, gas_consume, appliances: list, prior_rates: dict, modulation_entity: str | None = None, compute=None, signals: dict | None = None) -> dict:
+    """
+    Fit per-appliance rates over all stored intervals.
+
+    Intervals without a stored "appliance_runtime" are filled in with one
+    batched recorder query before the rates are solved; intervals the
+    recorder history does not cover are marked ("appliance_runtime_uncovered",
+    the appliance set they were tried for) so they are queried only once and
+    never fitted. The regression runs on the compute backend when one is given.
+    """
+    appliance_set = set(appliances)
+    missing = [
+        i for i in range(1, len(gas_consume))
+        if set(gas_consume[i].get("appliance_runtime", {})) != appliance_set
+        and set(gas_consume[i].get("appliance_runtime_uncovered", [])) != appliance_set
+    ]
+    if missing:
+        intervals = [
+            (dt_util.as_utc(gas_consume[i - 1]["datetime"]), dt_util.as_utc(gas_consume[i]["datetime"]))
+            for i in missing
+        ]
+        runtimes = await async_get_interval_runtimes(hass, appliances, intervals, modulation_entity, signals, covered_only=True)
+        for i, interval_runtime in zip(missing, runtimes):
+            if interval_runtime is None:
+                gas_consume[i]["appliance_runtime_uncovered"] = list(appliances)
+            else:
+                gas_consume[i]["appliance_runtime"] = interval_runtime
+                gas_consume[i].pop("appliance_runtime_uncovered", None)
+            gas_consume.mark_corrected(i)
+
+    rows = [
+        i for i in range(1, len(gas_consume))
+        if set(gas_consume[i].get("appliance_runtime", {})) == appliance_set
+        and any(gas_consume[i]["appliance_runtime"].values())
+    ]
+    prior = np.array([prior_rates.get(entity_id, 0.0) for entity_id in appliances])
+    if not rows:
+        return dict(zip(appliances, prior.tolist()))
+
+    runtimes = np.array([
+        [gas_consume[i]["appliance_runtime"][entity_id] for entity_id in appliances]
+        for i in rows
+    ])
+    consumption = np.array([
+        gas_consume[i]["consumed_gas"] - gas_consume[i - 1]["consumed_gas"]
+        for i in rows
+    ])
+    columns = {"runtimes": runtimes, "consumption": consumption, "prior": prior}
+    rates = await compute.async_run(fit_appliance_rates_job, columns) if compute is not None else fit_appliance_rates_job(columns)
+    return dict(zip(appliances, rates.tolist()))
+
+
+class ApplianceTracker:
+    """Live estimate of gas consumed by all appliances since the latest reading."""
+
+    def __init__(self, hass: HomeAssistant, appliances: list, rates: dict, modulation_integrator=None, estimate_entity_id: str | None = f"{DOMAIN}.appliance_estimate", signals: dict | None = None):
+        self.hass = hass
+        self.estimate_entity_id = estimate_entity_id
+        self.appliances = list(appliances)
+        self.signals = signals_for(self.appliances, signals)
+        self.rates = dict(rates)
+        self._modulation_integrator = modulation_integrator
+        self._minutes = {entity_id: 0.0 for entity_id in self.appliances}
+        self._on_since = {}
+        self._unsub = []
+
+    @property
+    def value(self) -> float:
+        """Return the estimated gas (m³) consumed since the latest reading."""
+        now = dt_util.utcnow()
+        total = 0.0
+        for entity_id in self.appliances:
+            if entity_id == self.appliances[0] and self._modulation_integrator is not None:
+                runtime = self._modulation_integrator.value
+            else:
+                runtime = self._minutes[entity_id]
+                if entity_id in self._on_since:
+                    runtime += (now - self._on_since[entity_id]).total_seconds() / 60
+            total += self.rates.get(entity_id, 0.0) * runtime
+        return total
+
+    @property
+    def flow(self) -> float:
+        """Return the current gas flow (m³/min) of the running appliances."""
+        flow = 0.0
+        for entity_id in self.appliances:
+            if entity_id == self.appliances[0] and self._modulation_integrator is not None:
+                flow += self.rates.get(entity_id, 0.0) * self._modulation_integrator.current
+            elif entity_id in self._on_since:
+                flow += self.rates.get(entity_id, 0.0)
+        return flow
+
+    async def async_start(self, since: datetime):
+        """Start tracking the appliances."""
+        self._unsub.append(
+            async_track_state_change_event(
+                self.hass, self.appliances, self._async_state_changed
+            )
+        )
+        self._unsub.append(
+            async_track_time_interval(
+                self.hass, self._async_refresh, LIVE_REFRESH_INTERVAL
+            )
+        )
+        await self.async_reset(since)
+
+    @callback
+    def async_stop(self):
+        """Stop tracking the appliances."""
+        while self._unsub:
+            self._unsub.pop()()
+
+    @callback
+    def async_set_rates(self, rates: dict):
+        """Use newly fitted rates for the live estimate."""
+        self.rates = dict(rates)
+        self._publish()
+
+    async def async_reset(self, since: datetime):
+        """Restart the accumulators at the given reading time."""
+        now = dt_util.utcnow()
+        since = min(dt_util.as_utc(since), now)
+        minutes = {entity_id: 0.0 for entity_id in self.appliances}
+
+        if since < now:
+            # Catch up on what happened between the reading and now
+            try:
+                runtimes = await async_get_interval_runtimes(self.hass, self.appliances, [(since, now)], signals=self.signals)
+                minutes = runtimes[0]
+            except Exception as e:
+                _LOGGER.error(f"Error loading appliance history: {e}")
+
+        self._minutes = minutes
+        self._on_since = {}
+        for entity_id in self.appliances:
+            if self.signals[entity_id].is_on(self.hass.states.get(entity_id)):
+                self._on_since[entity_id] = now
+        self._publish()
+
+    @callback
+    def _async_state_changed(self, event: Event):
+        """Accumulate the on-time of an appliance that started or stopped."""
+        entity_id = event.data["entity_id"]
+        is_on = self.signals[entity_id].is_on(event.data.get("new_state"))
+        if is_on == (entity_id in self._on_since):
+            # Other attribute changes (e.g. a climate entity's temperatures)
+            return
+        now = dt_util.utcnow()
+
+        if is_on:
+            self._on_since[entity_id] = now
+        else:
+            self._minutes[entity_id] += (now - self._on_since.pop(entity_id)).total_seconds() / 60
+        self._publish()
+
+    @callback
+    def _async_refresh(self, _now=None):
+        """Republish the estimate while appliances are running."""
+        if self._on_since or self._modulation_integrator is not None:
+            self._publish()
+
+    @callback
+    def _publish(self):
+        """Expose the live estimate as a state for the consumed gas sensor."""
+        if self.estimate_entity_id is not None:
+            self.hass.states.async_set(self.estimate_entity_id, round(self.value, 3))
+        async_dispatcher_send(self.hass, SIGNAL_ESTIMATE_UPDATED)
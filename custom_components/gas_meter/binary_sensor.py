@@ -0,0 +1,63 @@
+"""Binary sensor platform for the Virtual Gas Meter integration."""
+import logging
+
+from homeassistant.components.binary_sensor import (
+    BinarySensorEntity,
+    BinarySensorDeviceClass,
+)
+from homeassistant.core import HomeAssistant, callback
+from homeassistant.helpers.dispatcher import async_dispatcher_connect
+from homeassistant.helpers.entity_platform import AddEntitiesCallback
+from .const import (
+    DOMAIN,
+    CONF_OPERATING_MODE,
+    MODE_BOILER_TRACKING,
+    SIGNAL_RECORDS_UPDATED,
+)
+import custom_components.gas_meter.file_handler as fh
+
+_LOGGER = logging.getLogger(__name__)
+
+
+class GasAnomalySensor(BinarySensorEntity):
+    """On while the latest reading interval was flagged by the anomaly detector."""
+
+    _attr_name = "Gas Consumption Anomaly"
+    _attr_unique_id = "gas_consumption_anomaly"
+    _attr_device_class = BinarySensorDeviceClass.PROBLEM
+    _attr_icon = "mdi:gas-burner"
+    _attr_should_poll = False
+
+    def __init__(self, gas_consume):
+        self._update_from_records(gas_consume)
+
+    async def async_added_to_hass(self):
+        self.async_on_remove(
+            async_dispatcher_connect(self.hass, SIGNAL_RECORDS_UPDATED, self._async_records_updated)
+        )
+
+    def _update_from_records(self, gas_consume):
+        """Take the anomaly (if any) of the latest record."""
+        latest = gas_consume[-1] if gas_consume else {}
+        anomaly = latest.get("anomaly")
+        self._attr_is_on = anomaly is not None
+        self._attr_extra_state_attributes = {**anomaly, "datetime": str(latest["datetime"])} if anomaly else {}
+
+    @callback
+    def _async_records_updated(self, gas_consume):
+        self._update_from_records(gas_consume)
+        self.async_write_ha_state()
+
+
+async def async_setup_entry(hass: HomeAssistant, config_entry, async_add_entities: AddEntitiesCallback):
+    """Set up the binary sensor platform."""
+    config_data = hass.data.get(DOMAIN, {}).get(config_entry.entry_id, {})
+    if config_data.get(CONF_OPERATING_MODE, MODE_BOILER_TRACKING) != MODE_BOILER_TRACKING:
+        return
+
+    try:
+        gas_consume = await fh.load_gas_actualdata(hass)
+    except Exception as e:
+        _LOGGER.error("Error loading gas data for the anomaly sensor: %s", str(e))
+        gas_consume = []
+    async_add_entities([GasAnomalySensor(gas_consume)])
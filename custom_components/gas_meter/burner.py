@@ -0,0 +1,71 @@
+"""Burner signal for the Virtual Gas Meter integration.
+
+The burner (or any further appliance) is running while its entity's state,
+or one of its attributes, has one of the configured values: a switch is
+"on", a climate entity's ``hvac_action`` is "heating". Climate entities
+default to ``hvac_action``/"heating", everything else to state "on".
+"""
+from typing import NamedTuple
+
+from homeassistant.components.climate import ATTR_HVAC_ACTION, HVACAction
+from homeassistant.const import STATE_ON
+from homeassistant.core import State
+
+CLIMATE_DOMAIN = "climate"
+
+
+def parse_values(text: str | None) -> list:
+    """Parse a comma-separated list of burner values."""
+    return [value.strip() for value in (text or "").split(",") if value.strip()]
+
+
+class BurnerSignal(NamedTuple):
+    """Predicate telling from an entity's state whether it is burning gas."""
+
+    entity_id: str
+    attribute: str | None  # None: the state itself
+    values: frozenset
+
+    @classmethod
+    def for_entity(cls, entity_id: str, attribute: str | None = None, values=None) -> "BurnerSignal":
+        """Return the signal of an entity, with the defaults of its domain."""
+        if not attribute and entity_id.split(".")[0] == CLIMATE_DOMAIN:
+            attribute = ATTR_HVAC_ACTION
+        if not values:
+            values = [HVACAction.HEATING] if attribute == ATTR_HVAC_ACTION else [STATE_ON]
+        return cls(entity_id, attribute or None, frozenset(str(value) for value in values))
+
+    def is_on(self, state: State | None) -> bool:
+        """Return True if the state (or its attribute) has a burner value."""
+        if state is None:
+            return False
+        value = state.state if self.attribute is None else state.attributes.get(self.attribute)
+        return value is not None and str(value) in self.values
+
+    def convert(self, value) -> float:
+        """Convert a recorded state or attribute value to 1.0 (burning) / 0.0."""
+        return float(value is not None and str(value) in self.values)
+
+
+def signals_for(entity_ids, signals: dict | None = None) -> dict:
+    """Return {entity_id: BurnerSignal}, using the domain defaults where none is configured."""
+    signals = signals or {}
+    return {entity_id: signals.get(entity_id) or BurnerSignal.for_entity(entity_id) for entity_id in entity_ids}
+
+
+def series_arguments(signals: dict) -> dict:
+    """
+    Return the async_get_state_series arguments fetching the burner signals.
+
+    Plain on/off entities use the state query, other state values a
+    conversion and attribute signals the attribute query.
+    """
+    on_off, converted, attributes = [], {}, {}
+    for entity_id, signal in signals.items():
+        if signal.attribute is not None:
+            attributes[entity_id] = (signal.attribute, signal.convert)
+        elif signal.values == {STATE_ON}:
+            on_off.append(entity_id)
+        else:
+            converted[entity_id] = signal.convert
+    return {"on_off_entities": on_off, "converted_entities": converted, "attribute_entities": attributes}
@@ -0,0 +1,183 @@
+"""Process-pool compute backend for the Virtual Gas Meter integration.
+
+Full-history batch jobs (re-deriving the cumulative fields, fitting the
+appliance rates) are CPU-bound numpy work. On a large history they would
+stall the event loop, and on the shared executor they would hold the GIL
+against everything else Home Assistant runs there. Large jobs therefore go
+to a small dedicated process pool: the record columns are copied once into
+shared memory blocks, and the worker maps them as numpy arrays without
+pickling. Small histories run inline, where a process round trip would
+cost more than the job.
+
+A job is a module-level function ``job(columns, *args)`` taking a dict of
+numpy arrays. It must not return views of the columns, because the shared
+memory is released as soon as the job returns.
+"""
+import asyncio
+import logging
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
+from functools import partial
+from multiprocessing.shared_memory import SharedMemory
+
+import numpy as np
+
+from homeassistant.core import HomeAssistant, callback
+from .const import (
+    MODE_BILL_ENTRY,
+    COMPUTE_INLINE_MAX_ROWS,
+    COMPUTE_WORKERS,
+)
+
+_LOGGER = logging.getLogger(__name__)
+
+
+def _share_columns(columns: dict) -> tuple[list, dict]:
+    """Copy the columns into shared memory; returns the blocks and their specs."""
+    blocks, specs = [], {}
+    try:
+        for name, values in columns.items():
+            values = np.ascontiguousarray(values)
+            block = SharedMemory(create=True, size=max(values.nbytes, 1))
+            blocks.append(block)
+            np.ndarray(values.shape, dtype=values.dtype, buffer=block.buf)[...] = values
+            specs[name] = (block.name, values.dtype.str, values.shape)
+    except Exception:
+        _release(blocks)
+        raise
+    return blocks, specs
+
+
+def _release(blocks: list):
+    """Close and free shared memory blocks created by this process."""
+    for block in blocks:
+        block.close()
+        block.unlink()
+
+
+def _run_shared(job, specs: dict, args: tuple):
+    """Worker side: map the shared columns and run the job."""
+    blocks, columns = [], {}
+    try:
+        for name, (block_name, dtype, shape) in specs.items():
+            # Spawned workers share the parent's resource tracker, which unlinks the block
+            block = SharedMemory(name=block_name)
+            blocks.append(block)
+            columns[name] = np.ndarray(shape, dtype=np.dtype(dtype), buffer=block.buf)
+        return job(columns, *args)
+    finally:
+        columns.clear()
+        for block in blocks:
+            block.close()
+
+
+class ComputeBackend:
+    """
+    Runs batch jobs inline or in a dedicated process pool.
+
+    The pool is started on the first job above the inline threshold and
+    shut down with the config entry.
+    """
+
+    def __init__(self, hass: HomeAssistant, workers: int = COMPUTE_WORKERS, inline_max_rows: int = COMPUTE_INLINE_MAX_ROWS):
+        self.hass = hass
+        self.workers = workers
+        self.inline_max_rows = inline_max_rows
+        self._executor = None
+
+    async def async_run(self, job, columns: dict, *args):
+        """Run a job on the columns and return its result."""
+        rows = max((len(values) for values in columns.values()), default=0)
+        if rows <= self.inline_max_rows:
+            return job(columns, *args)
+
+        if self._executor is None:
+            # Spawned workers: forking the multi-threaded Home Assistant process is unsafe
+            self._executor = ProcessPoolExecutor(self.workers, mp_context=multiprocessing.get_context("spawn"))
+            _LOGGER.info(f"Started gas meter compute pool with {self.workers} workers")
+
+        blocks, specs = _share_columns(columns)
+        try:
+            # Submitting may spawn a worker, keep that off the event loop
+            future = await self.hass.async_add_executor_job(self._executor.submit, _run_shared, job, specs, args)
+            return await asyncio.wrap_future(future)
+        finally:
+            _release(blocks)
+
+    @callback
+    def async_stop(self):
+        """Shut the process pool down."""
+        if self._executor is not None:
+            # Joining the workers blocks, do it in the executor
+            self.hass.async_add_executor_job(partial(self._executor.shutdown, wait=True, cancel_futures=True))
+            self._executor = None
+
+
+def history_columns(gas_consume) -> dict:
+    """Return the columns the cumulative fields are derived from (NaN where missing)."""
+    records = gas_consume.data if hasattr(gas_consume, "data") else gas_consume
+    count = len(records)
+    return {
+        "consumed_gas": np.fromiter((record["consumed_gas"] for record in records), dtype=float, count=count),
+        "min_cumulated": np.fromiter((record.get("min_cumulated", np.nan) for record in records), dtype=float, count=count),
+        "interval_rate": np.fromiter((record.get("m3/min for interval", np.nan) for record in records), dtype=float, count=count),
+    }
+
+
+def recompute_cumulated(columns: dict, operating_mode: str) -> dict:
+    """
+    Re-derive the cumulative fields of all records, e.g. after records were
+    corrected or removed.
+
+    In boiler tracking mode the burner minutes of every interval are taken
+    from the stored ``min_cumulated`` steps (a removed record merges its
+    minutes into the next interval), falling back to the stored interval
+    rate; ``consumed_gas_cumulated``, ``min_cumulated``, ``average m3/min``
+    and ``m3/min for interval`` are then recomputed from them. In bill
+    entry mode ``consumed_gas_cumulated`` is the running sum of the bills.
+
+    Returns:
+        Dict of new columns (NaN where a field does not apply)
+    """
+    gas = columns["consumed_gas"]
+    if operating_mode == MODE_BILL_ENTRY:
+        return {"consumed_gas_cumulated": np.cumsum(gas)}
+
+    min_cumulated = columns["min_cumulated"].copy()
+    if len(min_cumulated):
+        # The first record starts the count
+        min_cumulated[0] = 0.0
+    gas_diff = np.diff(gas)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        minutes = np.diff(min_cumulated)
+        from_rate = gas_diff / columns["interval_rate"][1:]
+        minutes = np.where(np.isfinite(minutes) & (minutes >= 0), minutes, from_rate)
+        minutes = np.where(np.isfinite(minutes) & (minutes > 0), minutes, 0.0)
+
+        cumulated_minutes = np.concatenate(([np.nan], np.cumsum(minutes)))
+        cumulated_gas = np.concatenate(([np.nan], gas[1:] - gas[0]))
+        average = np.where(cumulated_minutes > 0, cumulated_gas / cumulated_minutes, np.nan)
+        interval_rate = np.concatenate(([np.nan], np.where(minutes > 0, gas_diff / minutes, np.nan)))
+    return {
+        "consumed_gas_cumulated": cumulated_gas,
+        "min_cumulated": cumulated_minutes,
+        "average m3/min": average,
+        "m3/min for interval": interval_rate,
+    }
+
+
+def apply_columns(gas_consume, result: dict) -> int:
+    """Write recomputed columns back into the records; returns the number of changed records."""
+    changed = 0
+    for position, record in enumerate(gas_consume):
+        before = dict(record)
+        for field, values in result.items():
+            value = float(values[position])
+            if np.isnan(value):
+                record.pop(field, None)
+            else:
+                record[field] = value
+        if record != before:
+            gas_consume.mark_corrected(position)
+            changed += 1
+    return changed
@@ -9,15 +9,50 @@ from .const import (
     CONF_LATEST_GAS_DATA,
     CONF_UNIT_SYSTEM,
     CONF_OPERATING_MODE,
+    CONF_BURNER_ATTRIBUTE,
+    CONF_BURNER_VALUES,
+    CONF_MODULATION_ENTITY,
+    CONF_PULSE_ENTITY,
+    CONF_PULSE_VOLUME,
+    CONF_APPLIANCE_ENTITIES,
+    CONF_APPLIANCE_RATES,
+    CONF_STORAGE_FORMAT,
+    CONF_BILLING_DAY,
+    CONF_OUTDOOR_TEMPERATURE_ENTITY,
+    CONF_HDD_BASE_TEMPERATURE,
+    CONF_UNIT_PRICE,
+    CONF_PRICE_UNIT,
+    CONF_CALORIFIC_VALUE,
+    CONF_TIERS,
+    CONF_TOU_RATES,
+    CONF_DAILY_CHARGE,
     DEFAULT_BOILER_AV_H,
     DEFAULT_LATEST_GAS_DATA,
+    DEFAULT_PULSE_VOLUME,
     DEFAULT_UNIT_SYSTEM,
     DEFAULT_OPERATING_MODE,
+    DEFAULT_STORAGE_FORMAT,
+    DEFAULT_BILLING_DAY,
+    DEFAULT_HDD_BASE_TEMPERATURE,
+    DEFAULT_UNIT_PRICE,
+    DEFAULT_PRICE_UNIT,
+    DEFAULT_CALORIFIC_VALUE,
+    DEFAULT_DAILY_CHARGE,
     UNIT_SYSTEM_METRIC,
     UNIT_SYSTEM_IMPERIAL,
+    UNIT_SYSTEM_CUBIC_FEET,
+    UNIT_SYSTEM_THERMS,
+    UNIT_SYSTEM_KWH,
     MODE_BOILER_TRACKING,
     MODE_BILL_ENTRY,
+    MODE_PULSE_COUNTER,
+    STORAGE_FORMAT_JSON,
+    STORAGE_FORMAT_BINARY,
+    PRICE_UNIT_M3,
+    PRICE_UNIT_KWH,
+    PRICE_UNIT_THERM,
 )
+from .tariff import parse_tiers, parse_tou_rates
 
 
 class GasMeterConfigFlow(config_entries.ConfigFlow, domain=DOMAIN):
@@ -38,6 +73,8 @@ class GasMeterConfigFlow(config_entries.ConfigFlow, domain=DOMAIN):
             # Route to appropriate next step based on mode
             if user_input[CONF_OPERATING_MODE] == MODE_BOILER_TRACKING:
                 return await self.async_step_boiler_config()
+            elif user_input[CONF_OPERATING_MODE] == MODE_PULSE_COUNTER:
+                return await self.async_step_pulse_config()
             else:
                 return await self.async_step_bill_entry_config()
 
@@ -47,6 +84,9 @@ class GasMeterConfigFlow(config_entries.ConfigFlow, domain=DOMAIN):
                     "options": [
                         {"value": UNIT_SYSTEM_METRIC, "label": "Metric (m³)"},
                         {"value": UNIT_SYSTEM_IMPERIAL, "label": "Imperial (CCF)"},
+                        {"value": UNIT_SYSTEM_CUBIC_FEET, "label": "Cubic feet (ft³)"},
+                        {"value": UNIT_SYSTEM_THERMS, "label": "Therms"},
+                        {"value": UNIT_SYSTEM_KWH, "label": "Energy (kWh)"},
                     ],
                     "mode": "dropdown",
                 }
@@ -56,10 +96,43 @@ class GasMeterConfigFlow(config_entries.ConfigFlow, domain=DOMAIN):
                     "options": [
                         {"value": MODE_BOILER_TRACKING, "label": "Boiler/Furnace Tracking"},
                         {"value": MODE_BILL_ENTRY, "label": "Monthly Bill Entry"},
+                        {"value": MODE_PULSE_COUNTER, "label": "Pulse Counter"},
                     ],
                     "mode": "dropdown",
                 }
             }),
+            vol.Optional(CONF_STORAGE_FORMAT, default=DEFAULT_STORAGE_FORMAT): selector({
+                "select": {
+                    "options": [
+                        {"value": STORAGE_FORMAT_JSON, "label": "JSON (human readable)"},
+                        {"value": STORAGE_FORMAT_BINARY, "label": "Binary snapshot (compact, for large histories)"},
+                    ],
+                    "mode": "dropdown",
+                }
+            }),
+            vol.Optional(CONF_BILLING_DAY, default=DEFAULT_BILLING_DAY): selector({
+                "number": {
+                    "min": 1,
+                    "max": 28,
+                    "step": 1,
+                    "mode": "box",
+                }
+            }),
+            vol.Optional(CONF_OUTDOOR_TEMPERATURE_ENTITY): selector({
+                "entity": {
+                    "domain": "sensor",
+                    "device_class": "temperature",
+                }
+            }),
+            vol.Optional(CONF_HDD_BASE_TEMPERATURE, default=DEFAULT_HDD_BASE_TEMPERATURE): selector({
+                "number": {
+                    "min": 0,
+                    "max": 30,
+                    "step": 0.5,
+                    "mode": "box",
+                    "unit_of_measurement": "°C",
+                }
+            }),
         })
 
         return self.async_show_form(
@@ -74,12 +147,12 @@ class GasMeterConfigFlow(config_entries.ConfigFlow, domain=DOMAIN):
 
         if user_input is not None:
             self._data.update(user_input)
-            return self.async_create_entry(
-                title="Virtual Gas Meter",
-                data=self._data,
-            )
+            # Further appliances on the same meter need their own rate
+            if user_input.get(CONF_APPLIANCE_ENTITIES):
+                return await self.async_step_appliance_rates()
+            return await self.async_step_tariff()
 
-        # Get list of switch entities
+        # Get list of switch and climate entities
         boiler_entities = await self._get_switch_entities()
 
         if not boiler_entities:
@@ -88,7 +161,21 @@ class GasMeterConfigFlow(config_entries.ConfigFlow, domain=DOMAIN):
         schema = vol.Schema({
             vol.Required(CONF_BOILER_ENTITY): selector({
                 "entity": {
-                    "domain": "switch",
+                    "domain": ["switch", "climate", "binary_sensor", "input_boolean"],
+                }
+            }),
+            # Climate entities default to hvac_action "heating", everything else to state "on"
+            vol.Optional(CONF_BURNER_ATTRIBUTE): selector({"text": {}}),
+            vol.Optional(CONF_BURNER_VALUES): selector({"text": {}}),
+            vol.Optional(CONF_MODULATION_ENTITY): selector({
+                "entity": {
+                    "domain": "sensor",
+                }
+            }),
+            vol.Optional(CONF_APPLIANCE_ENTITIES, default=[]): selector({
+                "entity": {
+                    "domain": ["switch", "binary_sensor", "input_boolean"],
+                    "multiple": True,
                 }
             }),
             vol.Optional(CONF_BOILER_AVERAGE, default=DEFAULT_BOILER_AV_H): selector({
@@ -115,16 +202,97 @@ class GasMeterConfigFlow(config_entries.ConfigFlow, domain=DOMAIN):
             errors=errors,
         )
 
+    async def async_step_appliance_rates(self, user_input=None):
+        """Step 3a: Initial consumption rate of every further appliance."""
+        errors = {}
+        appliances = self._data[CONF_APPLIANCE_ENTITIES]
+
+        if user_input is not None:
+            self._data[CONF_APPLIANCE_RATES] = {
+                entity_id: user_input[entity_id] for entity_id in appliances
+            }
+            return await self.async_step_tariff()
+
+        schema = vol.Schema({
+            vol.Required(entity_id, default=DEFAULT_BOILER_AV_H): selector({
+                "number": {
+                    "min": 0,
+                    "max": 100,
+                    "step": 0.001,
+                    "mode": "box",
+                }
+            })
+            for entity_id in appliances
+        })
+
+        # The fields are named after the entity ids, the description tells which appliance is which
+        appliance_names = []
+        for entity_id in appliances:
+            state = self.hass.states.get(entity_id)
+            appliance_names.append(f"- {entity_id}: {state.name if state else entity_id}")
+
+        return self.async_show_form(
+            step_id="appliance_rates",
+            data_schema=schema,
+            errors=errors,
+            description_placeholders={"appliances": "\n".join(appliance_names)},
+        )
+
+    async def async_step_pulse_config(self, user_input=None):
+        """Step 2c: Configure pulse counter mode."""
+        errors = {}
+
+        if user_input is not None:
+            self._data.update(user_input)
+            return await self.async_step_tariff()
+
+        schema = vol.Schema({
+            # Reed switch / optical sensor (one "on" per pulse) or a pulse counter
+            vol.Required(CONF_PULSE_ENTITY): selector({
+                "entity": {
+                    "domain": ["binary_sensor", "input_boolean", "switch", "sensor", "counter"],
+                }
+            }),
+            vol.Required(CONF_PULSE_VOLUME, default=DEFAULT_PULSE_VOLUME): selector({
+                "number": {
+                    "min": 0.001,
+                    "max": 10,
+                    "step": 0.001,
+                    "mode": "box",
+                    "unit_of_measurement": "m³",
+                }
+            }),
+            # Optional burner: calibrates the boiler rate from the pulses
+            vol.Optional(CONF_BOILER_ENTITY): selector({
+                "entity": {
+                    "domain": ["switch", "climate", "binary_sensor", "input_boolean"],
+                }
+            }),
+            vol.Optional(CONF_BURNER_ATTRIBUTE): selector({"text": {}}),
+            vol.Optional(CONF_BURNER_VALUES): selector({"text": {}}),
+            vol.Optional(CONF_LATEST_GAS_DATA, default=DEFAULT_LATEST_GAS_DATA): selector({
+                "number": {
+                    "min": 0,
+                    "max": 1000000,
+                    "step": 0.001,
+                    "mode": "box",
+                }
+            }),
+        })
+
+        return self.async_show_form(
+            step_id="pulse_config",
+            data_schema=schema,
+            errors=errors,
+        )
+
     async def async_step_bill_entry_config(self, user_input=None):
         """Step 2b: Configure bill entry mode."""
         errors = {}
 
         if user_input is not None:
             self._data.update(user_input)
-            return self.async_create_entry(
-                title="Virtual Gas Meter",
-                data=self._data,
-            )
+            return await self.async_step_tariff()
 
         schema = vol.Schema({
             vol.Optional(CONF_LATEST_GAS_DATA, default=DEFAULT_LATEST_GAS_DATA): selector({
@@ -143,11 +311,78 @@ class GasMeterConfigFlow(config_entries.ConfigFlow, domain=DOMAIN):
             errors=errors,
         )
 
+    async def async_step_tariff(self, user_input=None):
+        """Last step: optional gas tariff for the cost sensors."""
+        errors = {}
+
+        if user_input is not None:
+            try:
+                parse_tiers(user_input.get(CONF_TIERS))
+            except ValueError:
+                errors[CONF_TIERS] = "invalid_tiers"
+            try:
+                parse_tou_rates(user_input.get(CONF_TOU_RATES))
+            except ValueError:
+                errors[CONF_TOU_RATES] = "invalid_tou_rates"
+
+            if not errors:
+                self._data.update(user_input)
+                return self.async_create_entry(
+                    title="Virtual Gas Meter",
+                    data=self._data,
+                )
+
+        schema = vol.Schema({
+            vol.Optional(CONF_UNIT_PRICE, default=DEFAULT_UNIT_PRICE): selector({
+                "number": {
+                    "min": 0,
+                    "max": 100,
+                    "step": 0.001,
+                    "mode": "box",
+                }
+            }),
+            vol.Optional(CONF_PRICE_UNIT, default=DEFAULT_PRICE_UNIT): selector({
+                "select": {
+                    "options": [
+                        {"value": PRICE_UNIT_M3, "label": "per m³"},
+                        {"value": PRICE_UNIT_KWH, "label": "per kWh"},
+                        {"value": PRICE_UNIT_THERM, "label": "per therm"},
+                    ],
+                    "mode": "dropdown",
+                }
+            }),
+            vol.Optional(CONF_CALORIFIC_VALUE, default=DEFAULT_CALORIFIC_VALUE): selector({
+                "number": {
+                    "min": 20,
+                    "max": 60,
+                    "step": 0.01,
+                    "mode": "box",
+                    "unit_of_measurement": "MJ/m³",
+                }
+            }),
+            vol.Optional(CONF_TIERS): selector({"text": {}}),
+            vol.Optional(CONF_TOU_RATES): selector({"text": {}}),
+            vol.Optional(CONF_DAILY_CHARGE, default=DEFAULT_DAILY_CHARGE): selector({
+                "number": {
+                    "min": 0,
+                    "max": 100,
+                    "step": 0.001,
+                    "mode": "box",
+                }
+            }),
+        })
+
+        return self.async_show_form(
+            step_id="tariff",
+            data_schema=self.add_suggested_values_to_schema(schema, user_input or {}),
+            errors=errors,
+        )
+
     async def _get_switch_entities(self):
-        """Retrieve switch entities from the entity registry."""
+        """Retrieve switch and climate entities from the entity registry."""
         entity_registry = er.async_get(self.hass)
 
         return [
             entity.entity_id for entity in entity_registry.entities.values()
-            if entity.entity_id.startswith("switch.")
+            if entity.entity_id.startswith(("switch.", "climate."))
         ]
@@ -8,20 +8,99 @@ CONF_BOILER_AVERAGE = "boiler_average"
 CONF_LATEST_GAS_DATA = "latest_gas_data"
 CONF_UNIT_SYSTEM = "unit_system"
 CONF_OPERATING_MODE = "operating_mode"
+CONF_BURNER_ATTRIBUTE = "burner_attribute"
+CONF_BURNER_VALUES = "burner_values"
+CONF_MODULATION_ENTITY = "modulation_entity"
+CONF_PULSE_ENTITY = "pulse_entity"
+CONF_PULSE_VOLUME = "pulse_volume"
+CONF_APPLIANCE_ENTITIES = "appliance_entities"
+CONF_APPLIANCE_RATES = "appliance_rates"
+CONF_STORAGE_FORMAT = "storage_format"
+CONF_BILLING_DAY = "billing_day"
+CONF_OUTDOOR_TEMPERATURE_ENTITY = "outdoor_temperature_entity"
+CONF_HDD_BASE_TEMPERATURE = "hdd_base_temperature"
+CONF_UNIT_PRICE = "unit_price"
+CONF_PRICE_UNIT = "price_unit"
+CONF_CALORIFIC_VALUE = "calorific_value"
+CONF_TIERS = "tiers"
+CONF_TOU_RATES = "tou_rates"
+CONF_DAILY_CHARGE = "daily_charge"
 
 # Unit system options
 UNIT_SYSTEM_METRIC = "metric"
 UNIT_SYSTEM_IMPERIAL = "imperial"
+UNIT_SYSTEM_CUBIC_FEET = "cubic_feet"
+UNIT_SYSTEM_THERMS = "therms"
+UNIT_SYSTEM_KWH = "kwh"
 
 # Unit labels for display
 UNIT_CUBIC_METERS = "m³"
 UNIT_CCF = "CCF"
 UNIT_CF = "ft³"
 UNIT_THERMS = "therms"
+UNIT_KWH = "kWh"
+
+# Storage formats
+STORAGE_FORMAT_JSON = "json"
+STORAGE_FORMAT_BINARY = "binary"
+
+# Tariff price units
+PRICE_UNIT_M3 = "m3"
+PRICE_UNIT_KWH = "kWh"
+PRICE_UNIT_THERM = "therm"
+
+# Period meters
+PERIOD_HOURLY = "hourly"
+PERIOD_DAILY = "daily"
+PERIOD_WEEKLY = "weekly"
+PERIOD_MONTHLY = "monthly"
+PERIOD_BILLING_CYCLE = "billing_cycle"
+PERIODS = [PERIOD_HOURLY, PERIOD_DAILY, PERIOD_WEEKLY, PERIOD_MONTHLY, PERIOD_BILLING_CYCLE]
+
+# History export
+EXPORT_FORMAT_CSV = "csv"
+EXPORT_FORMAT_NDJSON = "ndjson"
+EXPORT_FORMAT_JSON = "json"  # Paged service response instead of a file
+EXPORT_DIRECTORY = "gas_meter_exports"  # csv / ndjson files, inside the config directory
+DEFAULT_EXPORT_PAGE_SIZE = 100
+MAX_EXPORT_PAGE_SIZE = 1000
+
+# Anomaly detection
+ANOMALY_MIN_GAS = 0.05  # m³ consumed while the burner was off before it counts (meter resolution)
+ANOMALY_MIN_MINUTES = 10  # Minimum burner runtime for a meaningful interval rate
+ANOMALY_MIN_SAMPLES = 5  # Intervals needed before rates are checked against the band
+ANOMALY_Z_THRESHOLD = 4.0  # Standard deviations from the mean rate
+EVENT_ANOMALY = f"{DOMAIN}_anomaly"
+
+# Degree days
+DEGREE_DAY_HISTORY_DAYS = 62  # Daily heating degree-days kept (two billing cycles)
+DEGREE_DAY_FORECAST_DAYS = 7  # Recent days averaged for the forecast
+DEGREE_DAY_MIN_INTERVALS = 3  # Intervals needed before the regression is used
+
+# Compute backend
+COMPUTE_INLINE_MAX_ROWS = 20000  # Records up to which batch jobs run inline
+COMPUTE_WORKERS = 2  # Processes of the compute pool
+
+# Pulse counter
+DEFAULT_PULSE_VOLUME = 0.01  # m³ per pulse
+PULSE_BUCKET_MINUTES = 15  # Pulses are aggregated into buckets of this length
+
+# Flow rate
+FLOW_RATE_BUFFER_SIZE = 256  # Recent flow changes kept in memory for the averages
+FLOW_RATE_MIN_WRITE_INTERVAL = 10  # Seconds between two flow rate state writes
+FLOW_RATE_WINDOWS = (5, 15, 60)  # Minutes of the short-window average attributes
+FLOW_RATE_REFRESH_INTERVAL = 60  # Seconds between average refreshes until the longest window has settled
+
+# Dispatcher signals
+SIGNAL_RECORDS_UPDATED = f"{DOMAIN}_records_updated"
+SIGNAL_ESTIMATE_UPDATED = f"{DOMAIN}_estimate_updated"
+SIGNAL_HISTORY_DELTA = f"{DOMAIN}_history_delta"
+SIGNAL_DEGREE_DAYS_UPDATED = f"{DOMAIN}_degree_days_updated"
 
 # Operating modes
 MODE_BOILER_TRACKING = "boiler_tracking"
 MODE_BILL_ENTRY = "bill_entry"
+MODE_PULSE_COUNTER = "pulse_counter"
 
 # Conversion factors (to/from canonical m³)
 # 1 CCF = 100 cubic feet = 2.83168 cubic meters
@@ -33,6 +112,10 @@ M3_TO_CF = 1 / CF_TO_M3
 # 1 therm ≈ 100 cubic feet of natural gas (approximate)
 THERM_TO_M3 = 2.83168
 M3_TO_THERM = 1 / THERM_TO_M3
+# Energy content: calorific value in MJ/m³ divided by MJ per kWh/therm
+MJ_PER_KWH = 3.6
+MJ_PER_THERM = 105.506
+KWH_PER_THERM = MJ_PER_THERM / MJ_PER_KWH
 
 # Default values
 DEFAULT_BOILER_AV_H = 0.64153071524727  # m³ per hour
@@ -41,3 +124,10 @@ DEFAULT_LATEST_GAS_DATA = 0
 DEFAULT_BOILER_ENTITY = None  # No default - user must select
 DEFAULT_UNIT_SYSTEM = UNIT_SYSTEM_METRIC
 DEFAULT_OPERATING_MODE = MODE_BOILER_TRACKING
+DEFAULT_STORAGE_FORMAT = STORAGE_FORMAT_JSON
+DEFAULT_BILLING_DAY = 1  # Billing cycle starts on this day of the month
+DEFAULT_HDD_BASE_TEMPERATURE = 15.5  # °C, heating degree-day base temperature
+DEFAULT_UNIT_PRICE = 0.0  # No tariff - cost sensors disabled
+DEFAULT_PRICE_UNIT = PRICE_UNIT_M3
+DEFAULT_CALORIFIC_VALUE = 39.5  # MJ/m³, typical natural gas
+DEFAULT_DAILY_CHARGE = 0.0
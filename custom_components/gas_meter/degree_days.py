@@ -0,0 +1,327 @@
+"""Heating degree-day regression for the Virtual Gas Meter integration.
+
+Space heating follows the weather: the gas of a reading interval is
+modelled as base·days + k·HDD, where the heating degree-days (HDD) come
+from an outdoor temperature sensor. Daily HDD are integrated from the
+sensor's state changes as they arrive and kept for two billing cycles (the
+recorder usually keeps only ten days). The regression keeps its normal
+equations, so every new reading adds one row in O(1).
+"""
+import logging
+import math
+from datetime import datetime, timedelta
+
+import numpy as np
+
+from homeassistant.const import ATTR_UNIT_OF_MEASUREMENT, UnitOfTemperature
+from homeassistant.core import HomeAssistant, Event, callback
+from homeassistant.helpers.dispatcher import async_dispatcher_send
+from homeassistant.helpers.event import (
+    async_track_state_change_event,
+    async_track_time_change,
+)
+from homeassistant.helpers.storage import Store
+from homeassistant.util import dt as dt_util
+from .const import (
+    DOMAIN,
+    DEGREE_DAY_HISTORY_DAYS,
+    DEGREE_DAY_FORECAST_DAYS,
+    DEGREE_DAY_MIN_INTERVALS,
+    SIGNAL_DEGREE_DAYS_UPDATED,
+)
+from .modulation import TrapezoidIntegrator
+from .period_meter import meter_value
+from .recorder_access import async_get_state_series, to_timestamps, trapezoid_in_intervals
+
+_LOGGER = logging.getLogger(__name__)
+
+STORAGE_KEY = f"{DOMAIN}_degree_days"
+STORAGE_VERSION = 1
+MINUTES_PER_DAY = 24 * 60
+
+
+def heating_degrees(state, base_temperature: float, unit: str | None = None) -> float:
+    """Return max(base - T, 0) in °C for a temperature state, NaN if unusable."""
+    try:
+        value = float(state)
+    except (TypeError, ValueError):
+        return math.nan
+    if math.isnan(value):
+        return value
+    if unit == UnitOfTemperature.FAHRENHEIT:
+        value = (value - 32) * 5 / 9
+    return max(base_temperature - value, 0.0)
+
+
+class DegreeDayFit:
+    """Normal equations of consumption ~ base·days + k·HDD over the reading intervals."""
+
+    FIELDS = ("count", "days", "hdd", "days_days", "days_hdd", "hdd_hdd", "days_gas", "hdd_gas")
+
+    def __init__(self, sums: dict | None = None):
+        self.sums = {field: float((sums or {}).get(field, 0.0)) for field in self.FIELDS}
+
+    @classmethod
+    def from_intervals(cls, days, hdd, gas) -> "DegreeDayFit":
+        """Build the normal equations of many intervals at once."""
+        days, hdd, gas = (np.asarray(values, dtype=float) for values in (days, hdd, gas))
+        return cls({
+            "count": len(days),
+            "days": days.sum(),
+            "hdd": hdd.sum(),
+            "days_days": days @ days,
+            "days_hdd": days @ hdd,
+            "hdd_hdd": hdd @ hdd,
+            "days_gas": days @ gas,
+            "hdd_gas": hdd @ gas,
+        })
+
+    def to_dict(self) -> dict:
+        """Return the sums for storing with a record."""
+        return dict(self.sums)
+
+    def add(self, days: float, hdd: float, gas: float):
+        """Add one reading interval."""
+        sums = self.sums
+        sums["count"] += 1
+        sums["days"] += days
+        sums["hdd"] += hdd
+        sums["days_days"] += days * days
+        sums["days_hdd"] += days * hdd
+        sums["hdd_hdd"] += hdd * hdd
+        sums["days_gas"] += days * gas
+        sums["hdd_gas"] += hdd * gas
+
+    @property
+    def normal_daily_hdd(self) -> float:
+        """Return the average HDD per day over all fitted intervals."""
+        return self.sums["hdd"] / self.sums["days"] if self.sums["days"] else 0.0
+
+    def solve(self) -> tuple[float, float] | None:
+        """Return (base m³/day, k m³/HDD), or None while there are too few intervals."""
+        sums = self.sums
+        if sums["count"] < DEGREE_DAY_MIN_INTERVALS or not sums["days_days"]:
+            return None
+
+        matrix = np.array([[sums["days_days"], sums["days_hdd"]], [sums["days_hdd"], sums["hdd_hdd"]]])
+        target = np.array([sums["days_gas"], sums["hdd_gas"]])
+        if np.linalg.matrix_rank(matrix) == 2:
+            base, k = np.linalg.solve(matrix, target)
+            if base >= 0 and k >= 0:
+                return float(base), float(k)
+            if base < 0 and sums["hdd_hdd"]:
+                return 0.0, max(float(sums["hdd_gas"] / sums["hdd_hdd"]), 0.0)
+
+        # No heating (or negative weather dependence): base load only
+        return max(float(sums["days_gas"] / sums["days_days"]), 0.0), 0.0
+
+
+class DegreeDayEngine:
+    """Daily heating degree-days from an outdoor temperature sensor and the regression on top."""
+
+    def __init__(self, hass: HomeAssistant, entity_id: str, base_temperature: float, operating_mode: str):
+        self.hass = hass
+        self.entity_id = entity_id
+        self.base_temperature = base_temperature
+        self.operating_mode = operating_mode
+        self.daily = {}  # ISO local date -> HDD of that (complete) day
+        self.fit = DegreeDayFit()
+        self._today = TrapezoidIntegrator(dt_util.utcnow())
+        self._day_start = dt_util.start_of_local_day()
+        self._store = Store(hass, STORAGE_VERSION, STORAGE_KEY)
+        self._unsub = []
+
+    @property
+    def coefficients(self) -> tuple[float, float] | None:
+        """Return the fitted (base m³/day, k m³/HDD)."""
+        return self.fit.solve()
+
+    @property
+    def hdd_today(self) -> float:
+        """Return the HDD accumulated since local midnight."""
+        return self._today.value_at(dt_util.utcnow()) / MINUTES_PER_DAY
+
+    def _degrees(self, state) -> float:
+        """Convert a state of the temperature sensor to heating degrees."""
+        sensor_state = self.hass.states.get(self.entity_id)
+        unit = sensor_state.attributes.get(ATTR_UNIT_OF_MEASUREMENT) if sensor_state else None
+        return heating_degrees(state, self.base_temperature, unit)
+
+    async def async_start(self, gas_consume):
+        """Restore and back-fill the daily HDD, fit the stored intervals and start tracking."""
+        stored = await self._store.async_load()
+        self.daily = dict(stored.get("daily", {})) if stored else {}
+        await self._async_backfill()
+
+        latest = gas_consume[-1] if gas_consume else {}
+        if "degree_day_fit" in latest:
+            self.fit = DegreeDayFit(latest["degree_day_fit"])
+        else:
+            self._fit_records(gas_consume)
+
+        self._unsub.append(
+            async_track_state_change_event(self.hass, [self.entity_id], self._async_state_changed)
+        )
+        self._unsub.append(
+            async_track_time_change(self.hass, self._async_midnight, hour=0, minute=0, second=0)
+        )
+
+    @callback
+    def async_stop(self):
+        """Stop tracking the temperature sensor."""
+        while self._unsub:
+            self._unsub.pop()()
+
+    async def _async_backfill(self):
+        """Fill missing days (and today so far) from the recorder with one query."""
+        now = dt_util.utcnow()
+        today = dt_util.as_local(now).date()
+        day_starts = [
+            dt_util.start_of_local_day(today - timedelta(days=offset))
+            for offset in range(DEGREE_DAY_HISTORY_DAYS, -1, -1)
+        ]
+        missing = [
+            start for start in day_starts[:-1]
+            if dt_util.as_local(start).date().isoformat() not in self.daily
+        ]
+        query_start = missing[0] if missing else day_starts[-1]
+
+        state = self.hass.states.get(self.entity_id)
+        value = self._degrees(state.state) if state else math.nan
+        self._day_start = day_starts[-1]
+        self._today = TrapezoidIntegrator(now, None if math.isnan(value) else value)
+
+        try:
+            series = (await async_get_state_series(
+                self.hass, query_start, now, converted_entities={self.entity_id: self._degrees}
+            ))[self.entity_id]
+        except Exception as e:
+            _LOGGER.error(f"Error loading outdoor temperature history for {self.entity_id}: {e}")
+            return
+        if not len(series.timestamps):
+            return
+
+        starts = [*missing, day_starts[-1]]
+        ends = [dt_util.start_of_local_day(dt_util.as_local(start).date() + timedelta(days=1)) for start in missing]
+        ends.append(now)
+        totals = trapezoid_in_intervals(series, to_timestamps(starts), to_timestamps(ends))
+        first_known = series.timestamps[0]
+        for start, total in zip(missing, totals):
+            # Only days the recorder fully covers
+            if dt_util.as_utc(start).timestamp() >= first_known:
+                self.daily[dt_util.as_local(start).date().isoformat()] = float(total) / MINUTES_PER_DAY
+        self._today.total = float(totals[-1])
+        if missing:
+            await self._store.async_save({"daily": self.daily})
+
+    def _fit_records(self, gas_consume):
+        """Fit all stored intervals whose HDD are known (vectorized)."""
+        rows = []
+        for previous, latest in zip(gas_consume, gas_consume[1:]):
+            hdd = latest.get("hdd")
+            if hdd is None:
+                hdd = self.hdd_between(previous["datetime"], latest["datetime"])
+            if hdd is None:
+                continue
+            days = (dt_util.as_utc(latest["datetime"]) - dt_util.as_utc(previous["datetime"])).total_seconds() / 86400
+            gas = meter_value(latest, self.operating_mode) - meter_value(previous, self.operating_mode)
+            if days > 0:
+                rows.append((days, hdd, gas))
+        if rows:
+            self.fit = DegreeDayFit.from_intervals(*zip(*rows))
+            _LOGGER.info(f"Degree-day regression fitted over {len(rows)} stored intervals: {self.coefficients}")
+
+    def hdd_between(self, start: datetime, end: datetime) -> float | None:
+        """Return the HDD between start and end, or None if a day is not covered."""
+        now = dt_util.utcnow()
+        start, end = dt_util.as_utc(start), min(dt_util.as_utc(end), now)
+        if end <= start:
+            return 0.0
+
+        total = 0.0
+        day = dt_util.as_local(start).date()
+        today = dt_util.as_local(now).date()
+        while True:
+            day_start = dt_util.start_of_local_day(day)
+            if day_start >= end:
+                return total
+            day_end = dt_util.start_of_local_day(day + timedelta(days=1))
+            overlap = (min(end, day_end) - max(start, day_start)).total_seconds()
+            if day == today:
+                elapsed = (now - day_start).total_seconds()
+                if elapsed > 0:
+                    total += self.hdd_today * overlap / elapsed
+            else:
+                day_hdd = self.daily.get(day.isoformat())
+                if day_hdd is None:
+                    return None
+                total += day_hdd * overlap / (day_end - day_start).total_seconds()
+            day += timedelta(days=1)
+
+    def recent_daily_hdd(self) -> float:
+        """Return the average HDD per day over the last complete days."""
+        today = dt_util.now().date()
+        recent = [
+            self.daily[day.isoformat()]
+            for day in (today - timedelta(days=offset) for offset in range(1, DEGREE_DAY_FORECAST_DAYS + 1))
+            if day.isoformat() in self.daily
+        ]
+        if recent:
+            return sum(recent) / len(recent)
+        elapsed_days = (dt_util.utcnow() - self._day_start).total_seconds() / 86400
+        return self.hdd_today / elapsed_days if elapsed_days > 0 else 0.0
+
+    @callback
+    def async_add_reading(self, gas_consume):
+        """Add the latest reading interval to the regression ("hdd", "degree_day_fit")."""
+        if len(gas_consume) < 2:
+            return
+        previous, latest = gas_consume[-2], gas_consume[-1]
+        days = (dt_util.as_utc(latest["datetime"]) - dt_util.as_utc(previous["datetime"])).total_seconds() / 86400
+        hdd = self.hdd_between(previous["datetime"], latest["datetime"])
+        if hdd is not None and days > 0:
+            latest["hdd"] = hdd
+            gas = meter_value(latest, self.operating_mode) - meter_value(previous, self.operating_mode)
+            self.fit.add(days, hdd, gas)
+        latest["degree_day_fit"] = self.fit.to_dict()
+        _LOGGER.debug(f"Degree-day regression: {self.coefficients} (HDD of the interval: {hdd})")
+
+    def forecast(self, consumption: float, now: datetime, end: datetime) -> float | None:
+        """Return the expected gas (m³) of the billing cycle from the consumption so far."""
+        coefficients = self.coefficients
+        if coefficients is None:
+            return None
+        base, k = coefficients
+        remaining_days = max((dt_util.as_utc(end) - dt_util.as_utc(now)).total_seconds() / 86400, 0.0)
+        return consumption + remaining_days * (base + k * self.recent_daily_hdd())
+
+    def normalised(self, consumption: float, start: datetime, now: datetime) -> tuple[float, float] | None:
+        """Return the billing cycle consumption at normal weather and the cycle's HDD."""
+        coefficients = self.coefficients
+        hdd = self.hdd_between(start, now)
+        if coefficients is None or hdd is None:
+            return None
+        elapsed_days = (dt_util.as_utc(now) - dt_util.as_utc(start)).total_seconds() / 86400
+        normal_hdd = self.fit.normal_daily_hdd * elapsed_days
+        return max(consumption - coefficients[1] * (hdd - normal_hdd), 0.0), hdd
+
+    @callback
+    def _async_state_changed(self, event: Event):
+        """Feed a temperature change into today's degree-days."""
+        new_state = event.data.get("new_state")
+        value = self._degrees(new_state.state) if new_state else math.nan
+        self._today.add_sample(dt_util.utcnow(), None if math.isnan(value) else value)
+        async_dispatcher_send(self.hass, SIGNAL_DEGREE_DAYS_UPDATED)
+
+    async def _async_midnight(self, now: datetime):
+        """Close the day that just ended and start a new one."""
+        now = dt_util.as_utc(now)
+        finished = dt_util.as_local(self._day_start).date()
+        self.daily[finished.isoformat()] = self._today.value_at(now) / MINUTES_PER_DAY
+        self._today = TrapezoidIntegrator(now, self._today.last_value)
+        self._day_start = dt_util.start_of_local_day()
+
+        oldest = (dt_util.as_local(now).date() - timedelta(days=DEGREE_DAY_HISTORY_DAYS)).isoformat()
+        self.daily = {day: hdd for day, hdd in self.daily.items() if day >= oldest}
+        await self._store.async_save({"daily": self.daily})
+        async_dispatcher_send(self.hass, SIGNAL_DEGREE_DAYS_UPDATED)
@@ -1,10 +1,15 @@
 """File handler for gas meter data persistence using Home Assistant Store."""
+import json
 import logging
+import os
 from pathlib import Path
 from datetime import datetime
 from homeassistant.helpers.storage import Store
+from homeassistant.helpers.dispatcher import async_dispatcher_send
+from .const import DOMAIN, CONF_STORAGE_FORMAT, STORAGE_FORMAT_BINARY, STORAGE_FORMAT_JSON, SIGNAL_RECORDS_UPDATED
 from .datetime_handler import string_to_datetime
 from .gas_consume import GasConsume
+from .snapshot_codec import encode_snapshot, decode_snapshot
 
 _LOGGER = logging.getLogger(__name__)
 
@@ -12,6 +17,59 @@ _LOGGER = logging.getLogger(__name__)
 STORAGE_VERSION = 1
 STORAGE_KEY = "gas_meter_data"
 
+# Binary snapshot file (optional storage format)
+BINARY_SNAPSHOT_FILE = f"{STORAGE_KEY}.bin"
+
+
+def _get_binary_path(hass) -> Path:
+    """Returns the path to the binary snapshot file."""
+    return Path(hass.config.path(".storage", BINARY_SNAPSHOT_FILE))
+
+
+def _use_binary_format(hass) -> bool:
+    """Return True if the configured storage format is the binary snapshot."""
+    return any(
+        entry_config.get(CONF_STORAGE_FORMAT) == STORAGE_FORMAT_BINARY
+        for entry_config in hass.data.get(DOMAIN, {}).values()
+    )
+
+
+def _write_binary_snapshot(path: Path, records: list) -> int:
+    """Encode and atomically write the binary snapshot; returns its size (executor only)."""
+    data = encode_snapshot(records)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    tmp_path = path.with_suffix(".tmp")
+    with open(tmp_path, "wb") as file:
+        file.write(data)
+    os.replace(tmp_path, path)
+    return len(data)
+
+
+def _read_binary_snapshot(path: Path) -> list | None:
+    """Read and decode the binary snapshot if it exists (executor only)."""
+    if not path.exists():
+        return None
+    return decode_snapshot(path.read_bytes())
+
+
+def _snapshot_matches(path: Path, records: list) -> bool:
+    """Return True if the written snapshot decodes to the given records (executor only)."""
+    def canonical(values):
+        return json.dumps(_serialize_records(values), sort_keys=True, default=str)
+
+    try:
+        return canonical(_read_binary_snapshot(path) or []) == canonical(records)
+    except Exception as e:
+        _LOGGER.error(f"Error reading back the binary snapshot: {e}")
+        return False
+
+
+def _backup_file(path: Path):
+    """Keep a replaced snapshot file as <name>.bak (executor only)."""
+    if path.exists():
+        os.replace(path, path.with_name(f"{path.name}.bak"))
+
+
 # Legacy pickle file path (for migration)
 def _get_legacy_pickle_path(hass):
     """Returns the path to the legacy pickle file."""
@@ -61,6 +119,7 @@ def _deserialize_records(records: list) -> GasConsume:
             else:
                 deserialized_record[key] = value
         gas_consume.data.append(deserialized_record)
+    gas_consume.mark_stored()
     return gas_consume
 
 
@@ -100,29 +159,100 @@ def _get_store(hass) -> Store:
     return Store(hass, STORAGE_VERSION, STORAGE_KEY)
 
 
+def _use_json_format(hass):
+    """Store the records as JSON for the rest of the session (the snapshot did not read back)."""
+    for entry_config in hass.data.get(DOMAIN, {}).values():
+        if entry_config.get(CONF_STORAGE_FORMAT) == STORAGE_FORMAT_BINARY:
+            entry_config[CONF_STORAGE_FORMAT] = STORAGE_FORMAT_JSON
+
+
+async def _save_binary_snapshot(gas_consume: GasConsume, hass):
+    """Save gas consumption data as a binary snapshot."""
+    size = await hass.async_add_executor_job(_write_binary_snapshot, _get_binary_path(hass), gas_consume.data)
+    _LOGGER.debug(f"Saved {len(gas_consume)} gas records to binary snapshot ({size} bytes)")
+
+
+async def _load_binary_snapshot(hass) -> GasConsume | None:
+    """Load gas consumption data from the binary snapshot, if there is one."""
+    records = await hass.async_add_executor_job(_read_binary_snapshot, _get_binary_path(hass))
+    if records is None:
+        return None
+    gas_consume = GasConsume()
+    gas_consume.data = records
+    gas_consume.mark_stored()
+    _LOGGER.debug(f"Loaded {len(gas_consume)} gas records from binary snapshot")
+    return gas_consume
+
+
 async def save_gas_actualdata(gas_consume: GasConsume, hass):
-    """Save gas consumption data using Home Assistant Store."""
-    store = _get_store(hass)
+    """Save gas consumption data using Home Assistant Store (or the binary snapshot)."""
+    if _use_binary_format(hass):
+        await _save_binary_snapshot(gas_consume, hass)
+    else:
+        store = _get_store(hass)
 
-    data = {
-        "version": STORAGE_VERSION,
-        "records": _serialize_records(gas_consume),
-    }
+        data = {
+            "version": STORAGE_VERSION,
+            "records": _serialize_records(gas_consume),
+        }
 
-    await store.async_save(data)
-    _LOGGER.debug(f"Saved {len(gas_consume)} gas records to storage")
+        await store.async_save(data)
+        _LOGGER.debug(f"Saved {len(gas_consume)} gas records to storage")
+
+    # Let the in-process consumers (period meters, ...) pick up the new records,
+    # the change set is reset once they have seen it
+    async_dispatcher_send(hass, SIGNAL_RECORDS_UPDATED, gas_consume)
+    gas_consume.mark_stored()
 
 
 async def load_gas_actualdata(hass) -> GasConsume:
     """
     Load gas consumption data from Home Assistant Store.
-    Automatically migrates from pickle if legacy file exists.
+    Automatically migrates from pickle if legacy file exists, and between
+    the JSON Store and the binary snapshot when the storage format changes.
     """
     store = _get_store(hass)
 
+    if _use_binary_format(hass):
+        gas_consume = await _load_binary_snapshot(hass)
+        if gas_consume is not None:
+            return gas_consume
+
+        # No snapshot yet - convert the JSON Store (or legacy pickle) data
+        data = await store.async_load()
+        gas_consume = _deserialize_records(data.get("records", [])) if data is not None else await _migrate_from_pickle(hass)
+        if gas_consume is None:
+            _LOGGER.debug("No existing gas data found, starting fresh")
+            return GasConsume()
+        await _save_binary_snapshot(gas_consume, hass)
+
+        # The JSON data is only put aside once the snapshot reads back identical
+        binary_path = _get_binary_path(hass)
+        if not await hass.async_add_executor_job(_snapshot_matches, binary_path, gas_consume):
+            _LOGGER.error("The binary snapshot does not match the stored records, keeping the JSON storage")
+            await hass.async_add_executor_job(binary_path.unlink)
+            _use_json_format(hass)
+            if data is None:
+                await save_gas_actualdata(gas_consume, hass)
+            return gas_consume
+        if data is not None:
+            await Store(hass, STORAGE_VERSION, f"{STORAGE_KEY}.bak").async_save(data)
+            await store.async_remove()
+        _LOGGER.info(f"Converted {len(gas_consume)} gas records from JSON storage to binary snapshot (JSON kept as {STORAGE_KEY}.bak)")
+        return gas_consume
+
     # Try to load from JSON Store
     data = await store.async_load()
 
+    if data is None:
+        # Switched back from the binary snapshot - convert it to the JSON Store
+        gas_consume = await _load_binary_snapshot(hass)
+        if gas_consume is not None:
+            await save_gas_actualdata(gas_consume, hass)
+            await hass.async_add_executor_job(_backup_file, _get_binary_path(hass))
+            _LOGGER.info(f"Converted {len(gas_consume)} gas records from binary snapshot to JSON storage (snapshot kept as {BINARY_SNAPSHOT_FILE}.bak)")
+            return gas_consume
+
     if data is not None:
         # Data exists in JSON Store
         records = data.get("records", [])
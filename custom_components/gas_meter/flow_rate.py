@@ -0,0 +1,133 @@
+"""Live gas flow rate for the Virtual Gas Meter integration.
+
+The instantaneous flow is the rate model applied to what is burning right
+now: the boiler's ``average m3/min`` while it is on, the fitted rate of
+every running appliance, or the current modulation level times the
+modulation calibration. It only changes when a burner starts or stops, a
+rate is refitted or the modulation level changes, so it is re-evaluated on
+the live estimate signal and kept as a step function: every change is
+appended to a small in-memory ring buffer, from which short-window
+averages are integrated without recorder queries.
+"""
+import logging
+from collections import deque
+from datetime import datetime, timedelta
+from typing import Callable
+
+from homeassistant.core import HomeAssistant, callback
+from homeassistant.helpers.dispatcher import async_dispatcher_connect
+from homeassistant.util import dt as dt_util
+from .const import (
+    FLOW_RATE_BUFFER_SIZE,
+    SIGNAL_ESTIMATE_UPDATED,
+)
+
+_LOGGER = logging.getLogger(__name__)
+
+
+class FlowSamples:
+    """Ring buffer of (time, flow) steps; each flow holds until the next sample."""
+
+    def __init__(self, size: int = FLOW_RATE_BUFFER_SIZE):
+        self._samples = deque(maxlen=size)
+
+    def __len__(self) -> int:
+        return len(self._samples)
+
+    @property
+    def latest(self) -> float | None:
+        """Return the current flow, or None before the first sample."""
+        return self._samples[-1][1] if self._samples else None
+
+    @property
+    def changed_at(self) -> datetime | None:
+        """Return the time of the latest flow change, or None before the first sample."""
+        return self._samples[-1][0] if self._samples else None
+
+    def add(self, time: datetime, flow: float):
+        """Append a flow step; the oldest one is dropped when the buffer is full."""
+        self._samples.append((time, flow))
+
+    def average(self, minutes: float, now: datetime) -> float | None:
+        """
+        Return the time-weighted average flow of the last minutes.
+
+        Only the time covered by the buffer counts, so the average of a
+        window reaching before the oldest sample is over the covered part.
+        """
+        if not self._samples:
+            return None
+        start = now - timedelta(minutes=minutes)
+        total, end = 0.0, now
+        for time, flow in reversed(self._samples):
+            segment_start = max(time, start)
+            if end > segment_start:
+                total += flow * (end - segment_start).total_seconds()
+            end = time
+            if time <= start:
+                break
+        seconds = (now - max(start, self._samples[0][0])).total_seconds()
+        return total / seconds if seconds > 0 else self._samples[-1][1]
+
+
+class FlowRateMeter:
+    """
+    Current gas flow (m³/min) of one gas meter.
+
+    Follows the live estimate signal and notifies its listeners only when
+    the flow actually changed.
+    """
+
+    def __init__(self, hass: HomeAssistant, live_flow: Callable[[], float]):
+        self.hass = hass
+        self.samples = FlowSamples()
+        self._live_flow = live_flow
+        self._listeners = []
+        self._unsub = None
+
+    @property
+    def flow(self) -> float:
+        """Return the current flow (m³/min)."""
+        return self.samples.latest or 0.0
+
+    def average(self, minutes: float) -> float | None:
+        """Return the average flow (m³/min) of the last minutes."""
+        return self.samples.average(minutes, dt_util.utcnow())
+
+    def settled(self, minutes: float) -> bool:
+        """Return True if the flow has not changed for the last minutes (all averages equal the flow)."""
+        changed_at = self.samples.changed_at
+        return changed_at is None or dt_util.utcnow() - changed_at >= timedelta(minutes=minutes)
+
+    @callback
+    def async_start(self):
+        """Take the first sample and start following the live estimate."""
+        self._unsub = async_dispatcher_connect(self.hass, SIGNAL_ESTIMATE_UPDATED, self._async_update)
+        self._async_update()
+
+    @callback
+    def async_stop(self):
+        """Stop following the live estimate."""
+        if self._unsub is not None:
+            self._unsub()
+            self._unsub = None
+
+    @callback
+    def async_add_listener(self, update_callback: Callable[[], None]) -> Callable[[], None]:
+        """Register a flow sensor; returns a function removing it."""
+        self._listeners.append(update_callback)
+        return lambda: self._listeners.remove(update_callback)
+
+    @callback
+    def _async_update(self, *_):
+        """Sample the flow and notify the listeners if it changed."""
+        try:
+            flow = max(self._live_flow(), 0.0)
+        except Exception as e:
+            _LOGGER.error(f"Error computing the gas flow rate: {e}")
+            return
+        if flow == self.samples.latest:
+            return
+        self.samples.add(dt_util.utcnow(), flow)
+        for update_callback in list(self._listeners):
+            update_callback()
@@ -1,8 +1,26 @@
 from collections import UserList
 
 # Class for storing and managing records.
+# It also keeps the change set since the records were loaded (records appended
+# after stored_count, stored positions in corrected), so consumers of a save
+# don't have to compare the whole history.
 class GasConsume(UserList):
 
+    def __init__(self, initlist=None):
+        super().__init__(initlist)
+        self.stored_count = 0
+        self.corrected = set()
+
+    # Mark all records as stored (after loading or saving)
+    def mark_stored(self):
+        self.stored_count = len(self.data)
+        self.corrected = set()
+
+    # Record that a stored record was changed (appended records are new anyway)
+    def mark_corrected(self, position):
+        if 0 <= position < self.stored_count:
+            self.corrected.add(position)
+
     # Add record to self.data
     def add_record(self, datetime, consumed_gas):
         self.data.append(
@@ -0,0 +1,188 @@
+"""History export for the Virtual Gas Meter integration.
+
+Records are selected with the timestamp index of the period meters (two
+bisections for the date filter) and streamed one at a time, either into a
+CSV / NDJSON file in the export directory or as one page of a paged JSON
+service response. Nothing is logged per record and no export-sized copy
+of the history is built.
+
+The history itself is loaded as a whole: the JSON Store and the binary
+snapshot are single documents that cannot be read partially, so an
+export needs the memory of one history load, not constant memory.
+"""
+import csv
+import json
+import logging
+import os
+from datetime import datetime
+
+from homeassistant.core import HomeAssistant
+from .const import (
+    DOMAIN,
+    CONF_OPERATING_MODE,
+    DEFAULT_OPERATING_MODE,
+    EXPORT_FORMAT_CSV,
+    EXPORT_FORMAT_NDJSON,
+    EXPORT_FORMAT_JSON,
+    EXPORT_DIRECTORY,
+    DEFAULT_EXPORT_PAGE_SIZE,
+    MAX_EXPORT_PAGE_SIZE,
+)
+from .period_meter import ConsumptionIndex
+
+_LOGGER = logging.getLogger(__name__)
+
+# Scalar fields exported as CSV columns (nested fields are NDJSON/JSON only)
+CSV_COLUMNS = [
+    "datetime",
+    "consumed_gas",
+    "consumed_gas_cumulated",
+    "m3/min for interval",
+    "min_cumulated",
+    "average m3/min",
+    "modulation_integral",
+    "modulation_cumulated",
+    "modulation_gas_cumulated",
+    "modulation_calibration",
+]
+
+
+def export_record(record: dict) -> dict:
+    """Return a JSON-serializable copy of a record."""
+    return {
+        key: value.isoformat() if isinstance(value, datetime) else value
+        for key, value in record.items()
+    }
+
+
+def iter_records(gas_consume, positions):
+    """Yield the exported records at the given positions, one at a time."""
+    for position in positions:
+        yield export_record(gas_consume[position])
+
+
+def positioned_records(gas_consume, positions) -> list:
+    """Return the exported records at the given positions, tagged with their position."""
+    return [{"position": position, **export_record(gas_consume[position])} for position in positions]
+
+
+def get_record_index(hass: HomeAssistant, gas_consume) -> ConsumptionIndex:
+    """Return the timestamp index over gas_consume, shared with the period meters."""
+    entry_config = next(iter(hass.data.get(DOMAIN, {}).values()), {})
+    period_meters = entry_config.get("period_meters")
+    if period_meters is not None:
+        index = period_meters.index
+    else:
+        index = ConsumptionIndex(entry_config.get(CONF_OPERATING_MODE, DEFAULT_OPERATING_MODE))
+    if len(index.positions) != len(gas_consume):
+        index.rebuild(gas_consume)
+    return index
+
+
+def export_path(export_dir: str, filename: str | None, export_format: str) -> str:
+    """
+    Return the file path of a csv / ndjson export.
+
+    Only a bare file name is accepted and its extension is the export format,
+    so an export can never replace a configuration file.
+    """
+    name = os.path.basename(filename or "") or f"gas_meter_export.{export_format}"
+    root, extension = os.path.splitext(name)
+    if extension.lower() != f".{export_format}":
+        name = f"{root or 'gas_meter_export'}.{export_format}"
+    return os.path.join(export_dir, name)
+
+
+def _is_export(path: str, export_format: str) -> bool:
+    """Return True if an existing file was written by an export (executor only)."""
+    with open(path, encoding="utf-8", errors="replace") as file:
+        first_line = file.readline().rstrip("\r\n")
+    if not first_line:
+        return True
+    if export_format == EXPORT_FORMAT_CSV:
+        return first_line == ",".join(CSV_COLUMNS)
+    try:
+        return "datetime" in json.loads(first_line)
+    except (ValueError, TypeError):
+        return False
+
+
+def _prepare_export(path: str, export_format: str):
+    """Create the export directory; refuse to overwrite a file that is not an export (executor only)."""
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    if os.path.exists(path) and not (os.path.isfile(path) and _is_export(path, export_format)):
+        raise ValueError(f"Refusing to overwrite {path}, it is not a gas meter export")
+
+
+def _write_csv(path: str, records) -> int:
+    """Stream records into a CSV file (executor only)."""
+    count = 0
+    with open(path, "w", newline="", encoding="utf-8") as file:
+        writer = csv.DictWriter(file, fieldnames=CSV_COLUMNS, extrasaction="ignore")
+        writer.writeheader()
+        for record in records:
+            writer.writerow(record)
+            count += 1
+    return count
+
+
+def _write_ndjson(path: str, records) -> int:
+    """Stream records into a newline-delimited JSON file (executor only)."""
+    count = 0
+    with open(path, "w", encoding="utf-8") as file:
+        for record in records:
+            file.write(json.dumps(record, separators=(",", ":")))
+            file.write("\n")
+            count += 1
+    return count
+
+
+async def async_export_history(
+    hass: HomeAssistant,
+    gas_consume,
+    index: ConsumptionIndex,
+    export_format: str,
+    start: datetime | None = None,
+    end: datetime | None = None,
+    offset: int = 0,
+    limit: int = DEFAULT_EXPORT_PAGE_SIZE,
+    filename: str | None = None,
+) -> dict:
+    """
+    Export the records between start and end.
+
+    Args:
+        gas_consume: All records, as loaded from storage
+        index: Timestamp index over gas_consume (see get_record_index)
+        export_format: csv / ndjson (file in the export directory) or json (paged response)
+        start, end: Optional date filter (inclusive)
+        offset, limit: Page of the json response
+        filename: Optional file name for csv / ndjson (the extension is the export format)
+
+    Returns:
+        The page for json, otherwise the file path and the number of records written
+    """
+    positions = index.positions_between(start, end)
+
+    if export_format == EXPORT_FORMAT_JSON:
+        offset = max(int(offset), 0)
+        limit = min(max(int(limit), 1), MAX_EXPORT_PAGE_SIZE)
+        page = positions[offset:offset + limit]
+        next_offset = offset + limit if offset + limit < len(positions) else None
+        return {
+            "total": len(positions),
+            "offset": offset,
+            "next_offset": next_offset,
+            "records": positioned_records(gas_consume, page),
+        }
+
+    if export_format not in (EXPORT_FORMAT_CSV, EXPORT_FORMAT_NDJSON):
+        raise ValueError(f"Unknown export format: {export_format}")
+
+    # Exports always land in their own directory, never next to the configuration
+    path = export_path(hass.config.path(EXPORT_DIRECTORY), filename, export_format)
+    await hass.async_add_executor_job(_prepare_export, path, export_format)
+    writer = _write_csv if export_format == EXPORT_FORMAT_CSV else _write_ndjson
+    count = await hass.async_add_executor_job(writer, path, iter_records(gas_consume, positions))
+    _LOGGER.info(f"Exported {count} gas records to {path}")
+    return {"path": path, "count": count}
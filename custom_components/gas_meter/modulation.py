@@ -0,0 +1,152 @@
+"""Burner modulation tracking for the Virtual Gas Meter integration.
+
+Modulating (condensing) boilers do not simply switch between on and off,
+they report their burner power or modulation level as a numeric sensor.
+Gas consumption is then proportional to the integral of that signal over
+time instead of the plain burner on-time.
+"""
+import logging
+import math
+from datetime import datetime, timedelta
+
+from homeassistant.core import HomeAssistant, Event, callback
+from homeassistant.helpers.dispatcher import async_dispatcher_send
+from homeassistant.helpers.event import (
+    async_track_state_change_event,
+    async_track_time_interval,
+)
+from homeassistant.util import dt as dt_util
+from .const import DOMAIN, SIGNAL_ESTIMATE_UPDATED
+from .recorder_access import (
+    async_get_state_series,
+    numeric_state_value,
+    to_timestamps,
+    trapezoid_in_intervals,
+)
+
+_LOGGER = logging.getLogger(__name__)
+
+# How often the live accumulator is republished while the signal is steady
+LIVE_REFRESH_INTERVAL = timedelta(minutes=1)
+
+
+def parse_modulation_value(state) -> float | None:
+    """Return the numeric value of a modulation state, or None if unusable."""
+    value = numeric_state_value(state)
+    return None if math.isnan(value) else value
+
+
+class TrapezoidIntegrator:
+    """
+    Streaming trapezoidal integrator over (time, value) samples.
+
+    The integral is kept in value·minutes. A sample without a usable value
+    (None) interrupts the integration until the next valid sample.
+    """
+
+    def __init__(self, start: datetime, value: float | None = None):
+        self.total = 0.0
+        self._last_time = start
+        self._last_value = value
+
+    @property
+    def last_value(self) -> float | None:
+        """Return the most recent sample value."""
+        return self._last_value
+
+    def add_sample(self, time: datetime, value: float | None):
+        """Add a sample; samples older than the previous one are ignored."""
+        if time < self._last_time:
+            return
+        if self._last_value is not None and value is not None:
+            minutes = (time - self._last_time).total_seconds() / 60
+            self.total += (self._last_value + value) / 2 * minutes
+        self._last_time = time
+        self._last_value = value
+
+    def value_at(self, time: datetime) -> float:
+        """Return the integral up to time, holding the last value for the open segment."""
+        if self._last_value is None or time <= self._last_time:
+            return self.total
+        minutes = (time - self._last_time).total_seconds() / 60
+        return self.total + self._last_value * minutes
+
+
+class ModulationIntegrator:
+    """Live accumulator of the modulation integral since the latest gas reading."""
+
+    def __init__(self, hass: HomeAssistant, entity_id: str):
+        self.hass = hass
+        self.entity_id = entity_id
+        self._integrator = TrapezoidIntegrator(dt_util.utcnow())
+        self._unsub = []
+
+    @property
+    def value(self) -> float:
+        """Return the integral (value·minutes) since the latest reading."""
+        return self._integrator.value_at(dt_util.utcnow())
+
+    @property
+    def current(self) -> float:
+        """Return the current modulation level (0 while unknown)."""
+        return self._integrator.last_value or 0.0
+
+    async def async_start(self, since: datetime):
+        """Start tracking the modulation sensor."""
+        self._unsub.append(
+            async_track_state_change_event(
+                self.hass, [self.entity_id], self._async_state_changed
+            )
+        )
+        self._unsub.append(
+            async_track_time_interval(
+                self.hass, self._async_refresh, LIVE_REFRESH_INTERVAL
+            )
+        )
+        await self.async_reset(since)
+
+    @callback
+    def async_stop(self):
+        """Stop tracking the modulation sensor."""
+        while self._unsub:
+            self._unsub.pop()()
+
+    async def async_reset(self, since: datetime):
+        """Restart the accumulator at the given reading time."""
+        now = dt_util.utcnow()
+        since = dt_util.as_utc(since)
+        state = self.hass.states.get(self.entity_id)
+        integrator = TrapezoidIntegrator(now, parse_modulation_value(state.state) if state else None)
+
+        if since < now:
+            # Catch up on what happened between the reading and now
+            try:
+                series = await async_get_state_series(self.hass, since, now, numeric_entities=[self.entity_id])
+                integrator.total = float(
+                    trapezoid_in_intervals(series[self.entity_id], to_timestamps([since]), to_timestamps([now]))[0]
+                )
+            except Exception as e:
+                _LOGGER.error(f"Error loading modulation history for {self.entity_id}: {e}")
+
+        self._integrator = integrator
+        self._publish()
+
+    @callback
+    def _async_state_changed(self, event: Event):
+        """Feed a modulation state change into the accumulator."""
+        new_state = event.data.get("new_state")
+        value = parse_modulation_value(new_state.state) if new_state else None
+        self._integrator.add_sample(dt_util.utcnow(), value)
+        self._publish()
+
+    @callback
+    def _async_refresh(self, _now=None):
+        """Republish the accumulator while the signal does not change."""
+        if self._integrator.last_value:
+            self._publish()
+
+    @callback
+    def _publish(self):
+        """Expose the live integral as a state for the consumed gas sensor."""
+        self.hass.states.async_set(f"{DOMAIN}.modulation_integral", round(self.value, 3))
+        async_dispatcher_send(self.hass, SIGNAL_ESTIMATE_UPDATED)
@@ -0,0 +1,221 @@
+"""Built-in period meters for the Virtual Gas Meter integration.
+
+Period totals (hourly, daily, weekly, monthly and per billing cycle) are
+computed in-process from the stored readings plus the live burner estimate,
+instead of stacking utility_meter helpers on top of the gas sensors. The
+readings are kept in a prefix-sum index (cumulative meter value per reading
+timestamp), so the consumption of any period is the difference of two
+interpolated index lookups.
+"""
+import logging
+from bisect import bisect_left, bisect_right
+from datetime import datetime, timedelta
+from typing import Callable
+
+from homeassistant.core import HomeAssistant, callback
+from homeassistant.helpers.dispatcher import async_dispatcher_connect
+from homeassistant.helpers.event import async_track_point_in_time
+from homeassistant.util import dt as dt_util
+from .const import (
+    MODE_BILL_ENTRY,
+    SIGNAL_RECORDS_UPDATED,
+    SIGNAL_ESTIMATE_UPDATED,
+    PERIOD_HOURLY,
+    PERIOD_DAILY,
+    PERIOD_WEEKLY,
+    PERIOD_MONTHLY,
+    PERIOD_BILLING_CYCLE,
+)
+
+_LOGGER = logging.getLogger(__name__)
+
+
+def meter_value(record: dict, operating_mode: str) -> float:
+    """Return the cumulative meter value (m³) of a record."""
+    if operating_mode == MODE_BILL_ENTRY:
+        # Bill entries store the period usage; the running total is the prefix sum
+        return record.get("consumed_gas_cumulated", record["consumed_gas"])
+    return record["consumed_gas"]
+
+
+def _add_months(moment: datetime, months: int, day: int) -> datetime:
+    """Return local midnight of the given day, months away from moment."""
+    month_index = moment.month - 1 + months
+    year = moment.year + month_index // 12
+    month = month_index % 12 + 1
+    return dt_util.start_of_local_day(datetime(year, month, day).date())
+
+
+def period_start(period: str, now: datetime, billing_day: int = 1) -> datetime:
+    """Return the start of the period containing now (local time)."""
+    now = dt_util.as_local(now)
+    if period == PERIOD_HOURLY:
+        return now.replace(minute=0, second=0, microsecond=0)
+    if period == PERIOD_DAILY:
+        return dt_util.start_of_local_day(now)
+    if period == PERIOD_WEEKLY:
+        return dt_util.start_of_local_day(now.date() - timedelta(days=now.weekday()))
+    if period == PERIOD_MONTHLY:
+        return _add_months(now, 0, 1)
+    if period == PERIOD_BILLING_CYCLE:
+        return _add_months(now, 0 if now.day >= billing_day else -1, billing_day)
+    raise ValueError(f"Unknown period: {period}")
+
+
+def next_period_start(period: str, now: datetime, billing_day: int = 1) -> datetime:
+    """Return the start of the period following the one containing now."""
+    start = period_start(period, now, billing_day)
+    if period == PERIOD_HOURLY:
+        return start + timedelta(hours=1)
+    if period == PERIOD_DAILY:
+        return dt_util.start_of_local_day(start.date() + timedelta(days=1))
+    if period == PERIOD_WEEKLY:
+        return dt_util.start_of_local_day(start.date() + timedelta(days=7))
+    if period == PERIOD_MONTHLY:
+        return _add_months(start, 1, 1)
+    return _add_months(start, 1, billing_day)
+
+
+class ConsumptionIndex:
+    """
+    Prefix-sum index over the gas readings.
+
+    Holds the reading timestamps (UTC epoch seconds) and the cumulative meter
+    value at each of them. Between readings the value is interpolated
+    linearly; after the latest reading the live estimate is added. The
+    position of each reading in the records list is kept as well, so date
+    filters over the records are two bisections.
+    """
+
+    def __init__(self, operating_mode: str):
+        self.operating_mode = operating_mode
+        self.timestamps = []
+        self.values = []
+        self.positions = []  # Position of each reading in the records list
+
+    def rebuild(self, gas_consume):
+        """Rebuild the index from all records."""
+        points = sorted(
+            (dt_util.as_utc(record["datetime"]).timestamp(), meter_value(record, self.operating_mode), position)
+            for position, record in enumerate(gas_consume)
+        )
+        self.timestamps = [timestamp for timestamp, _, _ in points]
+        self.values = [value for _, value, _ in points]
+        self.positions = [position for _, _, position in points]
+
+    def update(self, gas_consume):
+        """Update the index after records were saved; appends when possible."""
+        known = len(self.timestamps)
+        if len(gas_consume) == known + 1:
+            record = gas_consume[-1]
+            timestamp = dt_util.as_utc(record["datetime"]).timestamp()
+            if not known or timestamp >= self.timestamps[-1]:
+                self.timestamps.append(timestamp)
+                self.values.append(meter_value(record, self.operating_mode))
+                self.positions.append(known)
+                return
+        self.rebuild(gas_consume)
+
+    def positions_between(self, start: datetime | None = None, end: datetime | None = None) -> list:
+        """Return the record positions with start <= datetime <= end, in chronological order."""
+        low = bisect_left(self.timestamps, dt_util.as_utc(start).timestamp()) if start else 0
+        high = bisect_right(self.timestamps, dt_util.as_utc(end).timestamp()) if end else len(self.timestamps)
+        return self.positions[low:high]
+
+    def value_at(self, moment: datetime, live_estimate: float = 0.0) -> float:
+        """Return the cumulative meter value (m³) at the given moment."""
+        if not self.timestamps:
+            return live_estimate
+        timestamp = dt_util.as_utc(moment).timestamp()
+        idx = bisect_right(self.timestamps, timestamp)
+        if idx == 0:
+            return self.values[0]
+        if idx == len(self.timestamps):
+            return self.values[-1] + live_estimate
+        t0, t1 = self.timestamps[idx - 1], self.timestamps[idx]
+        v0, v1 = self.values[idx - 1], self.values[idx]
+        return v0 + (v1 - v0) * (timestamp - t0) / (t1 - t0)
+
+    def consumption(self, start: datetime, now: datetime, live_estimate: float = 0.0) -> float:
+        """Return the gas (m³) consumed between start and now."""
+        return max(self.value_at(now, live_estimate) - self.value_at(start), 0.0)
+
+
+class PeriodMeters:
+    """
+    Shared state of all period sensors of one gas meter.
+
+    Keeps the consumption index up to date from saved records and notifies
+    the period sensors on new readings, live estimate changes and at every
+    local hour (all period boundaries fall on one).
+    """
+
+    def __init__(self, hass: HomeAssistant, operating_mode: str, live_estimate: Callable[[], float], billing_day: int = 1):
+        self.hass = hass
+        self.index = ConsumptionIndex(operating_mode)
+        self.billing_day = billing_day
+        self._live_estimate = live_estimate
+        self._listeners = []
+        self._unsub = []
+        self._unsub_rollover = None
+
+    def async_start(self, gas_consume):
+        """Build the index and start listening for updates."""
+        self.index.rebuild(gas_consume)
+        self._unsub.append(
+            async_dispatcher_connect(self.hass, SIGNAL_RECORDS_UPDATED, self._async_records_updated)
+        )
+        self._unsub.append(
+            async_dispatcher_connect(self.hass, SIGNAL_ESTIMATE_UPDATED, self._async_notify)
+        )
+        self._schedule_rollover()
+
+    @callback
+    def async_stop(self):
+        """Stop listening for updates."""
+        while self._unsub:
+            self._unsub.pop()()
+        if self._unsub_rollover is not None:
+            self._unsub_rollover()
+            self._unsub_rollover = None
+
+    @callback
+    def async_add_listener(self, update_callback: Callable[[], None]) -> Callable[[], None]:
+        """Register a period sensor; returns a function removing it."""
+        self._listeners.append(update_callback)
+        return lambda: self._listeners.remove(update_callback)
+
+    def consumption(self, period: str, now: datetime | None = None) -> tuple[float, datetime]:
+        """Return the gas (m³) consumed in the current period and the period start."""
+        now = now or dt_util.utcnow()
+        start = period_start(period, now, self.billing_day)
+        return self.index.consumption(start, now, self._live_estimate()), start
+
+    def consumption_between(self, start: datetime, end: datetime) -> float:
+        """Return the gas (m³) consumed between start and end, live estimate included."""
+        return self.index.consumption(start, end, self._live_estimate())
+
+    @callback
+    def _async_records_updated(self, gas_consume):
+        """Update the index after records were saved."""
+        self.index.update(gas_consume)
+        self._async_notify()
+
+    @callback
+    def _async_notify(self, *_):
+        """Notify all period sensors."""
+        for update_callback in list(self._listeners):
+            update_callback()
+
+    @callback
+    def _schedule_rollover(self):
+        """Wake up the period sensors at the next local hour."""
+        self._unsub_rollover = async_track_point_in_time(
+            self.hass, self._async_rollover, next_period_start(PERIOD_HOURLY, dt_util.utcnow())
+        )
+
+    @callback
+    def _async_rollover(self, _now):
+        """Start new periods."""
+        self._schedule_rollover()
+        self._async_notify()
@@ -0,0 +1,362 @@
+"""Pulse counter ingestion for the Virtual Gas Meter integration.
+
+Meters with a reed-switch or optical pulse output report a fixed volume of
+gas per pulse, thousands of times a day. Pulses are counted in memory and
+aggregated into fixed time buckets, which give the live estimate and flow
+between readings. The closed buckets of a day are kept in a separate store
+with a delayed save and written to the history as one reading at local
+midnight, with one load and one save per day instead of one per pulse.
+A counter entity's last value is stored as well, so the pulses counted
+while Home Assistant is stopped are added on the next start; a restart
+only loses the pulses of a binary sensor that switched while it was down.
+
+With a burner entity, the burner on-time of every bucket is counted from
+its live transitions as well, and the readings carry the same cumulative
+fields as in boiler tracking mode: the boiler rate (``average m3/min``)
+calibrates itself from the metered pulses.
+"""
+import logging
+import math
+from datetime import datetime, timedelta
+
+from homeassistant.const import STATE_ON
+from homeassistant.core import HomeAssistant, Event, callback
+from homeassistant.helpers.dispatcher import async_dispatcher_send
+from homeassistant.helpers.event import (
+    async_track_point_in_time,
+    async_track_state_change_event,
+    async_track_time_interval,
+)
+from homeassistant.helpers.storage import Store
+from homeassistant.util import dt as dt_util
+import custom_components.gas_meter.file_handler as fh
+from .const import (
+    DOMAIN,
+    PULSE_BUCKET_MINUTES,
+    SIGNAL_ESTIMATE_UPDATED,
+)
+from .recorder_access import numeric_state_value
+
+_LOGGER = logging.getLogger(__name__)
+
+STORAGE_KEY = f"{DOMAIN}_pulses"
+STORAGE_VERSION = 1
+SAVE_DELAY = 60  # Seconds; the counts change with every pulse
+
+# How often the live estimate is republished while pulses come in
+LIVE_REFRESH_INTERVAL = timedelta(minutes=1)
+
+# Pulse entities switching on once per pulse; any other entity is a counter
+EDGE_DOMAINS = ("binary_sensor", "input_boolean", "switch")
+
+
+def bucket_start(moment: datetime, minutes: int = PULSE_BUCKET_MINUTES) -> datetime:
+    """Return the start (UTC) of the fixed bucket containing the moment."""
+    length = minutes * 60
+    timestamp = dt_util.as_utc(moment).timestamp()
+    return dt_util.utc_from_timestamp(timestamp - timestamp % length)
+
+
+def reading_end(moment: datetime) -> datetime:
+    """Return the reading time (UTC) of a bucket ending at the moment: the next local midnight."""
+    local = dt_util.as_local(moment)
+    midnight = dt_util.start_of_local_day(local)
+    if midnight != local:
+        midnight = dt_util.start_of_local_day(local.date() + timedelta(days=1))
+    return dt_util.as_utc(midnight)
+
+
+def append_readings(gas_consume, buckets: list, pulse_volume: float, track_burner: bool) -> int:
+    """
+    Append closed buckets to the history, one aggregated reading per local day.
+
+    Args:
+        buckets: List of (end, pulses, burner minutes), oldest first
+        pulse_volume: Gas per pulse (m³)
+        track_burner: Also derive the boiler tracking fields from the burner minutes
+
+    Returns:
+        Number of records appended
+    """
+    readings = {}
+    for end, pulses, minutes in buckets:
+        if gas_consume and dt_util.as_utc(gas_consume[-1]["datetime"]) >= end:
+            # Already in the history (e.g. a flush interrupted before the store was cleared)
+            continue
+        if not gas_consume:
+            # The count starts at the beginning of the first bucket
+            gas_consume.add_record(dt_util.as_local(end - timedelta(minutes=PULSE_BUCKET_MINUTES)), 0.0)
+        reading = reading_end(end)
+        reading_pulses, reading_minutes = readings.get(reading, (0, 0.0))
+        readings[reading] = (reading_pulses + pulses, reading_minutes + minutes)
+
+    for end, (pulses, minutes) in readings.items():
+        previous = gas_consume[-1]
+        gas = pulses * pulse_volume
+        gas_consume.add_record(dt_util.as_local(end), previous["consumed_gas"] + gas)
+        record = gas_consume[-1]
+        record["pulses"] = pulses
+        record["consumed_gas_cumulated"] = record["consumed_gas"] - gas_consume[0]["consumed_gas"]
+        if track_burner:
+            record["min_cumulated"] = previous.get("min_cumulated", 0.0) + minutes
+            if minutes:
+                record["m3/min for interval"] = gas / minutes
+            if record["min_cumulated"]:
+                record["average m3/min"] = record["consumed_gas_cumulated"] / record["min_cumulated"]
+    return len(readings)
+
+
+class PulseCounter:
+    """
+    In-memory pulse counts of the open bucket and of the closed buckets not
+    yet written to the history (at most a day of them).
+    """
+
+    def __init__(self, hass: HomeAssistant, pulse_entity: str, pulse_volume: float, burner_signal=None, average_rate: float = 0.0, degree_days=None):
+        self.hass = hass
+        self.pulse_entity = pulse_entity
+        self.pulse_volume = pulse_volume
+        self.burner_signal = burner_signal
+        self.degree_days = degree_days
+        self.average_rate = average_rate  # m³ per burner minute, calibrated from the pulses
+        self._store = Store(hass, STORAGE_VERSION, STORAGE_KEY)
+        self._edges = pulse_entity.split(".")[0] in EDGE_DOMAINS
+        self._last_count = None
+        self._bucket_start = bucket_start(dt_util.utcnow())
+        self._pulses = 0
+        self._burner_minutes = 0.0
+        self._burner_on_since = None
+        self._pending = []  # Closed buckets: (end, pulses, burner minutes)
+        self._last_bucket_flow = 0.0
+        self._flushing = []  # Closed buckets being written to the history
+        self._dirty = False
+        self._unsub = []
+        self._unsub_bucket = None
+
+    @property
+    def pulses(self) -> int:
+        """Return the pulses counted since the latest reading in the history."""
+        return self._pulses + sum(pulses for _, pulses, _ in self._flushing + self._pending)
+
+    @property
+    def value(self) -> float:
+        """Return the gas (m³) metered since the latest reading in the history."""
+        return self.pulses * self.pulse_volume
+
+    @property
+    def flow(self) -> float:
+        """
+        Return the current gas flow (m³/min): the calibrated boiler rate while
+        the burner is on, without a burner the flow of the last closed bucket.
+        """
+        if self.burner_signal is not None:
+            return self.average_rate if self._burner_on_since is not None else 0.0
+        return self._last_bucket_flow
+
+    async def async_start(self, gas_consume):
+        """Restore the counts and start counting pulses."""
+        if gas_consume:
+            self.average_rate = gas_consume[-1].get("average m3/min", self.average_rate)
+
+        stored = await self._store.async_load()
+        if stored:
+            self._pending = [
+                (dt_util.parse_datetime(end), int(pulses), float(minutes))
+                for end, pulses, minutes in stored.get("pending", [])
+            ]
+            stored_start = dt_util.parse_datetime(stored["bucket_start"])
+            if stored_start == self._bucket_start:
+                self._pulses = int(stored["pulses"])
+                self._burner_minutes = float(stored["burner_minutes"])
+            elif stored["pulses"] or stored["burner_minutes"]:
+                # The bucket ended while Home Assistant was stopped
+                self._pending.append((
+                    stored_start + timedelta(minutes=PULSE_BUCKET_MINUTES),
+                    int(stored["pulses"]),
+                    float(stored["burner_minutes"]),
+                ))
+            self._last_count = stored.get("last_count")
+
+        state = self.hass.states.get(self.pulse_entity)
+        if state is not None and not self._edges:
+            # Pulses counted while Home Assistant was stopped
+            self._count(state.state)
+
+        entities = [self.pulse_entity]
+        if self.burner_signal is not None:
+            entities.append(self.burner_signal.entity_id)
+            if self.burner_signal.is_on(self.hass.states.get(self.burner_signal.entity_id)):
+                self._burner_on_since = dt_util.utcnow()
+        self._unsub.append(
+            async_track_state_change_event(self.hass, entities, self._async_state_changed)
+        )
+        self._unsub.append(
+            async_track_time_interval(self.hass, self._async_refresh, LIVE_REFRESH_INTERVAL)
+        )
+        self._schedule_bucket_close()
+
+        if self._due_buckets(dt_util.utcnow()):
+            await self.async_flush()
+        self._publish()
+
+    @callback
+    def async_stop(self):
+        """Stop counting (async_save keeps the counts)."""
+        while self._unsub:
+            self._unsub.pop()()
+        if self._unsub_bucket is not None:
+            self._unsub_bucket()
+            self._unsub_bucket = None
+        if self._burner_on_since is not None:
+            now = dt_util.utcnow()
+            self._burner_minutes += (now - self._burner_on_since).total_seconds() / 60
+            self._burner_on_since = now
+
+    async def async_save(self):
+        """Save the counts right away, e.g. before the entry is reloaded."""
+        await self._store.async_save(self._data_to_save())
+
+    async def async_flush(self):
+        """Append the closed buckets of the past days to the history with one load and one save."""
+        buckets = self._due_buckets(dt_util.utcnow())
+        if self._flushing or not buckets:
+            return
+        self._flushing = buckets
+        self._pending = self._pending[len(buckets):]
+        try:
+            gas_consume = await fh.load_gas_actualdata(self.hass)
+            appended = 0
+            for end in sorted({reading_end(bucket_end) for bucket_end, _, _ in buckets}):
+                day = [bucket for bucket in buckets if reading_end(bucket[0]) == end]
+                if append_readings(gas_consume, day, self.pulse_volume, self.burner_signal is not None):
+                    appended += 1
+                    if self.degree_days is not None:
+                        self.degree_days.async_add_reading(gas_consume)
+            if appended:
+                latest = gas_consume[-1]
+                self.average_rate = latest.get("average m3/min", self.average_rate)
+                self.hass.states.async_set(f"{DOMAIN}.latest_gas_update", latest["datetime"])
+                self.hass.states.async_set(f"{DOMAIN}.latest_gas_data", latest["consumed_gas"])
+                if self.burner_signal is not None:
+                    self.hass.states.async_set(f"{DOMAIN}.average_m3_per_min", self.average_rate)
+                await fh.save_gas_actualdata(gas_consume, self.hass)
+            _LOGGER.debug(f"Wrote {len(buckets)} pulse buckets to the gas history as {appended} readings")
+        except Exception as e:
+            _LOGGER.error(f"Error writing pulse buckets to the gas history: {e}")
+            # Keep them for the next flush
+            self._pending = buckets + self._pending
+        finally:
+            self._flushing = []
+        self._store.async_delay_save(self._data_to_save, SAVE_DELAY)
+        self._publish()
+
+    def _due_buckets(self, now: datetime) -> list:
+        """Return the closed buckets whose reading time has passed."""
+        due = 0
+        while due < len(self._pending) and reading_end(self._pending[due][0]) <= now:
+            due += 1
+        return self._pending[:due]
+
+    @callback
+    def _count(self, state) -> int:
+        """Count the pulses of a new counter entity reading since the last one."""
+        value = numeric_state_value(state)
+        if math.isnan(value):
+            return 0
+        if self._last_count is None:
+            pulses = 0
+        elif value >= self._last_count:
+            pulses = round(value - self._last_count)
+        else:
+            # The counter was reset
+            pulses = round(value)
+        self._last_count = value
+        self._pulses += pulses
+        self._store.async_delay_save(self._data_to_save, SAVE_DELAY)
+        return pulses
+
+    @callback
+    def _async_state_changed(self, event: Event):
+        """Count a pulse or follow the burner."""
+        entity_id = event.data["entity_id"]
+        new_state = event.data.get("new_state")
+        if self.burner_signal is not None and entity_id == self.burner_signal.entity_id:
+            self._burner_changed(new_state)
+            return
+        if new_state is None:
+            return
+
+        if self._edges:
+            old_state = event.data.get("old_state")
+            if new_state.state == STATE_ON and old_state is not None and old_state.state != STATE_ON:
+                self._pulses += 1
+                self._dirty = True
+                self._store.async_delay_save(self._data_to_save, SAVE_DELAY)
+        elif self._count(new_state.state):
+            self._dirty = True
+
+    @callback
+    def _burner_changed(self, new_state):
+        """Accumulate the burner on-time of the open bucket on transitions."""
+        is_on = self.burner_signal.is_on(new_state)
+        if is_on == (self._burner_on_since is not None):
+            return
+        now = dt_util.utcnow()
+        if is_on:
+            self._burner_on_since = now
+        else:
+            self._burner_minutes += (now - self._burner_on_since).total_seconds() / 60
+            self._burner_on_since = None
+        self._publish()
+
+    @callback
+    def _schedule_bucket_close(self):
+        """Wake up at the end of the open bucket."""
+        self._unsub_bucket = async_track_point_in_time(
+            self.hass, self._async_close_bucket, self._bucket_start + timedelta(minutes=PULSE_BUCKET_MINUTES)
+        )
+
+    @callback
+    def _async_close_bucket(self, _now=None):
+        """Close the open bucket and write the closed ones of the past day at local midnight."""
+        end = self._bucket_start + timedelta(minutes=PULSE_BUCKET_MINUTES)
+        if self._burner_on_since is not None:
+            self._burner_minutes += (end - self._burner_on_since).total_seconds() / 60
+            self._burner_on_since = end
+        if self._pulses or self._burner_minutes:
+            self._pending.append((end, self._pulses, self._burner_minutes))
+        self._last_bucket_flow = self._pulses * self.pulse_volume / PULSE_BUCKET_MINUTES
+
+        self._bucket_start = end
+        self._pulses = 0
+        self._burner_minutes = 0.0
+        self._schedule_bucket_close()
+        self._store.async_delay_save(self._data_to_save, SAVE_DELAY)
+
+        if self._due_buckets(end):
+            self.hass.async_create_task(self.async_flush())
+        else:
+            self._publish()
+
+    @callback
+    def _async_refresh(self, _now=None):
+        """Republish the estimate if pulses came in."""
+        if self._dirty:
+            self._publish()
+
+    @callback
+    def _publish(self):
+        """Expose the gas metered since the latest reading for the consumed gas sensor."""
+        self._dirty = False
+        self.hass.states.async_set(f"{DOMAIN}.pulse_estimate", round(self.value, 3))
+        async_dispatcher_send(self.hass, SIGNAL_ESTIMATE_UPDATED)
+
+    @callback
+    def _data_to_save(self) -> dict:
+        return {
+            "bucket_start": self._bucket_start.isoformat(),
+            "pulses": self._pulses,
+            "burner_minutes": self._burner_minutes,
+            "pending": [[end.isoformat(), pulses, minutes] for end, pulses, minutes in self._pending],
+            "last_count": self._last_count,
+        }
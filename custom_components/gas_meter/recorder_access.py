@@ -0,0 +1,297 @@
+"""Lean recorder access for the Virtual Gas Meter integration.
+
+Integrating burner on-time only needs the state and its timestamp, so the
+recorder is queried without attributes, with minimal responses and in the
+compressed state format instead of building full State objects. Several
+entities and several reading intervals are fetched with a single query and
+returned as compact (timestamp, value) arrays for vectorized integration.
+
+Entities whose burner signal is an attribute (a climate entity's
+``hvac_action``) are read from the state table without the attribute
+blobs: one query selects the attributes id of every row of all these
+entities, every distinct attribute set is loaded and decoded once and only
+the needed key is kept.
+"""
+import json
+import logging
+import math
+from datetime import datetime
+from typing import NamedTuple
+
+import numpy as np
+from sqlalchemy import func, select, union_all
+
+from homeassistant.core import HomeAssistant
+from homeassistant.const import (
+    COMPRESSED_STATE_LAST_UPDATED,
+    COMPRESSED_STATE_STATE,
+    STATE_ON,
+)
+from homeassistant.components.recorder.db_schema import States, StatesMeta, StateAttributes
+from homeassistant.components.recorder.history import get_significant_states
+from homeassistant.components.recorder.util import session_scope
+from homeassistant.components.recorder import get_instance
+from homeassistant.util import dt as dt_util
+
+_LOGGER = logging.getLogger(__name__)
+
+# Attribute sets loaded per query (below the SQLite bound parameter limit)
+ATTRIBUTES_CHUNK = 500
+
+
+class StateSeries(NamedTuple):
+    """Chronological state changes of one entity."""
+
+    timestamps: np.ndarray  # UTC epoch seconds
+    values: np.ndarray  # 1.0/0.0 for on/off entities, NaN where unusable
+
+
+EMPTY_SERIES = StateSeries(np.empty(0), np.empty(0))
+
+
+def numeric_state_value(state) -> float:
+    """Return the numeric value of a state, or NaN if it has no usable value."""
+    try:
+        value = float(state)
+    except (TypeError, ValueError):
+        # unknown / unavailable / non-numeric
+        return math.nan
+    if math.isnan(value):
+        return value
+    return max(value, 0.0)
+
+
+def to_timestamps(datetimes) -> np.ndarray:
+    """Convert datetimes (naive ones are in local time) to UTC epoch seconds."""
+    return np.array([dt_util.as_utc(dt).timestamp() for dt in datetimes], dtype=float)
+
+
+def _query_compressed_states(hass: HomeAssistant, start_time: datetime, end_time: datetime, entity_ids: list) -> dict:
+    """Run the lean history query (executor only)."""
+    return get_significant_states(
+        hass,
+        start_time,
+        end_time,
+        entity_ids,
+        include_start_time_state=True,
+        significant_changes_only=True,
+        minimal_response=True,
+        no_attributes=True,
+        compressed_state_format=True,
+    )
+
+
+def _to_series(rows: list, convert) -> StateSeries:
+    """Pack compressed state rows into a StateSeries."""
+    if not rows:
+        return EMPTY_SERIES
+    timestamps = np.fromiter((row[COMPRESSED_STATE_LAST_UPDATED] for row in rows), dtype=float, count=len(rows))
+    values = np.fromiter((convert(row[COMPRESSED_STATE_STATE]) for row in rows), dtype=float, count=len(rows))
+    return StateSeries(timestamps, values)
+
+
+def extract_attribute(shared_attrs: str | None, attribute: str):
+    """Return one top-level attribute from a recorded attributes JSON object, or None."""
+    if not shared_attrs:
+        return None
+    try:
+        attributes = json.loads(shared_attrs)
+    except ValueError:
+        return None
+    return attributes.get(attribute) if isinstance(attributes, dict) else None
+
+
+def _query_attribute_states(hass: HomeAssistant, start_time: datetime, end_time: datetime, attribute_entities: dict) -> dict:
+    """
+    Run the attribute history query (executor only).
+
+    The metadata ids of all entities are looked up together, and their rows
+    (the one in effect at the start time plus the changes up to the end
+    time) are selected with a single query.
+
+    Returns:
+        {entity_id: [(timestamp, attribute value), ...]} including the state
+        in effect at the start time
+    """
+    start_ts, end_ts = start_time.timestamp(), end_time.timestamp()
+    history = {entity_id: [] for entity_id in attribute_entities}
+    with session_scope(hass=hass, read_only=True) as session:
+        entity_ids = {
+            metadata_id: entity_id
+            for metadata_id, entity_id in session.execute(
+                select(StatesMeta.metadata_id, StatesMeta.entity_id)
+                .where(StatesMeta.entity_id.in_(list(attribute_entities)))
+            )
+        }
+        if not entity_ids:
+            return history
+
+        metadata_ids = list(entity_ids)
+        latest = (
+            select(States.metadata_id, func.max(States.last_updated_ts).label("last_updated_ts"))
+            .where(States.metadata_id.in_(metadata_ids), States.last_updated_ts <= start_ts)
+            .group_by(States.metadata_id)
+            .subquery()
+        )
+        initial = select(States.metadata_id, States.last_updated_ts, States.attributes_id).join(
+            latest,
+            (States.metadata_id == latest.c.metadata_id)
+            & (States.last_updated_ts == latest.c.last_updated_ts),
+        )
+        changes = select(States.metadata_id, States.last_updated_ts, States.attributes_id).where(
+            States.metadata_id.in_(metadata_ids),
+            States.last_updated_ts > start_ts,
+            States.last_updated_ts < end_ts,
+        )
+        query = union_all(initial, changes).subquery()
+        rows = session.execute(
+            select(query.c.metadata_id, query.c.last_updated_ts, query.c.attributes_id)
+            .order_by(query.c.metadata_id, query.c.last_updated_ts)
+        ).all()
+
+        # Every distinct attribute set is loaded once
+        attributes_ids = list({attributes_id for _, _, attributes_id in rows if attributes_id is not None})
+        shared = {}
+        for i in range(0, len(attributes_ids), ATTRIBUTES_CHUNK):
+            shared.update(session.execute(
+                select(StateAttributes.attributes_id, StateAttributes.shared_attrs)
+                .where(StateAttributes.attributes_id.in_(attributes_ids[i:i + ATTRIBUTES_CHUNK]))
+            ).all())
+
+    values = {}
+    for metadata_id, timestamp, attributes_id in rows:
+        entity_id = entity_ids[metadata_id]
+        key = (attributes_id, attribute_entities[entity_id])
+        if key not in values:
+            values[key] = extract_attribute(shared.get(attributes_id), key[1])
+        entity_history = history[entity_id]
+        if timestamp <= start_ts:
+            # The state in effect at the start time (several rows may share its timestamp)
+            entity_history[:] = [(start_ts, values[key])]
+        else:
+            entity_history.append((timestamp, values[key]))
+    return history
+
+
+def _attribute_series(rows: list, convert) -> StateSeries:
+    """Pack (timestamp, attribute value) rows into a StateSeries, keeping only the changes."""
+    if not rows:
+        return EMPTY_SERIES
+    timestamps = np.fromiter((timestamp for timestamp, _ in rows), dtype=float, count=len(rows))
+    values = np.fromiter((convert(value) for _, value in rows), dtype=float, count=len(rows))
+    changed = np.concatenate(([True], values[1:] != values[:-1]))
+    return StateSeries(timestamps[changed], values[changed])
+
+
+async def async_get_state_series(hass: HomeAssistant, start_time: datetime, end_time: datetime, on_off_entities=(), numeric_entities=(), converted_entities: dict | None = None, attribute_entities: dict | None = None) -> dict:
+    """
+    Fetch the state series of several entities with one recorder query.
+
+    Args:
+        start_time: Start of the period (the state at this time is included)
+        end_time: End of the period
+        on_off_entities: Entities converted to 1.0 ("on") / 0.0 (anything else)
+        numeric_entities: Entities converted to their numeric value (NaN if unusable)
+        converted_entities: {entity_id: function(state) -> float} for any other conversion
+        attribute_entities: {entity_id: (attribute, function(value) -> float)} for
+            entities read from one of their attributes instead of the state
+
+    Returns:
+        {entity_id: StateSeries} for every requested entity
+    """
+    converted_entities = converted_entities or {}
+    attribute_entities = attribute_entities or {}
+    entity_ids = list(dict.fromkeys([*on_off_entities, *numeric_entities, *converted_entities]))
+    if not entity_ids and not attribute_entities:
+        return {}
+
+    history_list = {}
+    if entity_ids:
+        history_list = await get_instance(hass).async_add_executor_job(
+            _query_compressed_states, hass, start_time, end_time, entity_ids
+        )
+
+    series = {}
+    if attribute_entities:
+        attribute_history = await get_instance(hass).async_add_executor_job(
+            _query_attribute_states,
+            hass,
+            start_time,
+            end_time,
+            {entity_id: attribute for entity_id, (attribute, _) in attribute_entities.items()},
+        )
+        for entity_id, (_, convert) in attribute_entities.items():
+            series[entity_id] = _attribute_series(attribute_history.get(entity_id, []), convert)
+    for entity_id in on_off_entities:
+        series[entity_id] = _to_series(history_list.get(entity_id, []), lambda state: float(state == STATE_ON))
+    for entity_id in numeric_entities:
+        series[entity_id] = _to_series(history_list.get(entity_id, []), numeric_state_value)
+    for entity_id, convert in converted_entities.items():
+        series[entity_id] = _to_series(history_list.get(entity_id, []), convert)
+    _LOGGER.debug(
+        f"Loaded {sum(len(s.timestamps) for s in series.values())} state changes for {len(series)} entities"
+    )
+    return series
+
+
+def on_minutes_in_intervals(series: StateSeries, starts: np.ndarray, ends: np.ndarray) -> np.ndarray:
+    """
+    Return the on-time (minutes) of an on/off series within every [start, end] interval.
+
+    The entity is considered off before its first known state.
+    """
+    timestamps, values = series
+    if not len(timestamps):
+        return np.zeros(len(starts))
+
+    # Cumulative on-time at every state change, then evaluated at the interval bounds
+    cumulative = np.concatenate(([0.0], np.cumsum(values[:-1] * np.diff(timestamps))))
+
+    def on_time_until(times):
+        idx = np.searchsorted(timestamps, times, side="right") - 1
+        clipped = np.maximum(idx, 0)
+        until = cumulative[clipped] + values[clipped] * (times - timestamps[clipped])
+        return np.where(idx >= 0, until, 0.0)
+
+    return (on_time_until(ends) - on_time_until(starts)) / 60
+
+
+def trapezoid_in_intervals(series: StateSeries, starts: np.ndarray, ends: np.ndarray) -> np.ndarray:
+    """
+    Return the trapezoidal integral (value·minutes) of a numeric series within every interval.
+
+    The value known at the interval start is used from the start on, the last
+    value is held until the interval end, and NaN values interrupt the integral.
+    """
+    timestamps, values = series
+    if not len(timestamps):
+        return np.zeros(len(starts))
+
+    segments = np.nan_to_num((values[:-1] + values[1:]) / 2 * np.diff(timestamps))
+    cumulative = np.concatenate(([0.0], np.cumsum(segments)))
+    held = np.nan_to_num(values)
+
+    first_after = np.searchsorted(timestamps, starts, side="right")  # first sample inside the interval
+    at_start = first_after - 1  # sample in effect at the interval start
+    last_inside = np.searchsorted(timestamps, ends, side="right") - 1
+
+    has_start = at_start >= 0
+    start_idx = np.maximum(at_start, 0)
+    after_idx = np.minimum(first_after, len(timestamps) - 1)
+    last_idx = np.maximum(last_inside, 0)
+    has_inside = last_inside >= first_after
+
+    # From the start to the first sample inside the interval
+    head = np.where(
+        has_start,
+        np.nan_to_num((values[start_idx] + values[after_idx]) / 2 * (timestamps[after_idx] - starts)),
+        0.0,
+    )
+    middle = cumulative[last_idx] - cumulative[after_idx]
+    tail = held[last_idx] * (ends - timestamps[last_idx])
+    inside = head + middle + tail
+
+    # No sample inside the interval: hold the value known at the start
+    outside = np.where(has_start, held[start_idx] * (ends - starts), 0.0)
+
+    return np.where(has_inside, inside, outside) / 60
@@ -0,0 +1,358 @@
+"""Offline replay of the Virtual Gas Meter over stored readings.
+
+Reads the integration's stored readings (JSON Store file or binary
+snapshot) and a copy of the recorder SQLite database, rebuilds the burner
+on-time of every reading interval in one vectorized pass and replays the
+``trigger_gas_update`` math. Every candidate rate model then predicts the
+gas of each interval from what was known at its start, and the errors
+against the real readings are reported.
+
+Usage (from the Home Assistant config directory, on a copy of the database)::
+
+    python -m custom_components.gas_meter.replay --db home-assistant_v2.copy.db
+    python -m custom_components.gas_meter.replay --boiler switch.boiler --rate 0.55 --rate 0.7 --json
+    python -m custom_components.gas_meter.replay --boiler climate.boiler --values heating,preheating
+
+Rate models:
+    configured       Fixed rate from the config entry (or --rate, m³/h)
+    running_average  "average m3/min" as computed by trigger_gas_update
+    last_interval    "m3/min for interval" of the previous reading
+    window_<N>       Gas / on-time over the previous N intervals
+    modulation       ∫modulation dt × running calibration (with --modulation)
+    best_constant    Least-squares constant rate over all intervals (in-sample)
+"""
+import argparse
+import json
+import logging
+import math
+import sqlite3
+import sys
+from pathlib import Path
+from zoneinfo import ZoneInfo
+
+import numpy as np
+
+from homeassistant.util import dt as dt_util
+from .burner import BurnerSignal, parse_values, signals_for
+from .const import (
+    DOMAIN,
+    CONF_BOILER_ENTITY,
+    CONF_BOILER_AVERAGE,
+    CONF_BURNER_ATTRIBUTE,
+    CONF_BURNER_VALUES,
+    CONF_MODULATION_ENTITY,
+    DEFAULT_BOILER_AV_H,
+)
+from .file_handler import STORAGE_KEY, BINARY_SNAPSHOT_FILE, _deserialize_records
+from .recorder_access import (
+    StateSeries,
+    EMPTY_SERIES,
+    extract_attribute,
+    numeric_state_value,
+    on_minutes_in_intervals,
+    to_timestamps,
+    trapezoid_in_intervals,
+)
+from .snapshot_codec import decode_snapshot
+
+_LOGGER = logging.getLogger(__name__)
+
+DEFAULT_WINDOW = 10
+
+
+def load_records(path: Path) -> list:
+    """Load the readings from the JSON Store file or a binary snapshot."""
+    data = path.read_bytes()
+    if path.suffix == ".bin":
+        records = decode_snapshot(data)
+    else:
+        records = _deserialize_records(json.loads(data)["data"].get("records", [])).data
+    return sorted(records, key=lambda record: dt_util.as_utc(record["datetime"]))
+
+
+def load_entry_config(config_dir: Path) -> dict:
+    """Return the data of the gas meter config entry, if the config directory has one."""
+    path = config_dir / ".storage" / "core.config_entries"
+    if not path.exists():
+        return {}
+    entries = json.loads(path.read_text())["data"]["entries"]
+    return next((entry["data"] for entry in entries if entry["domain"] == DOMAIN), {})
+
+
+def load_time_zone(config_dir: Path):
+    """Return the Home Assistant time zone (naive readings are in local time)."""
+    path = config_dir / ".storage" / "core.config"
+    if path.exists():
+        time_zone = json.loads(path.read_text())["data"].get("time_zone")
+        if time_zone:
+            return ZoneInfo(time_zone)
+    return None
+
+
+def _state_columns(connection: sqlite3.Connection, attribute: str | None) -> tuple[str, str, str]:
+    """
+    Return the timestamp and value expressions and the joins for the database's schema.
+
+    Schemas before 2023 have no ``last_updated_ts`` column (the datetime
+    ``last_updated`` is converted to epoch seconds) and very old ones keep
+    the attributes in the states table instead of ``state_attributes``.
+    """
+    tables = {row[0] for row in connection.execute("SELECT name FROM sqlite_master WHERE type='table'")}
+    columns = {row[1] for row in connection.execute("PRAGMA table_info(states)")}
+    if "last_updated_ts" in columns:
+        timestamp = "states.last_updated_ts"
+    else:
+        timestamp = "(julianday(states.last_updated) - 2440587.5) * 86400.0"
+
+    joins = ""
+    if "states_meta" in tables:
+        joins += " JOIN states_meta ON states.metadata_id = states_meta.metadata_id"
+    if attribute is None:
+        value = "states.state"
+    elif "state_attributes" in tables:
+        joins += " LEFT JOIN state_attributes ON states.attributes_id = state_attributes.attributes_id"
+        value = "COALESCE(state_attributes.shared_attrs, states.attributes)" if "attributes" in columns else "state_attributes.shared_attrs"
+    else:
+        value = "states.attributes"
+    return timestamp, value, joins
+
+
+def load_state_series(db_path: Path, entity_id: str, start: float, end: float, convert, attribute: str | None = None) -> StateSeries:
+    """
+    Read the state changes of one entity between start and end (UTC epoch seconds).
+
+    The state in effect at start is included. With an attribute, its value
+    is converted instead of the state. Opens the database read-only.
+    """
+    with sqlite3.connect(f"file:{db_path}?mode=ro", uri=True) as connection:
+        timestamp, value, joins = _state_columns(connection, attribute)
+        entity_column = "states_meta.entity_id" if "states_meta" in joins else "states.entity_id"
+        source = f"states{joins} WHERE {entity_column} = ?"
+        before = connection.execute(
+            f"SELECT {timestamp} AS ts, {value} FROM {source} AND {timestamp} <= ? "
+            "ORDER BY ts DESC LIMIT 1",
+            (entity_id, start),
+        ).fetchall()
+        rows = connection.execute(
+            f"SELECT {timestamp} AS ts, {value} FROM {source} AND {timestamp} > ? AND {timestamp} <= ? "
+            "ORDER BY ts",
+            (entity_id, start, end),
+        ).fetchall()
+
+    rows = before + rows
+    if not rows:
+        return EMPTY_SERIES
+    if attribute is not None:
+        rows = [(ts, extract_attribute(shared_attrs, attribute)) for ts, shared_attrs in rows]
+    timestamps = np.fromiter((row[0] for row in rows), dtype=float, count=len(rows))
+    values = np.fromiter((convert(row[1]) for row in rows), dtype=float, count=len(rows))
+    return StateSeries(timestamps, values)
+
+
+def replay_readings(records: list, boiler_series: StateSeries, modulation_series: StateSeries | None = None) -> dict:
+    """
+    Replay the trigger_gas_update math over all reading intervals at once.
+
+    Returns:
+        Per-interval arrays: consumption, on-minutes, "m3/min for interval",
+        "min_cumulated", "consumed_gas_cumulated", "average m3/min" and, with
+        a modulation series, the modulation integral and calibration
+    """
+    timestamps = to_timestamps(record["datetime"] for record in records)
+    gas = np.array([record["consumed_gas"] for record in records], dtype=float)
+    starts, ends = timestamps[:-1], timestamps[1:]
+
+    consumption = np.diff(gas)
+    minutes = on_minutes_in_intervals(boiler_series, starts, ends)
+    min_cumulated = np.cumsum(minutes)
+    consumed_cumulated = gas[1:] - gas[0]
+
+    with np.errstate(divide="ignore", invalid="ignore"):
+        replay = {
+            "consumption": consumption,
+            "minutes": minutes,
+            "m3/min for interval": np.where(minutes > 0, consumption / minutes, np.nan),
+            "min_cumulated": min_cumulated,
+            "consumed_gas_cumulated": consumed_cumulated,
+            "average m3/min": np.where(min_cumulated > 0, consumed_cumulated / min_cumulated, np.nan),
+        }
+        if modulation_series is not None:
+            integral = trapezoid_in_intervals(modulation_series, starts, ends)
+            # Only intervals the modulation history fully covers calibrate
+            first_sample = modulation_series.timestamps[0] if len(modulation_series.timestamps) else math.inf
+            covered = starts >= first_sample
+            modulation_cumulated = np.cumsum(np.where(covered, integral, 0.0))
+            modulation_gas_cumulated = np.cumsum(np.where(covered, consumption, 0.0))
+            replay["modulation_integral"] = integral
+            replay["modulation_calibration"] = np.where(
+                modulation_cumulated > 0, modulation_gas_cumulated / modulation_cumulated, np.nan
+            )
+    return replay
+
+
+def _known_before(values: np.ndarray, fallback: float) -> np.ndarray:
+    """Shift per-interval values by one: the value known when an interval starts."""
+    shifted = np.concatenate(([np.nan], values[:-1]))
+    return np.where(np.isnan(shifted), fallback, shifted)
+
+
+def _window_rates(replay: dict, window: int) -> np.ndarray:
+    """Gas per on-minute over the previous window intervals."""
+    gas = np.concatenate(([0.0], np.cumsum(replay["consumption"])))
+    minutes = np.concatenate(([0.0], np.cumsum(replay["minutes"])))
+    ends = np.arange(len(replay["consumption"]))
+    begins = np.maximum(ends - window, 0)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        return (gas[ends] - gas[begins]) / (minutes[ends] - minutes[begins])
+
+
+def model_predictions(replay: dict, configured_rates: dict, window: int = DEFAULT_WINDOW) -> dict:
+    """
+    Predict the gas of every interval with every rate model.
+
+    Rates are per on-minute and only use readings before the interval; the
+    configured rate is used until a model has data.
+    """
+    minutes = replay["minutes"]
+    fallback = next(iter(configured_rates.values()))
+    predictions = {name: rate * minutes for name, rate in configured_rates.items()}
+
+    predictions["running_average"] = _known_before(replay["average m3/min"], fallback) * minutes
+    predictions["last_interval"] = _known_before(replay["m3/min for interval"], fallback) * minutes
+    window_rates = _window_rates(replay, window)
+    predictions[f"window_{window}"] = np.where(np.isfinite(window_rates), window_rates, fallback) * minutes
+
+    if "modulation_integral" in replay:
+        calibration = _known_before(replay["modulation_calibration"], math.nan)
+        predictions["modulation"] = np.where(
+            np.isnan(calibration), fallback * minutes, calibration * replay["modulation_integral"]
+        )
+
+    squares = float(np.dot(minutes, minutes))
+    if squares > 0:
+        predictions["best_constant"] = float(np.dot(replay["consumption"], minutes)) / squares * minutes
+    return predictions
+
+
+def estimation_errors(actual: np.ndarray, predicted: np.ndarray) -> dict:
+    """Return the error statistics of one model (m³)."""
+    error = predicted - actual
+    total = float(actual.sum())
+    return {
+        "intervals": int(len(actual)),
+        "mae": float(np.abs(error).mean()) if len(error) else 0.0,
+        "rmse": float(np.sqrt((error ** 2).mean())) if len(error) else 0.0,
+        "bias": float(error.mean()) if len(error) else 0.0,
+        "total_error_pct": float(error.sum() / total * 100) if total else 0.0,
+    }
+
+
+def run_replay(records: list, db_path: Path, burner_signal: BurnerSignal, configured_rates: dict, modulation_entity: str | None = None, window: int = DEFAULT_WINDOW) -> dict:
+    """Replay the readings and return the error report of every rate model."""
+    if len(records) < 2:
+        raise ValueError("At least two readings are needed to replay")
+
+    timestamps = to_timestamps(record["datetime"] for record in records)
+    start, end = float(timestamps[0]), float(timestamps[-1])
+    boiler_series = load_state_series(
+        db_path, burner_signal.entity_id, start, end, burner_signal.convert, burner_signal.attribute
+    )
+    modulation_series = None
+    if modulation_entity:
+        modulation_series = load_state_series(db_path, modulation_entity, start, end, numeric_state_value)
+
+    replay = replay_readings(records, boiler_series, modulation_series)
+    predictions = model_predictions(replay, configured_rates, window)
+    return {
+        "readings": len(records),
+        "state_changes": int(len(boiler_series.timestamps)),
+        "on_minutes": float(replay["minutes"].sum()),
+        "consumption": float(replay["consumption"].sum()),
+        "models": {
+            name: estimation_errors(replay["consumption"], predicted)
+            for name, predicted in predictions.items()
+        },
+    }
+
+
+def _print_report(report: dict):
+    """Print the error report as a table, best model first."""
+    print(
+        f"{report['readings']} readings, {report['state_changes']} boiler state changes, "
+        f"{report['on_minutes']:.0f} on-minutes, {report['consumption']:.3f} m³"
+    )
+    print(f"{'model':<24}{'MAE m³':>10}{'RMSE m³':>10}{'bias m³':>10}{'total %':>10}")
+    for name, errors in sorted(report["models"].items(), key=lambda item: item[1]["rmse"]):
+        print(
+            f"{name:<24}{errors['mae']:>10.3f}{errors['rmse']:>10.3f}"
+            f"{errors['bias']:>10.3f}{errors['total_error_pct']:>10.1f}"
+        )
+
+
+def main(argv=None) -> int:
+    """Command line entry point."""
+    parser = argparse.ArgumentParser(description="Replay the Virtual Gas Meter over stored readings and recorder history.")
+    parser.add_argument("--config-dir", type=Path, default=Path("."), help="Home Assistant config directory (default: current directory)")
+    parser.add_argument("--store", type=Path, help=f"Stored readings (default: .storage/{STORAGE_KEY} or .storage/{BINARY_SNAPSHOT_FILE})")
+    parser.add_argument("--db", type=Path, help="Copy of the recorder SQLite database (default: home-assistant_v2.db)")
+    parser.add_argument("--boiler", help="Boiler entity (default: from the config entry)")
+    parser.add_argument("--attribute", help="Attribute of the boiler entity telling whether it burns (default: from the config entry, hvac_action for climate entities)")
+    parser.add_argument("--values", help="Comma-separated burner values (default: from the config entry, heating or on)")
+    parser.add_argument("--modulation", help="Burner power/modulation entity (default: from the config entry)")
+    parser.add_argument("--rate", type=float, action="append", help="Candidate boiler average in m³/h (repeatable; default: from the config entry)")
+    parser.add_argument("--window", type=int, default=DEFAULT_WINDOW, help=f"Intervals of the rolling window model (default: {DEFAULT_WINDOW})")
+    parser.add_argument("--json", action="store_true", help="Print the report as JSON")
+    args = parser.parse_args(argv)
+
+    config_dir = args.config_dir
+    entry_config = load_entry_config(config_dir)
+    time_zone = load_time_zone(config_dir)
+    if time_zone is not None:
+        dt_util.set_default_time_zone(time_zone)
+
+    store = args.store
+    if store is None:
+        store = config_dir / ".storage" / BINARY_SNAPSHOT_FILE
+        if not store.exists():
+            store = config_dir / ".storage" / STORAGE_KEY
+    db_path = args.db or config_dir / "home-assistant_v2.db"
+    boiler_entity = args.boiler or entry_config.get(CONF_BOILER_ENTITY)
+    modulation_entity = args.modulation or entry_config.get(CONF_MODULATION_ENTITY)
+    if not boiler_entity:
+        parser.error("No boiler entity configured, use --boiler")
+
+    # The configured attribute and values belong to the configured boiler entity
+    configured = {}
+    if boiler_entity == entry_config.get(CONF_BOILER_ENTITY):
+        configured = {
+            boiler_entity: BurnerSignal.for_entity(
+                boiler_entity,
+                args.attribute or entry_config.get(CONF_BURNER_ATTRIBUTE),
+                parse_values(args.values or entry_config.get(CONF_BURNER_VALUES)),
+            )
+        }
+    elif args.attribute or args.values:
+        configured = {boiler_entity: BurnerSignal.for_entity(boiler_entity, args.attribute, parse_values(args.values))}
+    burner_signal = signals_for([boiler_entity], configured)[boiler_entity]
+
+    rates = args.rate or [entry_config.get(CONF_BOILER_AVERAGE, DEFAULT_BOILER_AV_H)]
+    configured_rates = {
+        ("configured" if len(rates) == 1 else f"configured_{rate:g}"): rate / 60
+        for rate in rates
+    }
+
+    try:
+        report = run_replay(load_records(store), db_path, burner_signal, configured_rates, modulation_entity, args.window)
+    except (OSError, ValueError, KeyError, sqlite3.Error) as e:
+        print(f"Replay failed: {e}", file=sys.stderr)
+        return 1
+
+    if args.json:
+        print(json.dumps(report, indent=2))
+    else:
+        _print_report(report)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
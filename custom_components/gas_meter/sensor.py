@@ -1,6 +1,8 @@
 """Sensor platform for the Virtual Gas Meter integration."""
 import logging
 import asyncio
+import time
+from abc import abstractmethod
 
 from datetime import datetime, timedelta
 from homeassistant.const import STATE_UNKNOWN
@@ -14,6 +16,9 @@ from homeassistant.components.sensor import (
 from homeassistant.components.history_stats.sensor import HistoryStatsSensor
 from homeassistant.components.history_stats.coordinator import HistoryStatsUpdateCoordinator, HistoryStats
 from homeassistant.helpers.entity_platform import AddEntitiesCallback
+from homeassistant.helpers.dispatcher import async_dispatcher_connect
+from homeassistant.helpers.event import async_call_later, async_track_time_interval
+from homeassistant.util import dt as dt_util
 from homeassistant.util.dt import now
 from homeassistant.helpers.template import Template
 from .const import (
@@ -23,21 +28,35 @@ from .const import (
     DEFAULT_UNIT_SYSTEM,
     CONF_UNIT_SYSTEM,
     CONF_OPERATING_MODE,
+    CONF_MODULATION_ENTITY,
+    CONF_APPLIANCE_ENTITIES,
     MODE_BOILER_TRACKING,
+    MODE_PULSE_COUNTER,
     UNIT_CUBIC_METERS,
+    PERIODS,
+    PERIOD_HOURLY,
+    PERIOD_DAILY,
+    PERIOD_WEEKLY,
+    PERIOD_MONTHLY,
+    PERIOD_BILLING_CYCLE,
+    SIGNAL_DEGREE_DAYS_UPDATED,
+    FLOW_RATE_MIN_WRITE_INTERVAL,
+    FLOW_RATE_REFRESH_INTERVAL,
+    FLOW_RATE_WINDOWS,
 )
-from .unit_converter import get_unit_label, format_gas_value, to_display_unit
-import custom_components.gas_meter.file_handler as fh
+from .period_meter import next_period_start
+from .unit_converter import UnitEngine
 
 _LOGGER = logging.getLogger(__name__)
 
 class CustomTemplateSensor(SensorEntity):
-    def __init__(self, hass, friendly_name, unique_id, state_template, unit_of_measurement=None, device_class=None, icon=None, state_class=None):
+    def __init__(self, hass, friendly_name, unique_id, state_template, unit_of_measurement=None, device_class=None, icon=None, state_class=None, units=None):
         self.hass = hass
+        self._units = units  # Converts the rendered m³ state to the display unit
         self._attr_name = friendly_name
         self._attr_unique_id = unique_id
         self._state_template = state_template
-        self._attr_unit_of_measurement = unit_of_measurement if unit_of_measurement else UNIT_CUBIC_METERS
+        self._attr_native_unit_of_measurement = unit_of_measurement if unit_of_measurement else UNIT_CUBIC_METERS
         self._attr_device_class = device_class
         self._attr_icon = icon
         self._attr_state_class = state_class
@@ -50,6 +69,8 @@ class CustomTemplateSensor(SensorEntity):
     async def async_update(self):
         try:
             self._state = await self._async_render_template()
+            if self._units is not None and self._state not in (None, ""):
+                self._state = round(self._units.to_display(float(self._state)), 3)
         except Exception as e:
             _LOGGER.error("Template rendering failed for %s: %s", self._attr_unique_id, str(e))
             self._state = "error"
@@ -64,30 +85,19 @@ class GasDataSensor(SensorEntity):
     _attr_name = "Gas Usage History"
     _attr_unique_id = "gas_consumption_data"
 
-    def __init__(self, hass: HomeAssistant, unit_system: str):
+    def __init__(self, hass: HomeAssistant, units):
         self.hass = hass
-        self._unit_system = unit_system
+        self._units = units
         self._state = STATE_UNKNOWN
-        self._gas_data = []
+        self._records = []
 
     async def async_update(self):
         try:
-            self._gas_data = await fh.load_gas_actualdata(self.hass)
-            if self._gas_data:
-                # Format the last record (most recent)
-                latest_record = self._gas_data[-1]
-                formatted_datetime = latest_record["datetime"].strftime('%Y-%m-%d')
-                formatted_usage = format_gas_value(
-                    latest_record['consumed_gas'],
-                    self._unit_system,
-                    precision=2
-                )
-                formatted_total = format_gas_value(
-                    latest_record.get('consumed_gas_cumulated', latest_record['consumed_gas']),
-                    self._unit_system,
-                    precision=2
-                )
-                self._state = f"{formatted_datetime}: {formatted_usage} (Total: {formatted_total})"
+            # Formatted once per save by the unit engine, not on every attribute build
+            self._records = await self._units.async_display_records()
+            if self._records:
+                latest_record = self._records[-1]
+                self._state = f"{latest_record['date']}: {latest_record['usage']} (Total: {latest_record['cumulative_total']})"
             else:
                 self._state = STATE_UNKNOWN
         except Exception as e:
@@ -100,29 +110,8 @@ class GasDataSensor(SensorEntity):
 
     @property
     def extra_state_attributes(self):
-        if self._gas_data:
-            # Format all records for dashboard display
-            formatted_records = []
-            for record in self._gas_data:
-                formatted_datetime = record["datetime"].strftime('%Y-%m-%d')
-                formatted_usage = format_gas_value(
-                    record['consumed_gas'],
-                    self._unit_system,
-                    precision=2
-                )
-                formatted_cumulative = format_gas_value(
-                    record.get('consumed_gas_cumulated', record['consumed_gas']),
-                    self._unit_system,
-                    precision=2
-                )
-                formatted_record = {
-                    "date": formatted_datetime,
-                    "usage": formatted_usage,
-                    "cumulative_total": formatted_cumulative,
-                }
-                formatted_records.append(formatted_record)
-
-            return {"records": formatted_records}
+        if self._records:
+            return {"records": self._records}
         return {}
 
 
@@ -135,31 +124,26 @@ class GasMeterTotalSensor(SensorEntity):
 
     _attr_name = "Gas Meter Total"
     _attr_unique_id = "gas_meter_total"
-    _attr_device_class = SensorDeviceClass.GAS
     _attr_state_class = SensorStateClass.TOTAL_INCREASING
     _attr_icon = "mdi:meter-gas"
 
-    def __init__(self, hass: HomeAssistant, unit_system: str):
+    def __init__(self, hass: HomeAssistant, units):
         self.hass = hass
-        self._unit_system = unit_system
-        self._attr_native_unit_of_measurement = get_unit_label(unit_system)
+        self._units = units
+        self._attr_native_unit_of_measurement = units.label
+        self._attr_device_class = units.device_class
         self._attr_native_value = None
 
     async def async_update(self):
         try:
-            gas_data = await fh.load_gas_actualdata(self.hass)
-            if gas_data:
-                # Get the cumulative total and convert to display unit
-                latest_record = gas_data[-1]
+            latest_record = await self._units.async_latest_record()
+            if latest_record:
                 # Use cumulative total, fallback to consumed_gas for first record
                 canonical_value = latest_record.get(
                     'consumed_gas_cumulated',
                     latest_record['consumed_gas']
                 )
-                self._attr_native_value = round(
-                    to_display_unit(canonical_value, self._unit_system),
-                    3
-                )
+                self._attr_native_value = round(self._units.to_display(canonical_value), 3)
             else:
                 self._attr_native_value = None
         except Exception as e:
@@ -167,6 +151,336 @@ class GasMeterTotalSensor(SensorEntity):
             self._attr_native_value = None
 
 
+PERIOD_NAMES = {
+    PERIOD_HOURLY: "Gas Consumption This Hour",
+    PERIOD_DAILY: "Gas Consumption Today",
+    PERIOD_WEEKLY: "Gas Consumption This Week",
+    PERIOD_MONTHLY: "Gas Consumption This Month",
+    PERIOD_BILLING_CYCLE: "Gas Consumption This Billing Cycle",
+}
+
+
+class GasPeriodSensor(SensorEntity):
+    """Gas consumed in the current hour/day/week/month/billing cycle.
+
+    Replaces utility_meter helpers on top of the consumed gas sensor: the
+    value comes from the shared period meters and the state is only
+    written when the rounded value or the period changes.
+    """
+
+    _attr_state_class = SensorStateClass.TOTAL
+    _attr_icon = "mdi:meter-gas-outline"
+    _attr_should_poll = False
+
+    def __init__(self, period_meters, period: str, units):
+        self._period_meters = period_meters
+        self._period = period
+        self._units = units
+        self._attr_name = PERIOD_NAMES[period]
+        self._attr_unique_id = f"gas_consumption_{period}"
+        self._attr_native_unit_of_measurement = units.label
+        self._attr_device_class = units.device_class
+        self._attr_native_value = None
+        self._attr_last_reset = None
+        self._refresh()
+
+    async def async_added_to_hass(self):
+        self.async_on_remove(self._period_meters.async_add_listener(self._async_period_updated))
+
+    def _refresh(self) -> bool:
+        """Recompute the period total; returns True if the state changed."""
+        consumption, start = self._period_meters.consumption(self._period)
+        value = round(self._units.to_display(consumption), 3)
+        if value == self._attr_native_value and start == self._attr_last_reset:
+            return False
+        self._attr_native_value = value
+        self._attr_last_reset = start
+        return True
+
+    @callback
+    def _async_period_updated(self):
+        try:
+            if self._refresh():
+                self.async_write_ha_state()
+        except Exception as e:
+            _LOGGER.error("Error updating gas period sensor %s: %s", self._period, str(e))
+
+
+class GasDegreeDaySensor(SensorEntity):
+    """Base for the billing cycle sensors built on the degree-day regression."""
+
+    _attr_should_poll = False
+
+    def __init__(self, period_meters, degree_days, units):
+        self._period_meters = period_meters
+        self._degree_days = degree_days
+        self._units = units
+        self._attr_native_unit_of_measurement = units.label
+        self._attr_device_class = units.device_class
+        self._attr_native_value = None
+        self._attr_extra_state_attributes = {}
+        self._refresh()
+
+    async def async_added_to_hass(self):
+        self.async_on_remove(self._period_meters.async_add_listener(self._async_refresh))
+        self.async_on_remove(
+            async_dispatcher_connect(self.hass, SIGNAL_DEGREE_DAYS_UPDATED, self._async_refresh)
+        )
+
+    @abstractmethod
+    def _compute(self, consumption: float, start: datetime, moment: datetime) -> tuple[float | None, dict]:
+        """Return the value (m³) and the extra attributes."""
+
+    def _refresh(self) -> bool:
+        """Recompute the value; returns True if the state changed."""
+        moment = dt_util.utcnow()
+        consumption, start = self._period_meters.consumption(PERIOD_BILLING_CYCLE, moment)
+        value, attributes = self._compute(consumption, start, moment)
+        if value is not None:
+            value = round(self._units.to_display(value), 3)
+        coefficients = self._degree_days.coefficients
+        if coefficients is not None:
+            attributes["base_per_day"] = round(self._units.to_display(coefficients[0]), 4)
+            attributes["per_degree_day"] = round(self._units.to_display(coefficients[1]), 4)
+        if value == self._attr_native_value and attributes == self._attr_extra_state_attributes:
+            return False
+        self._attr_native_value = value
+        self._attr_extra_state_attributes = attributes
+        return True
+
+    @callback
+    def _async_refresh(self, *_):
+        try:
+            if self._refresh():
+                self.async_write_ha_state()
+        except Exception as e:
+            _LOGGER.error("Error updating %s: %s", self._attr_unique_id, str(e))
+
+
+class GasForecastSensor(GasDegreeDaySensor):
+    """Expected gas of the current billing cycle at the recent weather."""
+
+    _attr_name = "Gas Forecast This Billing Cycle"
+    _attr_unique_id = "gas_forecast_billing_cycle"
+    _attr_icon = "mdi:chart-bell-curve-cumulative"
+
+    def _compute(self, consumption, start, moment):
+        end = next_period_start(PERIOD_BILLING_CYCLE, moment, self._period_meters.billing_day)
+        value = self._degree_days.forecast(consumption, moment, end)
+        return value, {"expected_daily_hdd": round(self._degree_days.recent_daily_hdd(), 2)}
+
+
+class GasNormalisedSensor(GasDegreeDaySensor):
+    """Gas of the current billing cycle so far, corrected to normal weather."""
+
+    _attr_name = "Gas Consumption Weather Normalised"
+    _attr_unique_id = "gas_consumption_weather_normalised"
+    _attr_icon = "mdi:weather-snowy-heavy"
+
+    def _compute(self, consumption, start, moment):
+        result = self._degree_days.normalised(consumption, start, moment)
+        if result is None:
+            return None, {}
+        value, hdd = result
+        return value, {"heating_degree_days": round(hdd, 2), "normal_daily_hdd": round(self._degree_days.fit.normal_daily_hdd, 2)}
+
+
+class GasCostSensor(SensorEntity):
+    """Base for the cost sensors fed by the running cost accumulators."""
+
+    _attr_device_class = SensorDeviceClass.MONETARY
+    _attr_state_class = SensorStateClass.TOTAL
+    _attr_icon = "mdi:cash"
+    _attr_should_poll = False
+
+    def __init__(self, hass: HomeAssistant, cost_engine):
+        self._cost_engine = cost_engine
+        self._attr_native_unit_of_measurement = hass.config.currency
+        self._attr_native_value = None
+        self._attr_last_reset = None
+        self._attr_extra_state_attributes = {}
+        self._refresh()
+
+    async def async_added_to_hass(self):
+        self.async_on_remove(self._cost_engine.async_add_listener(self._async_refresh))
+
+    @abstractmethod
+    def _compute(self) -> tuple[float, datetime, dict]:
+        """Return the cost, the start of its period and the extra attributes."""
+
+    def _refresh(self) -> bool:
+        """Read the accumulator; returns True if the state changed."""
+        cost, start, attributes = self._compute()
+        value = round(cost, 2)
+        if value == self._attr_native_value and start == self._attr_last_reset and attributes == self._attr_extra_state_attributes:
+            return False
+        self._attr_native_value = value
+        self._attr_last_reset = start
+        self._attr_extra_state_attributes = attributes
+        return True
+
+    @callback
+    def _async_refresh(self):
+        try:
+            if self._refresh():
+                self.async_write_ha_state()
+        except Exception as e:
+            _LOGGER.error("Error updating %s: %s", self._attr_unique_id, str(e))
+
+
+class GasCostTodaySensor(GasCostSensor):
+    """Gas cost of today, daily charge included."""
+
+    _attr_name = "Gas Cost Today"
+    _attr_unique_id = "gas_cost_daily"
+
+    def _compute(self):
+        engine = self._cost_engine
+        return engine.day_cost, engine.day_start, {"daily_charge": engine.tariff.daily_charge}
+
+
+class GasCostBillingCycleSensor(GasCostSensor):
+    """Gas cost of the current billing cycle, daily charges included."""
+
+    _attr_name = "Gas Cost This Billing Cycle"
+    _attr_unique_id = "gas_cost_billing_cycle"
+
+    def _compute(self):
+        engine = self._cost_engine
+        return engine.cycle_cost, engine.cycle_start, {
+            "energy_cost": round(engine.cycle_energy_cost, 2),
+            "standing_charge": round(engine.tariff.daily_charge * engine.cycle_days, 2),
+            "usage": round(engine.usage, 3),
+            "price_unit": engine.tariff.price_unit,
+        }
+
+
+class GasPriceSensor(SensorEntity):
+    """Current gas price per display unit, for the Energy Dashboard.
+
+    Follows the tier reached in the billing cycle and the time-of-use
+    windows, so the dashboard prices each hour at the rate that applied.
+    """
+
+    _attr_name = "Gas Price"
+    _attr_unique_id = "gas_price"
+    _attr_state_class = SensorStateClass.MEASUREMENT
+    _attr_icon = "mdi:currency-usd"
+    _attr_should_poll = False
+
+    def __init__(self, hass: HomeAssistant, cost_engine, units):
+        self._cost_engine = cost_engine
+        self._m3_per_unit = units.to_canonical(1.0)
+        self._attr_native_unit_of_measurement = f"{hass.config.currency}/{units.label}"
+        self._attr_native_value = round(cost_engine.price * self._m3_per_unit, 4)
+
+    async def async_added_to_hass(self):
+        self.async_on_remove(self._cost_engine.async_add_listener(self._async_refresh))
+
+    @callback
+    def _async_refresh(self):
+        value = round(self._cost_engine.price * self._m3_per_unit, 4)
+        if value != self._attr_native_value:
+            self._attr_native_value = value
+            self.async_write_ha_state()
+
+
+class GasFlowRateSensor(SensorEntity):
+    """Current gas flow in display units per hour, e.g. for load shedding.
+
+    Written on burner transitions and rate changes only, and at most once
+    every FLOW_RATE_MIN_WRITE_INTERVAL seconds: a quicker change is written
+    when the interval is over. The short-window averages come from the flow
+    meter's in-memory samples; after a change they keep moving, so they are
+    refreshed every FLOW_RATE_REFRESH_INTERVAL seconds until the longest
+    window has settled.
+    """
+
+    _attr_name = "Gas Flow Rate"
+    _attr_unique_id = "gas_flow_rate"
+    _attr_state_class = SensorStateClass.MEASUREMENT
+    _attr_icon = "mdi:fire"
+    _attr_should_poll = False
+
+    def __init__(self, flow_meter, units):
+        self._flow_meter = flow_meter
+        self._units = units
+        self._attr_native_unit_of_measurement = f"{units.label}/h"
+        # Home Assistant has a volume flow unit for m³/h only
+        self._attr_device_class = SensorDeviceClass.VOLUME_FLOW_RATE if units.label == UNIT_CUBIC_METERS else None
+        self._attr_native_value = None
+        self._attr_extra_state_attributes = {}
+        self._last_write = None
+        self._unsub_write = None
+        self._unsub_refresh = None
+        self._refresh()
+
+    async def async_added_to_hass(self):
+        self.async_on_remove(self._flow_meter.async_add_listener(self._async_flow_updated))
+        self.async_on_remove(self._cancel_write)
+        self.async_on_remove(self._cancel_refresh)
+
+    def _per_hour(self, flow: float | None) -> float | None:
+        """Convert a flow in m³/min to display units per hour."""
+        return None if flow is None else round(self._units.to_display(flow) * 60, 3)
+
+    def _refresh(self):
+        self._attr_native_value = self._per_hour(self._flow_meter.flow)
+        self._attr_extra_state_attributes = {
+            f"average_{minutes}_min": self._per_hour(self._flow_meter.average(minutes))
+            for minutes in FLOW_RATE_WINDOWS
+        }
+
+    @callback
+    def _async_flow_updated(self):
+        if self._unsub_write is not None:
+            # A write is already scheduled, it picks up the latest flow
+            return
+        wait = 0 if self._last_write is None else self._last_write + FLOW_RATE_MIN_WRITE_INTERVAL - time.monotonic()
+        if wait > 0:
+            self._unsub_write = async_call_later(self.hass, wait, self._async_write)
+        else:
+            self._async_write()
+
+    @callback
+    def _async_write(self, _now=None):
+        self._unsub_write = None
+        try:
+            self._refresh()
+            self._last_write = time.monotonic()
+            self.async_write_ha_state()
+        except Exception as e:
+            _LOGGER.error("Error updating gas flow rate sensor: %s", str(e))
+        self._schedule_refresh()
+
+    @callback
+    def _schedule_refresh(self):
+        """Refresh the averages periodically until the longest window has settled."""
+        if self._flow_meter.settled(max(FLOW_RATE_WINDOWS)):
+            self._cancel_refresh()
+        elif self._unsub_refresh is None:
+            self._unsub_refresh = async_track_time_interval(
+                self.hass, self._async_refresh_averages, timedelta(seconds=FLOW_RATE_REFRESH_INTERVAL)
+            )
+
+    @callback
+    def _async_refresh_averages(self, _now):
+        # Same throttled path as a flow change
+        self._async_flow_updated()
+
+    @callback
+    def _cancel_refresh(self):
+        if self._unsub_refresh is not None:
+            self._unsub_refresh()
+            self._unsub_refresh = None
+
+    @callback
+    def _cancel_write(self):
+        if self._unsub_write is not None:
+            self._unsub_write()
+            self._unsub_write = None
+
+
 class CustomHistoryStatsSensor(HistoryStatsSensor):
     def __init__(self, entity_id, *args, **kwargs):
         super().__init__(*args, **kwargs)
@@ -176,6 +490,11 @@ class CustomHistoryStatsSensor(HistoryStatsSensor):
         await self.coordinator.async_request_refresh()
 
 
+def _attribute_signal(config_data: dict) -> bool:
+    """Return True if the burner signal is an attribute rather than the state."""
+    burner_signal = config_data.get("burner_signal")
+    return burner_signal is not None and burner_signal.attribute is not None
+
 
 async def async_setup_entry(hass: HomeAssistant, config_entry, async_add_entities: AddEntitiesCallback):
     """Set up the sensor platform and add the entities."""
@@ -184,23 +503,43 @@ async def async_setup_entry(hass: HomeAssistant, config_entry, async_add_entitie
     unit_system = config_data.get(CONF_UNIT_SYSTEM, DEFAULT_UNIT_SYSTEM)
     operating_mode = config_data.get(CONF_OPERATING_MODE, MODE_BOILER_TRACKING)
 
-    # Get the appropriate unit label for display
-    unit_label = get_unit_label(unit_system)
+    # Display unit conversions shared by all sensors of the entry
+    units = config_data.get("unit_engine") or UnitEngine(hass, unit_system)
 
     sensors = []
 
-    # Only create boiler tracking sensors if in boiler tracking mode
-    if operating_mode == MODE_BOILER_TRACKING:
+    # Only create boiler tracking sensors if in boiler tracking (or pulse counter) mode
+    if operating_mode in (MODE_BOILER_TRACKING, MODE_PULSE_COUNTER):
+        consumed_gas_template = f"{{{{ (states('{DOMAIN}.latest_gas_data') | float({DEFAULT_LATEST_GAS_DATA}) + (states('sensor.heating_interval_2') | float(0) * states('{DOMAIN}.average_m3_per_min') | float({DEFAULT_BOILER_AV_M})) | round(3)) }}}}"
+        if _attribute_signal(config_data):
+            # Burner signal in an attribute (climate hvac_action): the live burner estimate
+            consumed_gas_template = f"{{{{ (states('{DOMAIN}.latest_gas_data') | float({DEFAULT_LATEST_GAS_DATA}) + states('{DOMAIN}.burner_estimate') | float(0)) | round(3) }}}}"
+        if config_data.get(CONF_APPLIANCE_ENTITIES):
+            # Several appliances: sum of every appliance's rate × runtime since the latest reading
+            consumed_gas_template = f"{{{{ (states('{DOMAIN}.latest_gas_data') | float({DEFAULT_LATEST_GAS_DATA}) + states('{DOMAIN}.appliance_estimate') | float(0)) | round(3) }}}}"
+        elif config_data.get(CONF_MODULATION_ENTITY):
+            # Modulating boiler: ∫modulation dt × calibration once a calibration has been fitted
+            consumed_gas_template = (
+                f"{{% if states('{DOMAIN}.modulation_calibration') | float(0) > 0 %}}"
+                f"{{{{ (states('{DOMAIN}.latest_gas_data') | float({DEFAULT_LATEST_GAS_DATA}) + (states('{DOMAIN}.modulation_integral') | float(0) * states('{DOMAIN}.modulation_calibration') | float(0)) | round(3)) }}}}"
+                f"{{% else %}}{consumed_gas_template}{{% endif %}}"
+            )
+        if operating_mode == MODE_PULSE_COUNTER:
+            # Metered pulses not yet written to the history
+            consumed_gas_template = f"{{{{ (states('{DOMAIN}.latest_gas_data') | float({DEFAULT_LATEST_GAS_DATA}) + states('{DOMAIN}.pulse_estimate') | float(0)) | round(3) }}}}"
+
         sensors.extend([
             CustomTemplateSensor(
                 hass=hass,
                 friendly_name="Consumed gas",
                 unique_id="consumed_gas",
-                state_template=f"{{{{ (states('{DOMAIN}.latest_gas_data') | float({DEFAULT_LATEST_GAS_DATA}) + (states('sensor.heating_interval_2') | float(0) * states('{DOMAIN}.average_m3_per_min') | float({DEFAULT_BOILER_AV_M})) | round(3)) }}}}",
-                unit_of_measurement=unit_label,
-                device_class="gas",
+                state_template=consumed_gas_template,
+                # The template adds canonical m³ states, shown in the configured unit
+                unit_of_measurement=units.label,
+                device_class=units.device_class,
                 icon="mdi:gas-cylinder",
                 state_class="total",
+                units=units,
             ),
             CustomTemplateSensor(
                 hass=hass,
@@ -213,11 +552,40 @@ async def async_setup_entry(hass: HomeAssistant, config_entry, async_add_entitie
 
     # Add the data display sensor and Energy Dashboard compatible sensor
     async_add_entities([
-        GasDataSensor(hass, unit_system),
-        GasMeterTotalSensor(hass, unit_system),
+        GasDataSensor(hass, units),
+        GasMeterTotalSensor(hass, units),
     ], True)
     async_add_entities(sensors, update_before_add=True)
 
+    # Built-in period meters (no utility_meter helpers needed)
+    period_meters = config_data.get("period_meters")
+    if period_meters is not None:
+        async_add_entities([
+            GasPeriodSensor(period_meters, period, units) for period in PERIODS
+        ])
+
+    # Live flow rate (boiler tracking mode)
+    flow_rate = config_data.get("flow_rate")
+    if flow_rate is not None:
+        async_add_entities([GasFlowRateSensor(flow_rate, units)])
+
+    # Weather regression sensors (with an outdoor temperature sensor)
+    degree_days = config_data.get("degree_days")
+    if period_meters is not None and degree_days is not None:
+        async_add_entities([
+            GasForecastSensor(period_meters, degree_days, units),
+            GasNormalisedSensor(period_meters, degree_days, units),
+        ])
+
+    # Cost sensors (with a tariff)
+    cost_engine = config_data.get("cost_engine")
+    if cost_engine is not None:
+        async_add_entities([
+            GasCostTodaySensor(hass, cost_engine),
+            GasCostBillingCycleSensor(hass, cost_engine),
+            GasPriceSensor(hass, cost_engine, units),
+        ])
+
     async def create_history_stats_sensor(hass: HomeAssistant, config_entry):
         start_template = Template("{{ states('sensor.gas_meter_latest_update') }}", hass)
         end_template = Template("{{ now() }}", hass)
@@ -229,10 +597,15 @@ async def async_setup_entry(hass: HomeAssistant, config_entry, async_add_entitie
             _LOGGER.warning("No boiler entity configured. History stats sensor will not be created.")
             return
 
+        burner_signal = config_data.get("burner_signal")
+        if _attribute_signal(config_data):
+            _LOGGER.info(f"Burner signal is the {burner_signal.attribute} attribute of {boiler_entity_id}, no history stats sensor needed.")
+            return
+
         history_stats = HistoryStats(
             hass=hass,
             entity_id=boiler_entity_id,
-            entity_states=["on"],
+            entity_states=sorted(burner_signal.values) if burner_signal else ["on"],
             start=start_template,
             end=end_template,
             duration=None,
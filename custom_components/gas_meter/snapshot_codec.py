@@ -0,0 +1,188 @@
+"""Binary snapshot codec for gas meter records.
+
+The JSON Store repeats every key ("m3/min for interval", "consumed_gas_cumulated",
+...) for every record. The binary snapshot stores the records column-wise
+instead: one int64 column of epoch microseconds plus UTC offsets for the
+datetimes, one float64 column per numeric field (NaN where a record lacks
+it) and a small JSON blob for the rare non-numeric fields, all zlib
+compressed behind a versioned header.
+
+Fields whose values are all ints are listed as int columns and decoded as
+ints. Values a column cannot hold exactly (an int in a float column, NaN,
+ints beyond 2**53) go to the JSON blob, so every record decodes as it was
+encoded.
+
+Layout::
+
+    header   "<4sHI"   magic, codec version, record count
+    body     zlib(
+               "<I" + JSON column description (columns, int_columns),
+               int64[n] epoch microseconds, int32[n] UTC offset seconds,
+               float64[n] per numeric column,
+               "<I" + JSON extras
+             )
+"""
+import json
+import math
+import struct
+import sys
+import zlib
+from array import array
+from datetime import datetime, timedelta, timezone
+
+MAGIC = b"VGMS"
+CODEC_VERSION = 1
+
+_HEADER = struct.Struct("<4sHI")
+_LENGTH = struct.Struct("<I")
+_EPOCH = datetime(1970, 1, 1, tzinfo=timezone.utc)
+_NAIVE_EPOCH = datetime(1970, 1, 1)
+_NAIVE = -(2 ** 31)  # UTC offset marker for naive datetimes
+_EXACT_INT = 2 ** 53  # Ints a float64 column holds exactly
+
+
+def _little_endian(values: array) -> bytes:
+    """Return the array's bytes in little-endian order."""
+    if sys.byteorder != "little":
+        values = array(values.typecode, values)
+        values.byteswap()
+    return values.tobytes()
+
+
+def _from_little_endian(typecode: str, data: bytes) -> array:
+    """Build an array from little-endian bytes."""
+    values = array(typecode)
+    values.frombytes(data)
+    if sys.byteorder != "little":
+        values.byteswap()
+    return values
+
+
+_NUMBER_TYPES = (int, float)
+
+
+def encode_snapshot(records: list) -> bytes:
+    """Encode a list of record dicts into a compressed binary snapshot."""
+    count = len(records)
+
+    # Split fields into float/int columns and the (rare) non-numeric extras
+    keys = {}
+    non_numeric = set()
+    non_int = set()
+    for record in records:
+        for key, value in record.items():
+            keys[key] = None
+            if type(value) not in _NUMBER_TYPES:
+                non_numeric.add(key)
+            elif type(value) is not int:
+                non_int.add(key)
+    non_numeric.discard("datetime")
+    columns = [key for key in keys if key != "datetime" and key not in non_numeric]
+    int_columns = [key for key in columns if key not in non_int]
+
+    micros = array("q", bytes(8 * count))
+    offsets = array("i", bytes(4 * count))
+    for i, record in enumerate(records):
+        value = record["datetime"]
+        offset = value.utcoffset()
+        if offset is None:
+            delta = value - _NAIVE_EPOCH
+            offsets[i] = _NAIVE
+        else:
+            delta = value - _EPOCH
+            offsets[i] = offset.days * 86400 + offset.seconds
+        micros[i] = (delta.days * 86400 + delta.seconds) * 1000000 + delta.microseconds
+
+    # Values the column would not give back exactly are stored as extras
+    extra_fields = [{key: record[key] for key in non_numeric if key in record} for record in records]
+    parts = [_little_endian(micros), _little_endian(offsets)]
+    for key in columns:
+        float_column = key in non_int
+        column = array("d", bytes(8 * count))
+        for i, record in enumerate(records):
+            value = record.get(key, math.nan)
+            if (float_column and type(value) is int) or value != value or abs(value) >= _EXACT_INT:
+                if key in record:
+                    extra_fields[i][key] = value
+                value = math.nan
+            column[i] = value
+        parts.append(_little_endian(column))
+
+    extras = [[i, fields] for i, fields in enumerate(extra_fields) if fields]
+
+    description = json.dumps({"columns": columns, "int_columns": int_columns}).encode()
+    extras_blob = json.dumps(extras, separators=(",", ":")).encode()
+    body = b"".join([
+        _LENGTH.pack(len(description)), description,
+        *parts,
+        _LENGTH.pack(len(extras_blob)), extras_blob,
+    ])
+    return _HEADER.pack(MAGIC, CODEC_VERSION, count) + zlib.compress(body)
+
+
+def _decode_datetimes(micros: array, offsets: array) -> list:
+    """Rebuild the datetimes from epoch microseconds and UTC offsets."""
+    zones = {}
+    moments = []
+    for micro, offset in zip(micros, offsets):
+        if offset == _NAIVE:
+            moments.append(_NAIVE_EPOCH + timedelta(microseconds=micro))
+            continue
+        if offset not in zones:
+            zones[offset] = timezone(timedelta(seconds=offset))
+        moments.append((_EPOCH + timedelta(microseconds=micro)).astimezone(zones[offset]))
+    return moments
+
+
+def decode_snapshot(data: bytes) -> list:
+    """Decode a binary snapshot back into a list of record dicts."""
+    magic, version, count = _HEADER.unpack_from(data)
+    if magic != MAGIC:
+        raise ValueError("Not a gas meter snapshot")
+    if version > CODEC_VERSION:
+        raise ValueError(f"Unsupported snapshot version {version} (supported: {CODEC_VERSION})")
+
+    body = memoryview(zlib.decompress(data[_HEADER.size:]))
+    pos = 0
+
+    def take(size: int) -> bytes:
+        nonlocal pos
+        chunk = body[pos:pos + size]
+        pos += size
+        return bytes(chunk)
+
+    (length,) = _LENGTH.unpack(take(_LENGTH.size))
+    description = json.loads(take(length))
+    columns = description["columns"]
+    int_columns = set(description.get("int_columns", ()))
+
+    micros = _from_little_endian("q", take(8 * count))
+    offsets = _from_little_endian("i", take(4 * count))
+    values = [_from_little_endian("d", take(8 * count)) for _ in columns]
+
+    (length,) = _LENGTH.unpack(take(_LENGTH.size))
+    extras = json.loads(take(length))
+
+    # Columns every record has are zipped straight into the dicts, the
+    # others are filled in afterwards (NaN marks a missing field, NaN != NaN)
+    column_lists = [
+        [int(value) if value == value else value for value in column] if key in int_columns else column.tolist()
+        for key, column in zip(columns, values)
+    ]
+    dense = [i for i, column in enumerate(column_lists) if all(value == value for value in column)]
+    sparse = [i for i in range(len(columns)) if i not in dense]
+
+    keys = ("datetime", *(columns[i] for i in dense))
+    records = [
+        dict(zip(keys, row))
+        for row in zip(_decode_datetimes(micros, offsets), *(column_lists[i] for i in dense))
+    ]
+    for i in sparse:
+        key = columns[i]
+        for record, value in zip(records, column_lists[i]):
+            if value == value:
+                record[key] = value
+
+    for i, fields in extras:
+        records[i].update(fields)
+    return records
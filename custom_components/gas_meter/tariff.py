@@ -0,0 +1,386 @@
+"""Tariff and cost engine for the Virtual Gas Meter integration.
+
+Gas is priced per m³, kWh or therm (the calorific value converts volume
+to energy), optionally in consumption tiers per billing cycle and with
+time-of-use windows, plus a fixed daily charge. Instead of template
+sensors re-multiplying the meter on every state change, the engine keeps
+running cost accumulators for the current day and billing cycle: on every
+update of the period meters (new reading, live estimate, hourly rollover)
+only the gas consumed since the previous update is priced and added.
+That gas is spread evenly over the time it was consumed (the interval
+between two readings for a new reading), so each part is priced at the
+time-of-use rate of its own window.
+"""
+import logging
+import math
+from datetime import datetime, timedelta
+from typing import Callable
+
+from homeassistant.core import HomeAssistant, callback
+from homeassistant.helpers.storage import Store
+from homeassistant.util import dt as dt_util
+from .const import (
+    DOMAIN,
+    PERIOD_DAILY,
+    PERIOD_BILLING_CYCLE,
+    PRICE_UNIT_KWH,
+    PRICE_UNIT_THERM,
+    MJ_PER_KWH,
+    MJ_PER_THERM,
+)
+from .period_meter import period_start
+
+_LOGGER = logging.getLogger(__name__)
+
+STORAGE_KEY = f"{DOMAIN}_cost"
+STORAGE_VERSION = 1
+SAVE_DELAY = 60  # Seconds; accumulators change with every live estimate
+
+
+def energy_per_m3(price_unit: str, calorific_value: float) -> float:
+    """Return the price units (m³, kWh or therms) in one m³ of gas."""
+    if price_unit == PRICE_UNIT_KWH:
+        return calorific_value / MJ_PER_KWH
+    if price_unit == PRICE_UNIT_THERM:
+        return calorific_value / MJ_PER_THERM
+    return 1.0
+
+
+def parse_tiers(text: str | None) -> list[tuple[float, float]]:
+    """
+    Parse consumption tiers like "100:0.12, 300:0.15".
+
+    Each entry is the cumulative usage (price units per billing cycle) up to
+    which the price applies; usage beyond the last tier is charged at the
+    base unit price.
+
+    Raises:
+        ValueError: If an entry is malformed or the limits do not increase
+    """
+    tiers = []
+    for entry in (text or "").replace(";", ",").split(","):
+        if not entry.strip():
+            continue
+        limit, price = entry.split(":")
+        limit, price = float(limit), float(price)
+        if limit <= 0 or price < 0 or (tiers and limit <= tiers[-1][0]):
+            raise ValueError(f"Invalid tier: {entry.strip()}")
+        tiers.append((limit, price))
+    return tiers
+
+
+def _minute_of_day(text: str) -> int:
+    hours, minutes = text.strip().split(":")
+    hours, minutes = int(hours), int(minutes)
+    if not (0 <= hours <= 24 and 0 <= minutes < 60) or hours * 60 + minutes > 24 * 60:
+        raise ValueError(f"Invalid time: {text.strip()}")
+    return hours * 60 + minutes
+
+
+def parse_tou_rates(text: str | None) -> list[tuple[int, int, float]]:
+    """
+    Parse time-of-use windows like "22:00-06:00=0.08, 13:00-16:00=0.10".
+
+    Returns (start minute, end minute, price) per window; a window may wrap
+    around midnight.
+
+    Raises:
+        ValueError: If an entry is malformed
+    """
+    windows = []
+    for entry in (text or "").replace(";", ",").split(","):
+        if not entry.strip():
+            continue
+        window, price = entry.split("=")
+        start, end = window.split("-")
+        start, end, price = _minute_of_day(start), _minute_of_day(end), float(price)
+        if start == end or price < 0:
+            raise ValueError(f"Invalid time-of-use window: {entry.strip()}")
+        windows.append((start, end, price))
+    return windows
+
+
+class Tariff:
+    """Prices of one gas contract."""
+
+    def __init__(
+        self,
+        unit_price: float,
+        price_unit: str,
+        calorific_value: float,
+        tiers: list[tuple[float, float]] | None = None,
+        tou_rates: list[tuple[int, int, float]] | None = None,
+        daily_charge: float = 0.0,
+    ):
+        self.unit_price = unit_price
+        self.price_unit = price_unit
+        self.units_per_m3 = energy_per_m3(price_unit, calorific_value)
+        self.tiers = tiers or []
+        self.tou_rates = tou_rates or []
+        self.daily_charge = daily_charge
+
+    def tou_price(self, moment: datetime) -> float | None:
+        """Return the price of the time-of-use window containing moment, if any."""
+        local = dt_util.as_local(moment)
+        minute = local.hour * 60 + local.minute
+        for start, end, price in self.tou_rates:
+            if (start <= minute < end) if start < end else (minute >= start or minute < end):
+                return price
+        return None
+
+    def tier_price(self, usage: float) -> float:
+        """Return the price per unit after the given billing cycle usage (price units)."""
+        for limit, price in self.tiers:
+            if usage < limit:
+                return price
+        return self.unit_price
+
+    def energy_cost(self, usage: float, units: float, moment: datetime | None = None) -> float:
+        """
+        Return the cost of units consumed after the given billing cycle usage.
+
+        A time-of-use window overrides the tiers; otherwise the units are
+        split across the tier boundaries they cross. Negative units (a reading
+        below the live estimate) are credited at the same prices.
+        """
+        if units < 0:
+            return -self.energy_cost(usage + units, -units, moment)
+        price = self.tou_price(moment) if moment is not None and self.tou_rates else None
+        if price is not None:
+            return units * price
+
+        cost = 0.0
+        for limit, tier_price in self.tiers:
+            if units <= 0:
+                break
+            if usage < limit:
+                in_tier = min(units, limit - usage)
+                cost += in_tier * tier_price
+                usage += in_tier
+                units -= in_tier
+        return cost + max(units, 0.0) * self.unit_price
+
+    def energy_cost_between(self, usage: float, units: float, start: datetime, end: datetime) -> float:
+        """
+        Return the cost of units consumed evenly between start and end.
+
+        The interval is cut at the time-of-use window boundaries and every
+        part is priced at the rate in effect during it.
+        """
+        if not self.tou_rates or end <= start:
+            return self.energy_cost(usage, units, end)
+        cuts = [start, *self._window_boundaries(start, end), end]
+        duration = (end - start).total_seconds()
+        cost = 0.0
+        for part_start, part_end in zip(cuts, cuts[1:]):
+            part = units * (part_end - part_start).total_seconds() / duration
+            cost += self.energy_cost(usage, part, part_start + (part_end - part_start) / 2)
+            usage += part
+        return cost
+
+    def _window_boundaries(self, start: datetime, end: datetime) -> list[datetime]:
+        """Return the time-of-use window boundaries strictly between start and end."""
+        minutes = sorted({minute for window in self.tou_rates for minute in window[:2]})
+        boundaries = set()
+        day = dt_util.as_local(start).date()
+        while (midnight := dt_util.start_of_local_day(day)) < end:
+            for minute in minutes:
+                moment = dt_util.as_utc(midnight + timedelta(minutes=minute))
+                if start < moment < end:
+                    boundaries.add(moment)
+            day += timedelta(days=1)
+        return sorted(boundaries)
+
+    def current_price(self, usage: float, moment: datetime) -> float:
+        """Return the price per m³ of the next gas consumed."""
+        price = self.tou_price(moment) if self.tou_rates else None
+        if price is None:
+            price = self.tier_price(usage)
+        return price * self.units_per_m3
+
+
+class CostEngine:
+    """
+    Running cost accumulators of the current day and billing cycle.
+
+    Listens to the period meters and prices only the billing cycle
+    consumption added since the previous update, so every update is O(1)
+    regardless of the size of the history. The accumulators are stored, so
+    time-of-use prices survive a restart; without stored state they are
+    rebuilt from the period totals at the tier prices.
+
+    The added consumption is spread over the time it was consumed: since the
+    previous update for the live estimate, and between the previous and the
+    new reading for the correction a new reading brings.
+    """
+
+    def __init__(self, hass: HomeAssistant, period_meters, tariff: Tariff):
+        self.hass = hass
+        self.tariff = tariff
+        self._period_meters = period_meters
+        self._store = Store(hass, STORAGE_VERSION, STORAGE_KEY)
+        self._listeners = []
+        self._unsub = None
+        self.cycle_start = None
+        self.day_start = None
+        self.consumption = 0.0  # m³ of the billing cycle priced so far
+        self.cycle_energy_cost = 0.0
+        self.day_energy_cost = 0.0
+        self.price = 0.0  # Current price per m³
+        self.priced_at = None  # Time up to which the consumption is priced
+        self._latest_reading = None  # Timestamp of the latest reading priced
+
+    @property
+    def usage(self) -> float:
+        """Return the billing cycle usage in price units."""
+        return self.consumption * self.tariff.units_per_m3
+
+    @property
+    def cycle_days(self) -> int:
+        """Return the started days of the billing cycle."""
+        if self.cycle_start is None:
+            return 0
+        elapsed = (dt_util.utcnow() - self.cycle_start).total_seconds() / 86400
+        return max(math.ceil(elapsed), 1)
+
+    @property
+    def cycle_cost(self) -> float:
+        """Return the cost of the billing cycle so far, daily charges included."""
+        return self.cycle_energy_cost + self.tariff.daily_charge * self.cycle_days
+
+    @property
+    def day_cost(self) -> float:
+        """Return the cost of today so far, daily charge included."""
+        return self.day_energy_cost + self.tariff.daily_charge
+
+    async def async_start(self):
+        """Restore or rebuild the accumulators and start listening."""
+        now = dt_util.utcnow()
+        consumption, cycle_start = self._period_meters.consumption(PERIOD_BILLING_CYCLE, now)
+        day_start = period_start(PERIOD_DAILY, now)
+
+        stored = await self._store.async_load()
+        if stored and dt_util.parse_datetime(stored["cycle_start"]) == cycle_start:
+            self.cycle_start = cycle_start
+            self.consumption = float(stored["consumption"])
+            if stored.get("priced_at"):
+                self.priced_at = dt_util.parse_datetime(stored["priced_at"])
+            self.cycle_energy_cost = float(stored["cycle_energy_cost"])
+            if dt_util.parse_datetime(stored["day_start"]) == day_start:
+                self.day_start = day_start
+                self.day_energy_cost = float(stored["day_energy_cost"])
+        else:
+            self._rebuild(consumption, cycle_start, now)
+
+        timestamps = self._period_meters.index.timestamps
+        self._latest_reading = timestamps[-1] if timestamps else None
+        self._async_update()
+        self._unsub = self._period_meters.async_add_listener(self._async_update)
+
+    @callback
+    def async_stop(self):
+        """Stop listening to the period meters."""
+        if self._unsub is not None:
+            self._unsub()
+            self._unsub = None
+
+    @callback
+    def async_add_listener(self, update_callback: Callable[[], None]) -> Callable[[], None]:
+        """Register a cost sensor; returns a function removing it."""
+        self._listeners.append(update_callback)
+        return lambda: self._listeners.remove(update_callback)
+
+    def _rebuild(self, consumption: float, cycle_start: datetime, now: datetime):
+        """Price the current billing cycle and day from the period totals."""
+        units_per_m3 = self.tariff.units_per_m3
+        day_consumption, day_start = self._period_meters.consumption(PERIOD_DAILY, now)
+        day_consumption = min(day_consumption, consumption)
+        before_today = (consumption - day_consumption) * units_per_m3
+
+        self.cycle_start = cycle_start
+        self.day_start = day_start
+        self.consumption = consumption
+        self.cycle_energy_cost = self.tariff.energy_cost(0.0, consumption * units_per_m3)
+        self.day_energy_cost = self.tariff.energy_cost(before_today, day_consumption * units_per_m3)
+        self.priced_at = now
+
+    def _consumed_parts(self, delta: float, now: datetime) -> list[tuple[float, datetime, datetime]]:
+        """Return the (m³, start, end) parts of the consumption delta over the time it was consumed."""
+        timestamps = self._period_meters.index.timestamps
+        latest_reading = timestamps[-1] if timestamps else None
+        previous_update = self.priced_at or now
+        if latest_reading is None or latest_reading == self._latest_reading or len(timestamps) < 2:
+            self._latest_reading = latest_reading
+            return [(delta, previous_update, now)]
+
+        # A new reading: the gas after it is the live estimate, the rest of the
+        # delta corrects the interval between the previous and the new reading
+        self._latest_reading = latest_reading
+        reading = max(dt_util.utc_from_timestamp(latest_reading), self.cycle_start)
+        previous = max(dt_util.utc_from_timestamp(timestamps[-2]), self.cycle_start)
+        after = self._period_meters.consumption_between(reading, now) if reading < now else 0.0
+        return [(delta - after, previous, reading), (after, reading, now)]
+
+    def _price_parts(self, parts: list, day_start: datetime) -> tuple[float, float]:
+        """Price the consumed parts in order; returns the billing cycle and today's cost."""
+        cycle_cost = day_cost = 0.0
+        for consumption, start, end in parts:
+            pieces = [(consumption, start, end)]
+            if start < day_start < end:
+                # Only the gas consumed since midnight counts for today
+                before = consumption * (day_start - start).total_seconds() / (end - start).total_seconds()
+                pieces = [(before, start, day_start), (consumption - before, day_start, end)]
+            for units, piece_start, piece_end in pieces:
+                if not units:
+                    continue
+                cost = self.tariff.energy_cost_between(self.usage, units * self.tariff.units_per_m3, piece_start, piece_end)
+                self.consumption += units
+                cycle_cost += cost
+                if piece_end > day_start:
+                    day_cost += cost
+        return cycle_cost, day_cost
+
+    @callback
+    def _async_update(self):
+        """Price the gas consumed since the previous update and notify the sensors."""
+        try:
+            now = dt_util.utcnow()
+            consumption, cycle_start = self._period_meters.consumption(PERIOD_BILLING_CYCLE, now)
+            day_start = period_start(PERIOD_DAILY, now)
+
+            if cycle_start != self.cycle_start:
+                self.cycle_start = cycle_start
+                self.consumption = 0.0
+                self.cycle_energy_cost = 0.0
+            if day_start != self.day_start:
+                self.day_start = day_start
+                self.day_energy_cost = 0.0
+
+            delta = consumption - self.consumption
+            parts = self._consumed_parts(delta, now)
+            if delta:
+                cycle_cost, day_cost = self._price_parts(parts, day_start)
+                self.consumption = consumption
+                self.cycle_energy_cost += cycle_cost
+                self.day_energy_cost += day_cost
+                self._store.async_delay_save(self._data_to_save, SAVE_DELAY)
+            self.priced_at = now
+
+            self.price = self.tariff.current_price(self.usage, now)
+        except Exception as e:
+            _LOGGER.error(f"Error updating gas cost: {e}")
+            return
+
+        for update_callback in list(self._listeners):
+            update_callback()
+
+    @callback
+    def _data_to_save(self) -> dict:
+        return {
+            "cycle_start": self.cycle_start.isoformat(),
+            "day_start": self.day_start.isoformat(),
+            "consumption": self.consumption,
+            "cycle_energy_cost": self.cycle_energy_cost,
+            "day_energy_cost": self.day_energy_cost,
+            "priced_at": self.priced_at.isoformat() if self.priced_at else None,
+        }
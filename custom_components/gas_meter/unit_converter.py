@@ -1,31 +1,86 @@
-"""Unit conversion utilities for the Virtual Gas Meter integration."""
+"""Unit conversion utilities for the Virtual Gas Meter integration.
+
+Everything is stored in canonical m³; the display unit is m³, CCF, ft³,
+therms or kWh. Therms and kWh are energy units, converted with the
+calorific value of the gas when one is configured. The ``UnitEngine`` of
+an entry converts whole columns at once and keeps the formatted history
+records until the records are saved again.
+"""
+import numpy as np
+
+from homeassistant.components.sensor import SensorDeviceClass
+from homeassistant.core import HomeAssistant, callback
+from homeassistant.helpers.dispatcher import async_dispatcher_connect
+import custom_components.gas_meter.file_handler as fh
 from .const import (
     UNIT_SYSTEM_METRIC,
     UNIT_SYSTEM_IMPERIAL,
+    UNIT_SYSTEM_CUBIC_FEET,
+    UNIT_SYSTEM_THERMS,
+    UNIT_SYSTEM_KWH,
     UNIT_CUBIC_METERS,
     UNIT_CCF,
+    UNIT_CF,
+    UNIT_THERMS,
+    UNIT_KWH,
     CCF_TO_M3,
     M3_TO_CCF,
+    M3_TO_CF,
+    M3_TO_THERM,
+    KWH_PER_THERM,
+    MJ_PER_KWH,
+    MJ_PER_THERM,
+    SIGNAL_RECORDS_UPDATED,
 )
 
+UNIT_LABELS = {
+    UNIT_SYSTEM_METRIC: UNIT_CUBIC_METERS,
+    UNIT_SYSTEM_IMPERIAL: UNIT_CCF,
+    UNIT_SYSTEM_CUBIC_FEET: UNIT_CF,
+    UNIT_SYSTEM_THERMS: UNIT_THERMS,
+    UNIT_SYSTEM_KWH: UNIT_KWH,
+}
+
 
 def get_unit_label(unit_system: str) -> str:
     """Get the display unit label for a unit system."""
+    return UNIT_LABELS.get(unit_system, UNIT_CUBIC_METERS)
+
+
+def display_factor(unit_system: str, calorific_value: float | None = None) -> float:
+    """
+    Return the display units in one m³ of gas.
+
+    Args:
+        unit_system: Display unit system
+        calorific_value: Calorific value of the gas (MJ/m³) for therms and kWh;
+            without one the nominal 1 therm ≈ 100 ft³ is used
+
+    Returns:
+        Conversion factor from m³ to the display unit
+    """
     if unit_system == UNIT_SYSTEM_IMPERIAL:
-        return UNIT_CCF
-    return UNIT_CUBIC_METERS
+        return M3_TO_CCF
+    if unit_system == UNIT_SYSTEM_CUBIC_FEET:
+        return M3_TO_CF
+    if unit_system == UNIT_SYSTEM_THERMS:
+        return calorific_value / MJ_PER_THERM if calorific_value else M3_TO_THERM
+    if unit_system == UNIT_SYSTEM_KWH:
+        return calorific_value / MJ_PER_KWH if calorific_value else M3_TO_THERM * KWH_PER_THERM
+    return 1.0
 
 
-def to_display_unit(value: float, unit_system: str) -> float:
+def to_display_unit(value: float, unit_system: str, calorific_value: float | None = None) -> float:
     """
     Convert a value from canonical storage (m³) to display unit.
 
     Args:
         value: Value in cubic meters (m³)
-        unit_system: Target unit system (metric or imperial)
+        unit_system: Target unit system
+        calorific_value: Calorific value (MJ/m³) for therms and kWh
 
     Returns:
-        Value converted to display unit (m³ or CCF)
+        Value converted to display unit
     """
     if value is None:
         return 0.0
@@ -34,17 +89,21 @@ def to_display_unit(value: float, unit_system: str) -> float:
         # Convert m³ to CCF
         return value * M3_TO_CCF
 
-    # Metric - no conversion needed
-    return value
+    if unit_system == UNIT_SYSTEM_METRIC:
+        # Metric - no conversion needed
+        return value
+
+    return value * display_factor(unit_system, calorific_value)
 
 
-def to_canonical_unit(value: float, unit_system: str) -> float:
+def to_canonical_unit(value: float, unit_system: str, calorific_value: float | None = None) -> float:
     """
     Convert a value from display unit to canonical storage (m³).
 
     Args:
-        value: Value in display unit (m³ or CCF)
-        unit_system: Source unit system (metric or imperial)
+        value: Value in display unit
+        unit_system: Source unit system
+        calorific_value: Calorific value (MJ/m³) for therms and kWh
 
     Returns:
         Value converted to cubic meters (m³)
@@ -56,11 +115,14 @@ def to_canonical_unit(value: float, unit_system: str) -> float:
         # Convert CCF to m³
         return value * CCF_TO_M3
 
-    # Metric - no conversion needed
-    return value
+    if unit_system == UNIT_SYSTEM_METRIC:
+        # Metric - no conversion needed
+        return value
+
+    return value / display_factor(unit_system, calorific_value)
 
 
-def format_gas_value(value: float, unit_system: str, precision: int = 3) -> str:
+def format_gas_value(value: float, unit_system: str, precision: int = 3, calorific_value: float | None = None) -> str:
     """
     Format a gas value with appropriate unit label.
 
@@ -68,10 +130,99 @@ def format_gas_value(value: float, unit_system: str, precision: int = 3) -> str:
         value: Value in canonical unit (m³)
         unit_system: Display unit system
         precision: Decimal places (default 3)
+        calorific_value: Calorific value (MJ/m³) for therms and kWh
 
     Returns:
         Formatted string like "35.315 CCF" or "1.000 m³"
     """
-    display_value = to_display_unit(value, unit_system)
+    display_value = to_display_unit(value, unit_system, calorific_value)
     unit_label = get_unit_label(unit_system)
     return f"{display_value:.{precision}f} {unit_label}"
+
+
+class UnitEngine:
+    """
+    Display unit of one gas meter entry.
+
+    Converts single values and whole columns (one numpy multiplication
+    instead of a Python call per value) and caches the formatted history
+    records. The cache is dropped whenever records are saved; the unit is
+    fixed for the lifetime of the entry, so a unit change means a new engine.
+    """
+
+    def __init__(self, hass: HomeAssistant, unit_system: str, calorific_value: float | None = None):
+        self.hass = hass
+        self.unit_system = unit_system
+        self.label = get_unit_label(unit_system)
+        self.factor = display_factor(unit_system, calorific_value)
+        self._gas_consume = None
+        self._records = None
+        self._unsub = None
+
+    @property
+    def device_class(self) -> SensorDeviceClass | None:
+        """Return the sensor device class of the display unit (therms have none in Home Assistant)."""
+        if self.unit_system == UNIT_SYSTEM_KWH:
+            return SensorDeviceClass.ENERGY
+        if self.unit_system == UNIT_SYSTEM_THERMS:
+            return None
+        return SensorDeviceClass.GAS
+
+    def to_display(self, value: float | None) -> float:
+        """Convert a value from m³ to the display unit."""
+        return 0.0 if value is None else value * self.factor
+
+    def to_canonical(self, value: float | None) -> float:
+        """Convert a value from the display unit to m³."""
+        return 0.0 if value is None else value / self.factor
+
+    def to_display_column(self, values) -> np.ndarray:
+        """Convert a sequence of m³ values to the display unit in one operation."""
+        return np.asarray(values, dtype=float) * self.factor
+
+    def format_column(self, values, precision: int = 2) -> list[str]:
+        """Convert and format a sequence of m³ values like "35.32 CCF"."""
+        column = np.char.mod(f"%.{precision}f", self.to_display_column(values))
+        return np.char.add(column, f" {self.label}").tolist()
+
+    def format(self, value: float, precision: int = 3) -> str:
+        """Convert and format one m³ value."""
+        return f"{self.to_display(value):.{precision}f} {self.label}"
+
+    def async_start(self):
+        """Drop the cached records whenever records are saved."""
+        self._unsub = async_dispatcher_connect(self.hass, SIGNAL_RECORDS_UPDATED, self._async_records_updated)
+
+    @callback
+    def async_stop(self):
+        """Stop following record saves."""
+        if self._unsub is not None:
+            self._unsub()
+            self._unsub = None
+
+    @callback
+    def _async_records_updated(self, gas_consume):
+        self._gas_consume = gas_consume
+        self._records = None
+
+    async def async_display_records(self) -> list[dict]:
+        """Return the history records formatted in the display unit (cached)."""
+        if self._records is None:
+            if self._gas_consume is None:
+                self._gas_consume = await fh.load_gas_actualdata(self.hass)
+            records = self._gas_consume.data
+            usage = self.format_column([record["consumed_gas"] for record in records])
+            cumulative = self.format_column(
+                [record.get("consumed_gas_cumulated", record["consumed_gas"]) for record in records]
+            )
+            self._records = [
+                {"date": record["datetime"].strftime('%Y-%m-%d'), "usage": usage[i], "cumulative_total": cumulative[i]}
+                for i, record in enumerate(records)
+            ]
+        return self._records
+
+    async def async_latest_record(self) -> dict | None:
+        """Return the latest stored record (m³), if any."""
+        if self._gas_consume is None:
+            self._gas_consume = await fh.load_gas_actualdata(self.hass)
+        return self._gas_consume[-1] if self._gas_consume else None
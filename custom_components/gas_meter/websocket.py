@@ -0,0 +1,132 @@
+"""Websocket API for the Virtual Gas Meter integration.
+
+``gas_meter/history`` returns a range of records, ``gas_meter/subscribe``
+then pushes only the records that were appended or corrected since, so a
+dashboard card can keep a local copy instead of re-reading the full
+``records`` attribute of the history sensor on every reading.
+
+Every record carries its ``position`` in the stored records list, which is
+the key a client uses to merge deltas into its copy.
+"""
+import logging
+
+import voluptuous as vol
+
+from homeassistant.components import websocket_api
+from homeassistant.core import HomeAssistant, callback
+from homeassistant.helpers.dispatcher import async_dispatcher_connect, async_dispatcher_send
+import custom_components.gas_meter.file_handler as fh
+from .const import (
+    DOMAIN,
+    DEFAULT_EXPORT_PAGE_SIZE,
+    MAX_EXPORT_PAGE_SIZE,
+    SIGNAL_RECORDS_UPDATED,
+    SIGNAL_HISTORY_DELTA,
+    EXPORT_FORMAT_JSON,
+)
+from .history_export import async_export_history, get_record_index, positioned_records
+
+_LOGGER = logging.getLogger(__name__)
+
+
+class HistoryDeltas:
+    """
+    Turns saved record lists into deltas for the websocket subscribers.
+
+    The change set is taken from the saved records themselves (records
+    appended since they were loaded, corrected positions), so a save costs
+    only the changed records; the delta is fanned out to all subscriptions.
+    """
+
+    def __init__(self, hass: HomeAssistant):
+        self.hass = hass
+        self._total = 0
+        self._unsub = None
+
+    def async_start(self, gas_consume):
+        """Remember the current record count and start listening for saves."""
+        self._total = len(gas_consume)
+        self._unsub = async_dispatcher_connect(self.hass, SIGNAL_RECORDS_UPDATED, self._async_records_updated)
+
+    @callback
+    def async_stop(self):
+        """Stop listening for saves."""
+        if self._unsub is not None:
+            self._unsub()
+            self._unsub = None
+
+    @callback
+    def _async_records_updated(self, gas_consume):
+        """Compute the delta of a save and send it to the subscribers."""
+        known = self._total
+        self._total = len(gas_consume)
+
+        if gas_consume.stored_count != known or len(gas_consume) < known:
+            # Records were removed, or the list was not loaded from the latest save:
+            # positions may have shifted, clients have to refetch
+            async_dispatcher_send(self.hass, SIGNAL_HISTORY_DELTA, {"reset": True, "total": len(gas_consume)})
+            return
+
+        corrected = sorted(gas_consume.corrected)
+        appended = range(known, len(gas_consume))
+        if not corrected and not appended:
+            return
+
+        async_dispatcher_send(self.hass, SIGNAL_HISTORY_DELTA, {
+            "total": len(gas_consume),
+            "appended": positioned_records(gas_consume, appended),
+            "corrected": positioned_records(gas_consume, corrected),
+        })
+
+
+@websocket_api.websocket_command({
+    vol.Required("type"): f"{DOMAIN}/history",
+    vol.Optional("start"): str,
+    vol.Optional("end"): str,
+    vol.Optional("offset", default=0): vol.All(vol.Coerce(int), vol.Range(min=0)),
+    vol.Optional("limit", default=DEFAULT_EXPORT_PAGE_SIZE): vol.All(vol.Coerce(int), vol.Range(min=1, max=MAX_EXPORT_PAGE_SIZE)),
+})
+@websocket_api.async_response
+async def ws_history(hass: HomeAssistant, connection: websocket_api.ActiveConnection, msg: dict):
+    """Return a page of records in chronological order, optionally within a date range."""
+    try:
+        start = fh.string_to_datetime(msg["start"]) if msg.get("start") else None
+        end = fh.string_to_datetime(msg["end"]) if msg.get("end") else None
+    except ValueError as e:
+        connection.send_error(msg["id"], websocket_api.const.ERR_INVALID_FORMAT, str(e))
+        return
+
+    gas_consume = await fh.load_gas_actualdata(hass)
+    page = await async_export_history(
+        hass,
+        gas_consume,
+        get_record_index(hass, gas_consume),
+        EXPORT_FORMAT_JSON,
+        start=start,
+        end=end,
+        offset=msg["offset"],
+        limit=msg["limit"],
+    )
+    connection.send_result(msg["id"], page)
+
+
+@websocket_api.websocket_command({
+    vol.Required("type"): f"{DOMAIN}/subscribe",
+})
+@callback
+def ws_subscribe(hass: HomeAssistant, connection: websocket_api.ActiveConnection, msg: dict):
+    """Push appended and corrected records until the client unsubscribes."""
+
+    @callback
+    def forward_delta(delta: dict):
+        connection.send_message(websocket_api.event_message(msg["id"], delta))
+
+    connection.subscriptions[msg["id"]] = async_dispatcher_connect(hass, SIGNAL_HISTORY_DELTA, forward_delta)
+    connection.send_result(msg["id"])
+
+
+@callback
+def async_register_websocket_commands(hass: HomeAssistant):
+    """Register the gas meter websocket commands."""
+    websocket_api.async_register_command(hass, ws_history)
+    websocket_api.async_register_command(hass, ws_subscribe)
@@ -0,0 +1,264 @@
+"""Load test for the Virtual Gas Meter reading services.
+
+Starts a bare Home Assistant instance in a temporary config directory, sets
+the integration up with a fake recorder (synthetic boiler on/off history
+with a configurable query latency) and fires concurrent
+``trigger_gas_update`` or ``enter_bill_usage`` calls against stored
+histories of different sizes. For every history size it reports:
+
+    throughput      completed calls per second
+    p50/p99/max     service call latency (ms)
+    lost            readings missing from the storage after the storm
+    blocked         event loop time lost to blocking work (ms), and the
+                    longest single stall
+
+Readings are deterministic (fixed start time, one per minute), so two runs
+with the same arguments are comparable. Use it before and after a change
+to ``__init__.py`` or ``file_handler.py``:
+
+    python scripts/load_test.py
+    python scripts/load_test.py --service enter_bill_usage --calls 500 --concurrency 50
+    python scripts/load_test.py --history 0,10000,100000 --storage binary --json
+    python scripts/load_test.py --max-lost 5   # gate: fail only above a known baseline
+
+Requires Home Assistant (and numpy) in the Python environment.
+"""
+import argparse
+import asyncio
+import json
+import logging
+import statistics
+import sys
+import tempfile
+import time
+from contextlib import ExitStack
+from datetime import datetime, timedelta, timezone
+from pathlib import Path
+from types import SimpleNamespace
+from unittest.mock import patch
+
+import numpy as np
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+from homeassistant.core import HomeAssistant  # noqa: E402
+
+import custom_components.gas_meter as gas_meter  # noqa: E402
+import custom_components.gas_meter.appliances as appliances  # noqa: E402
+import custom_components.gas_meter.degree_days as degree_days  # noqa: E402
+import custom_components.gas_meter.file_handler as fh  # noqa: E402
+import custom_components.gas_meter.modulation as modulation  # noqa: E402
+from custom_components.gas_meter.const import (  # noqa: E402
+    DOMAIN,
+    CONF_BOILER_ENTITY,
+    CONF_BOILER_AVERAGE,
+    CONF_OPERATING_MODE,
+    CONF_STORAGE_FORMAT,
+    CONF_UNIT_SYSTEM,
+    MODE_BOILER_TRACKING,
+    MODE_BILL_ENTRY,
+    STORAGE_FORMAT_JSON,
+    STORAGE_FORMAT_BINARY,
+    UNIT_SYSTEM_METRIC,
+)
+from custom_components.gas_meter.gas_consume import GasConsume  # noqa: E402
+from custom_components.gas_meter.recorder_access import StateSeries  # noqa: E402
+
+BOILER_ENTITY = "switch.load_test_boiler"
+SERVICE_TRIGGER = "trigger_gas_update"
+SERVICE_BILL = "enter_bill_usage"
+START = datetime(2020, 1, 1, tzinfo=timezone.utc)
+RATE = 0.01  # m³ per burner minute
+LOOP_PROBE = 0.005  # Seconds between event loop lag probes
+LOOP_STALL = 0.002  # Lag above this counts as blocked
+# Modules that import the recorder query directly, patched with the fake recorder
+RECORDER_MODULES = (gas_meter, appliances, modulation, degree_days)
+
+
+def seed_records(count: int, operating_mode: str) -> GasConsume:
+    """Return a consistent history of count readings, one per hour before the storm."""
+    gas_consume = GasConsume()
+    first = START - timedelta(hours=count)
+    for i in range(count):
+        moment = first + timedelta(hours=i)
+        if operating_mode == MODE_BILL_ENTRY:
+            gas_consume.add_record(moment, 1.0)
+            gas_consume[-1]["consumed_gas_cumulated"] = float(i + 1)
+            continue
+        gas_consume.add_record(moment, 100.0 + i * 30 * RATE)
+        if i:
+            gas_consume[-1].update({
+                "m3/min for interval": RATE,
+                "consumed_gas_cumulated": i * 30 * RATE,
+                "min_cumulated": i * 30.0,
+                "average m3/min": RATE,
+            })
+    return gas_consume
+
+
+def fake_recorder(latency: float):
+    """
+    Return a stand-in for async_get_state_series: burners on half of every
+    10 minutes, numeric sensors at 50 while on and converted ones at 5.
+    """
+
+    async def async_get_state_series(hass, start_time, end_time, on_off_entities=(), numeric_entities=(), converted_entities=None, attribute_entities=None):
+        await asyncio.sleep(latency)
+        start, end = start_time.timestamp(), end_time.timestamp()
+        timestamps = np.arange(start - start % 600, end, 300.0)
+        values = (np.arange(len(timestamps)) % 2 == 0).astype(float)
+        series = {entity_id: StateSeries(timestamps, values) for entity_id in on_off_entities}
+        series.update({entity_id: StateSeries(timestamps, values) for entity_id in attribute_entities or {}})
+        series.update({entity_id: StateSeries(timestamps, values * 50) for entity_id in numeric_entities})
+        series.update({entity_id: StateSeries(timestamps, np.full(len(timestamps), 5.0)) for entity_id in converted_entities or {}})
+        return series
+
+    return async_get_state_series
+
+
+async def monitor_loop(stop: asyncio.Event, stalls: list):
+    """Record how late the loop wakes a sleeping task (lag = blocked loop)."""
+    loop = asyncio.get_running_loop()
+    while not stop.is_set():
+        before = loop.time()
+        await asyncio.sleep(LOOP_PROBE)
+        lag = loop.time() - before - LOOP_PROBE
+        if lag > LOOP_STALL:
+            stalls.append(lag)
+
+
+def service_calls(service: str, count: int) -> list:
+    """Return the data of count readings after the seeded history."""
+    calls = []
+    for i in range(count):
+        moment = START + timedelta(minutes=i + 1)
+        if service == SERVICE_BILL:
+            calls.append({"billing_date": moment, "usage": 1.0})
+        else:
+            calls.append({"datetime": moment, "consumed_gas": 100.0 + 1000 + i * RATE})
+    return calls
+
+
+async def run_storm(service: str, history: int, calls: int, concurrency: int, latency: float, storage_format: str) -> dict:
+    """Set up a fresh instance with a seeded history and fire the calls."""
+    operating_mode = MODE_BILL_ENTRY if service == SERVICE_BILL else MODE_BOILER_TRACKING
+    with tempfile.TemporaryDirectory() as config_dir:
+        hass = HomeAssistant(config_dir)
+        hass.config.components.add("recorder")
+
+        async def async_forward_entry_setups(entry, platforms):
+            return None
+
+        async def async_unload_platforms(entry, platforms):
+            return True
+
+        # Services only: no sensor platforms, no config entry manager
+        hass.config_entries = SimpleNamespace(
+            async_forward_entry_setups=async_forward_entry_setups,
+            async_unload_platforms=async_unload_platforms,
+        )
+        entry = SimpleNamespace(entry_id="load_test", data={
+            CONF_UNIT_SYSTEM: UNIT_SYSTEM_METRIC,
+            CONF_OPERATING_MODE: operating_mode,
+            CONF_STORAGE_FORMAT: storage_format,
+            CONF_BOILER_ENTITY: BOILER_ENTITY,
+            CONF_BOILER_AVERAGE: RATE * 60,
+        })
+        hass.states.async_set(BOILER_ENTITY, "off")
+
+        with ExitStack() as fake_recorder_patches:
+            # Every module that imported the recorder query gets the fake one
+            for module in RECORDER_MODULES:
+                fake_recorder_patches.enter_context(patch.object(module, "async_get_state_series", fake_recorder(latency)))
+            hass.data.setdefault(DOMAIN, {})[entry.entry_id] = {CONF_STORAGE_FORMAT: storage_format}
+            await fh.save_gas_actualdata(seed_records(history, operating_mode), hass)
+            await gas_meter.async_setup_entry(hass, entry)
+
+            stop, stalls, latencies = asyncio.Event(), [], []
+            semaphore = asyncio.Semaphore(concurrency)
+            errors = 0
+
+            async def call(data):
+                nonlocal errors
+                async with semaphore:
+                    started = time.perf_counter()
+                    try:
+                        await hass.services.async_call(DOMAIN, service, data, blocking=True)
+                    except Exception:
+                        errors += 1
+                    latencies.append(time.perf_counter() - started)
+
+            data = service_calls(service, calls)
+            monitor = asyncio.create_task(monitor_loop(stop, stalls))
+            started = time.perf_counter()
+            await asyncio.gather(*(call(item) for item in data))
+            elapsed = time.perf_counter() - started
+            stop.set()
+            await monitor
+
+            stored = await fh.load_gas_actualdata(hass)
+            stored_datetimes = {record["datetime"] for record in stored}
+            key = "billing_date" if service == SERVICE_BILL else "datetime"
+            lost = sum(item[key] not in stored_datetimes for item in data)
+
+            await gas_meter.async_unload_entry(hass, entry)
+        await hass.async_block_till_done()
+        await hass.async_stop(force=True)
+
+    latencies_ms = sorted(latency * 1000 for latency in latencies)
+    return {
+        "service": service,
+        "history": history,
+        "calls": calls,
+        "concurrency": concurrency,
+        "errors": errors,
+        "throughput": calls / elapsed if elapsed else 0.0,
+        "p50_ms": statistics.median(latencies_ms),
+        "p99_ms": latencies_ms[min(int(len(latencies_ms) * 0.99), len(latencies_ms) - 1)],
+        "max_ms": latencies_ms[-1],
+        "lost": lost,
+        "blocked_ms": sum(stalls) * 1000,
+        "max_stall_ms": max(stalls, default=0.0) * 1000,
+    }
+
+
+def _print_report(results: list):
+    header = f"{'history':>8} {'calls':>6} {'conc':>5} {'calls/s':>9} {'p50 ms':>8} {'p99 ms':>8} {'max ms':>8} {'lost':>5} {'errors':>6} {'blocked ms':>11} {'max stall':>10}"
+    print(f"{results[0]['service']}")
+    print(header)
+    for r in results:
+        print(
+            f"{r['history']:>8} {r['calls']:>6} {r['concurrency']:>5} {r['throughput']:>9.1f} {r['p50_ms']:>8.1f} "
+            f"{r['p99_ms']:>8.1f} {r['max_ms']:>8.1f} {r['lost']:>5} {r['errors']:>6} {r['blocked_ms']:>11.1f} {r['max_stall_ms']:>10.1f}"
+        )
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description="Concurrent service load test for the Virtual Gas Meter.")
+    parser.add_argument("--service", choices=[SERVICE_TRIGGER, SERVICE_BILL], default=SERVICE_TRIGGER)
+    parser.add_argument("--calls", type=int, default=200, help="Service calls per history size")
+    parser.add_argument("--concurrency", type=int, default=20, help="Calls in flight at once")
+    parser.add_argument("--history", default="0,1000,10000", help="Comma-separated stored history sizes")
+    parser.add_argument("--recorder-latency", type=float, default=5.0, help="Fake recorder query latency (ms)")
+    parser.add_argument("--storage", choices=[STORAGE_FORMAT_JSON, STORAGE_FORMAT_BINARY], default=STORAGE_FORMAT_JSON)
+    parser.add_argument("--max-lost", type=int, default=0, help="Lost readings per history size tolerated before failing")
+    parser.add_argument("--json", action="store_true", help="Print the results as JSON")
+    parser.add_argument("--verbose", action="store_true", help="Show the integration's log output")
+    args = parser.parse_args(argv)
+
+    logging.basicConfig(level=logging.INFO if args.verbose else logging.CRITICAL)
+    results = []
+    for history in (int(size) for size in args.history.split(",")):
+        results.append(asyncio.run(run_storm(
+            args.service, history, args.calls, args.concurrency, args.recorder_latency / 1000, args.storage
+        )))
+
+    if args.json:
+        print(json.dumps(results, indent=2))
+    else:
+        _print_report(results)
+    return 1 if any(result["lost"] > args.max_lost or result["errors"] for result in results) else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
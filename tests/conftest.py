@@ -0,0 +1,16 @@
+"""Fixtures for the Virtual Gas Meter tests (pytest-homeassistant-custom-component)."""
+import pytest
+
+pytest_plugins = ["pytest_homeassistant_custom_component"]
+
+
+@pytest.fixture(autouse=True)
+def auto_enable_custom_integrations(enable_custom_integrations):
+    """Load the integration from custom_components."""
+    yield
+
+
+@pytest.fixture
+def recorder_db_url():
+    """Run the recorder on an in-memory database."""
+    return "sqlite://"
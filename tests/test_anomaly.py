@@ -0,0 +1,58 @@
+"""Tests for the leak and anomaly detection."""
+import random
+import statistics
+
+import pytest
+
+from homeassistant.core import HomeAssistant
+
+from custom_components.gas_meter.anomaly import (
+    ANOMALY_CONSUMPTION_WHILE_OFF,
+    ANOMALY_RATE_OUT_OF_BAND,
+    RunningStats,
+    check_interval,
+)
+from custom_components.gas_meter.const import ANOMALY_MIN_SAMPLES
+
+
+def test_running_stats_match_batch_statistics(hass: HomeAssistant):
+    """Welford's mean and sample deviation equal the batch values and survive storing."""
+    rng = random.Random(0)
+    rates = [rng.gauss(0.01, 0.001) for _ in range(200)]
+    stats = RunningStats()
+    for rate in rates:
+        stats.add(rate)
+    assert stats.mean == pytest.approx(statistics.mean(rates))
+    assert stats.std == pytest.approx(statistics.stdev(rates))
+
+    restored = RunningStats.from_dict(stats.to_dict())
+    assert (restored.count, restored.mean, restored.std) == (200, stats.mean, stats.std)
+    assert RunningStats.from_dict(None).count == 0
+    assert RunningStats().std == 0.0
+
+
+def test_consumption_while_off(hass: HomeAssistant):
+    """Gas without runtime is flagged, unless the runtime is unknown or below the meter resolution."""
+    stats = RunningStats()
+    assert check_interval(stats, 0.5, 0)["type"] == ANOMALY_CONSUMPTION_WHILE_OFF
+    assert check_interval(stats, 0.5, 0, runtime_known=False) is None
+    assert check_interval(stats, 0.01, 0) is None
+    assert stats.count == 0
+
+
+def test_rate_out_of_band(hass: HomeAssistant):
+    """Rates far from the usual band are flagged once enough intervals were seen, and kept out of the statistics."""
+    stats = RunningStats()
+    for rate in (0.009, 0.011) * ANOMALY_MIN_SAMPLES:
+        assert check_interval(stats, rate * 60, 60) is None
+    count = stats.count
+
+    anomaly = check_interval(stats, 0.05 * 60, 60)
+    assert anomaly["type"] == ANOMALY_RATE_OUT_OF_BAND
+    assert anomaly["rate"] == pytest.approx(0.05)
+    assert stats.count == count
+
+    # Short runtimes and incomparable rates are not checked
+    assert check_interval(stats, 0.05 * 5, 5) is None
+    assert check_interval(stats, 0.05 * 60, 60, check_rate=False) is None
+    assert stats.count == count
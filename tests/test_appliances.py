@@ -0,0 +1,52 @@
+"""Tests for the joint appliance rate fit."""
+from datetime import timedelta
+from unittest.mock import patch
+
+import numpy as np
+
+from homeassistant.core import HomeAssistant
+from homeassistant.util import dt as dt_util
+
+import custom_components.gas_meter.appliances as appliances
+from custom_components.gas_meter.gas_consume import GasConsume
+from custom_components.gas_meter.recorder_access import StateSeries
+
+BOILER = "switch.boiler"
+WATER_HEATER = "switch.water_heater"
+
+
+async def test_uncovered_intervals_are_queried_once(hass: HomeAssistant):
+    """Intervals older than the recorder history are marked instead of being queried again."""
+    now = dt_util.utcnow().replace(microsecond=0)
+    history_start = now - timedelta(days=2, hours=12)
+    queried = []
+
+    async def fake_state_series(hass, start_time, end_time, on_off_entities=(), **kwargs):
+        """Both appliances always on since the recorder history starts."""
+        queried.append((start_time, end_time))
+        return {
+            entity_id: StateSeries(np.array([history_start.timestamp()]), np.array([1.0]))
+            for entity_id in on_off_entities
+        }
+
+    gas_consume = GasConsume()
+    for days, reading in ((4, 100.0), (3, 110.0), (2, 120.0), (1, 130.0)):
+        gas_consume.add_record(now - timedelta(days=days), reading)
+    gas_consume.mark_stored()
+
+    with patch.object(appliances, "async_get_state_series", fake_state_series):
+        await appliances.async_fit_appliance_rates(hass, gas_consume, [BOILER, WATER_HEATER], {})
+        assert len(queried) == 1
+        assert gas_consume[1]["appliance_runtime_uncovered"] == [BOILER, WATER_HEATER]
+        assert gas_consume[2]["appliance_runtime_uncovered"] == [BOILER, WATER_HEATER]
+        assert gas_consume[3]["appliance_runtime"] == {BOILER: 1440.0, WATER_HEATER: 1440.0}
+        assert gas_consume.corrected == {1, 2, 3}
+
+        # Nothing left to try
+        await appliances.async_fit_appliance_rates(hass, gas_consume, [BOILER, WATER_HEATER], {})
+        assert len(queried) == 1
+
+        # A different appliance set is tried again
+        await appliances.async_fit_appliance_rates(hass, gas_consume, [BOILER], {})
+        assert len(queried) == 2
+        assert queried[1][0] == dt_util.as_utc(gas_consume[0]["datetime"])
@@ -0,0 +1,71 @@
+"""Tests for the full-history batch jobs."""
+from datetime import timedelta
+
+import numpy as np
+import pytest
+
+from homeassistant.core import HomeAssistant
+from homeassistant.util import dt as dt_util
+
+from custom_components.gas_meter.compute import ComputeBackend, apply_columns, history_columns, recompute_cumulated
+from custom_components.gas_meter.const import MODE_BILL_ENTRY, MODE_BOILER_TRACKING
+from custom_components.gas_meter.gas_consume import GasConsume
+
+
+def make_records(count: int) -> list:
+    """Hourly readings of 1 m³ with 10 burner minutes each."""
+    start = dt_util.utcnow()
+    records = [{"datetime": start, "consumed_gas": 100.0}]
+    for i in range(1, count):
+        records.append({
+            "datetime": start + timedelta(hours=i),
+            "consumed_gas": 100.0 + i,
+            "min_cumulated": 10.0 * i,
+            "m3/min for interval": 0.1,
+        })
+    return records
+
+
+def test_recompute_after_removed_record(hass: HomeAssistant):
+    """A removed record merges its minutes into the next interval."""
+    records = make_records(5)
+    del records[2]
+    result = recompute_cumulated(history_columns(records), MODE_BOILER_TRACKING)
+    assert result["min_cumulated"][2] == 30.0
+    assert result["m3/min for interval"][2] == pytest.approx(2 / 20)
+    assert np.isnan(result["average m3/min"][0])
+
+
+def test_recompute_falls_back_to_interval_rate(hass: HomeAssistant):
+    """Without the stored minutes, the interval's minutes come from its rate."""
+    records = make_records(5)
+    del records[3]["min_cumulated"]
+    result = recompute_cumulated(history_columns(records), MODE_BOILER_TRACKING)
+    assert result["min_cumulated"][3] == 30.0
+
+    gas_consume = GasConsume(records)
+    gas_consume.mark_stored()
+    assert apply_columns(gas_consume, result) == 4
+    assert "min_cumulated" not in gas_consume[0]
+    assert gas_consume[4]["average m3/min"] == pytest.approx(4 / 40)
+    assert sorted(gas_consume.corrected) == [1, 2, 3, 4]
+
+
+def test_recompute_bill_entries(hass: HomeAssistant):
+    """Bill entries accumulate the period usages."""
+    result = recompute_cumulated(history_columns(make_records(3)), MODE_BILL_ENTRY)
+    assert result["consumed_gas_cumulated"].tolist() == [100.0, 201.0, 303.0]
+
+
+async def test_pool_matches_inline(hass: HomeAssistant):
+    """Jobs above the inline threshold run in the process pool with the same result."""
+    backend = ComputeBackend(hass, workers=1, inline_max_rows=10)
+    columns = history_columns(make_records(1000))
+    try:
+        result = await backend.async_run(recompute_cumulated, columns, MODE_BOILER_TRACKING)
+    finally:
+        backend.async_stop()
+        await hass.async_block_till_done()
+    inline = recompute_cumulated(columns, MODE_BOILER_TRACKING)
+    for field, values in inline.items():
+        np.testing.assert_allclose(result[field], values, equal_nan=True)
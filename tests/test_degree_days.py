@@ -0,0 +1,42 @@
+"""Tests for the heating degree-day regression."""
+import math
+
+import numpy as np
+import pytest
+
+from homeassistant.const import UnitOfTemperature
+from homeassistant.core import HomeAssistant
+
+from custom_components.gas_meter.const import DEGREE_DAY_MIN_INTERVALS
+from custom_components.gas_meter.degree_days import DegreeDayFit, heating_degrees
+
+
+def test_heating_degrees(hass: HomeAssistant):
+    """Degrees below the base, in °C, NaN for unusable states."""
+    assert heating_degrees("5", 15.5) == pytest.approx(10.5)
+    assert heating_degrees("20", 15.5) == 0.0
+    assert heating_degrees("41", 15.5, UnitOfTemperature.FAHRENHEIT) == pytest.approx(10.5)
+    assert math.isnan(heating_degrees("unavailable", 15.5))
+
+
+def test_fit_recovers_base_and_slope(hass: HomeAssistant):
+    """Incremental and batch normal equations give the same coefficients."""
+    rng = np.random.default_rng(0)
+    days = rng.uniform(0.5, 3, 50)
+    hdd = days * rng.uniform(0, 15, 50)
+    gas = 0.8 * days + 0.35 * hdd
+
+    incremental = DegreeDayFit()
+    for interval in zip(days, hdd, gas):
+        incremental.add(*interval)
+    assert incremental.solve() == pytest.approx((0.8, 0.35))
+    assert DegreeDayFit.from_intervals(days, hdd, gas).solve() == pytest.approx((0.8, 0.35))
+    assert DegreeDayFit(incremental.to_dict()).solve() == pytest.approx((0.8, 0.35))
+    assert incremental.normal_daily_hdd == pytest.approx(hdd.sum() / days.sum())
+
+
+def test_fit_without_enough_data_or_heating(hass: HomeAssistant):
+    """Too few intervals give no fit; no heating gives a base load only."""
+    days = np.ones(DEGREE_DAY_MIN_INTERVALS)
+    assert DegreeDayFit.from_intervals(days[:-1], days[:-1], days[:-1]).solve() is None
+    assert DegreeDayFit.from_intervals(days, np.zeros_like(days), 0.8 * days).solve() == pytest.approx((0.8, 0.0))
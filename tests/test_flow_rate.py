@@ -0,0 +1,36 @@
+"""Tests for the live gas flow rate."""
+from datetime import datetime, timedelta, timezone
+
+import pytest
+
+from homeassistant.core import HomeAssistant
+
+from custom_components.gas_meter.flow_rate import FlowSamples
+
+START = datetime(2026, 1, 1, tzinfo=timezone.utc)
+
+
+def test_average_is_time_weighted(hass: HomeAssistant):
+    """Each flow holds until the next sample; windows beyond the buffer average the covered part."""
+    samples = FlowSamples(3)
+    assert samples.latest is None
+    assert samples.average(5, START) is None
+
+    samples.add(START, 0.0)
+    samples.add(START + timedelta(minutes=10), 1.0)
+    now = START + timedelta(minutes=15)
+    assert samples.latest == 1.0
+    assert samples.changed_at == START + timedelta(minutes=10)
+    assert samples.average(5, now) == pytest.approx(1.0)
+    assert samples.average(10, now) == pytest.approx(0.5)
+    assert samples.average(60, now) == pytest.approx(5 / 15)
+
+
+def test_buffer_drops_the_oldest_samples(hass: HomeAssistant):
+    """The ring buffer keeps the latest samples only."""
+    samples = FlowSamples(3)
+    for minute, flow in enumerate((2.0, 0.0, 1.0, 3.0)):
+        samples.add(START + timedelta(minutes=minute), flow)
+    assert len(samples) == 3
+    # The 2.0 step fell out: only minutes 1-4 are covered
+    assert samples.average(60, START + timedelta(minutes=4)) == pytest.approx((0.0 + 1.0 + 3.0) / 3)
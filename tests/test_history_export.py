@@ -0,0 +1,71 @@
+"""Tests for the export_history service."""
+from datetime import timedelta
+from unittest.mock import patch
+
+import pytest
+from pytest_homeassistant_custom_component.common import MockConfigEntry
+
+from homeassistant.core import HomeAssistant
+from homeassistant.util import dt as dt_util
+
+import custom_components.gas_meter as gas_meter
+import custom_components.gas_meter.file_handler as fh
+from custom_components.gas_meter.const import DOMAIN, EXPORT_DIRECTORY
+from custom_components.gas_meter.gas_consume import GasConsume
+
+CONFIGURATION = "homeassistant:\n  name: Home\n"
+
+
+@pytest.fixture
+async def gas_meter_entry(hass: HomeAssistant, tmp_path):
+    """Set up a bill entry gas meter with ten daily readings in a temporary config directory."""
+    hass.config.config_dir = str(tmp_path)
+    entry = MockConfigEntry(
+        domain=DOMAIN,
+        data={"unit_system": "metric", "operating_mode": "bill_entry", "latest_gas_data": 0},
+    )
+    entry.add_to_hass(hass)
+    with patch.object(hass.config_entries, "async_forward_entry_setups", return_value=None):
+        assert await gas_meter.async_setup_entry(hass, entry)
+
+    gas_consume = GasConsume()
+    start = dt_util.now().replace(microsecond=0) - timedelta(days=10)
+    for day in range(10):
+        gas_consume.add_record(start + timedelta(days=day), 10 + day)
+    await fh.save_gas_actualdata(gas_consume, hass)
+    yield entry
+    await gas_meter.async_unload_entry(hass, entry)
+
+
+async def _export(hass: HomeAssistant, **data):
+    return await hass.services.async_call(DOMAIN, "export_history", data, blocking=True, return_response=True)
+
+
+async def test_export_cannot_overwrite_configuration(hass: HomeAssistant, tmp_path, gas_meter_entry):
+    """An export named like a configuration file lands in the export directory as csv."""
+    configuration = tmp_path / "configuration.yaml"
+    configuration.write_text(CONFIGURATION)
+
+    response = await _export(hass, format="csv", filename="configuration.yaml")
+
+    assert response["path"] == str(tmp_path / EXPORT_DIRECTORY / "configuration.csv")
+    assert response["count"] == 10
+    assert configuration.read_text() == CONFIGURATION
+
+    response = await _export(hass, format="ndjson", filename="../configuration.yaml")
+
+    assert response["path"] == str(tmp_path / EXPORT_DIRECTORY / "configuration.ndjson")
+    assert configuration.read_text() == CONFIGURATION
+
+
+async def test_export_overwrites_only_exports(hass: HomeAssistant, tmp_path, gas_meter_entry):
+    """An earlier export is replaced, any other file is left alone."""
+    first = await _export(hass, format="csv")
+    second = await _export(hass, format="csv")
+    assert first["path"] == second["path"]
+
+    notes = tmp_path / EXPORT_DIRECTORY / "notes.csv"
+    notes.write_text("my,own,notes\n")
+    with pytest.raises(ValueError):
+        await _export(hass, format="csv", filename="notes.csv")
+    assert notes.read_text() == "my,own,notes\n"
@@ -0,0 +1,82 @@
+"""Tests for the modulation calibration of the trigger_gas_update service."""
+from datetime import timedelta
+from unittest.mock import patch
+
+import numpy as np
+from pytest_homeassistant_custom_component.common import MockConfigEntry
+
+from homeassistant.core import HomeAssistant
+from homeassistant.util import dt as dt_util
+
+import custom_components.gas_meter as gas_meter
+import custom_components.gas_meter.file_handler as fh
+from custom_components.gas_meter.const import DOMAIN
+from custom_components.gas_meter.gas_consume import GasConsume
+from custom_components.gas_meter.recorder_access import StateSeries
+
+BOILER = "switch.boiler"
+MODULATION = "sensor.boiler_modulation"
+
+
+async def test_calibration_with_sensor_added_to_existing_history(recorder_mock, hass: HomeAssistant, tmp_path):
+    """Readings from before the modulation sensor existed do not count in its calibration."""
+    hass.config.config_dir = str(tmp_path)
+    now = dt_util.now().replace(microsecond=0)
+    sensor_added = now - timedelta(hours=12)
+
+    async def fake_state_series(hass, start_time, end_time, on_off_entities=(), numeric_entities=(), **kwargs):
+        """Boiler always on; the sensor reports a constant 50 % since it was added."""
+        series = {entity_id: StateSeries(np.array([0.0]), np.array([1.0])) for entity_id in on_off_entities}
+        for entity_id in numeric_entities:
+            series[entity_id] = StateSeries(np.array([sensor_added.timestamp()]), np.array([50.0]))
+        return series
+
+    entry = MockConfigEntry(
+        domain=DOMAIN,
+        data={
+            "unit_system": "metric",
+            "operating_mode": "boiler_tracking",
+            "boiler_entity": BOILER,
+            "boiler_average": 0.6,
+            "modulation_entity": MODULATION,
+            "latest_gas_data": 0,
+        },
+    )
+    entry.add_to_hass(hass)
+    with patch.object(hass.config_entries, "async_forward_entry_setups", return_value=None):
+        assert await gas_meter.async_setup_entry(hass, entry)
+
+    gas_consume = GasConsume()
+    gas_consume.add_record(now - timedelta(days=3), 100.0)
+    await fh.save_gas_actualdata(gas_consume, hass)
+
+    async def trigger(time, reading):
+        await hass.services.async_call(
+            DOMAIN,
+            "trigger_gas_update",
+            {"datetime": time.strftime("%Y-%m-%d %H:%M:%S"), "consumed_gas": reading},
+            blocking=True,
+        )
+
+    with patch.object(gas_meter, "async_get_state_series", fake_state_series):
+        # Two days of readings from before the modulation sensor was added
+        await trigger(now - timedelta(days=2), 150.0)
+        await trigger(now - timedelta(days=1), 200.0)
+
+        # The sensor was added during this interval, it does not calibrate
+        await trigger(now - timedelta(hours=1), 210.0)
+        gas_consume = await fh.load_gas_actualdata(hass)
+        assert gas_consume[-1]["modulation_cumulated"] == 0
+        assert gas_consume[-1]["modulation_gas_cumulated"] == 0
+        assert "modulation_calibration" not in gas_consume[-1]
+
+        # One fully covered hour at 50 %: 2 m³ over 50·60 modulation·minutes
+        await trigger(now, 212.0)
+        gas_consume = await fh.load_gas_actualdata(hass)
+
+    assert gas_consume[-1]["modulation_cumulated"] == 3000
+    assert gas_consume[-1]["modulation_gas_cumulated"] == 2
+    assert gas_consume[-1]["modulation_calibration"] == 2 / 3000
+    assert float(hass.states.get(f"{DOMAIN}.modulation_calibration").state) == 2 / 3000
+
+    await gas_meter.async_unload_entry(hass, entry)
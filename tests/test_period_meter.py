@@ -0,0 +1,69 @@
+"""Tests for the built-in period meters."""
+from datetime import datetime, timedelta
+
+import pytest
+
+from homeassistant.core import HomeAssistant
+from homeassistant.util import dt as dt_util
+
+from custom_components.gas_meter.const import MODE_BILL_ENTRY, MODE_BOILER_TRACKING, PERIODS
+from custom_components.gas_meter.gas_consume import GasConsume
+from custom_components.gas_meter.period_meter import ConsumptionIndex, next_period_start, period_start
+
+
+def test_period_bounds(hass: HomeAssistant):
+    """Every period contains the moment it was computed from."""
+    moment = dt_util.as_local(datetime(2026, 3, 10, 15, 30, tzinfo=dt_util.UTC))
+    for period in PERIODS:
+        assert period_start(period, moment, 15) <= moment < next_period_start(period, moment, 15)
+    assert period_start("billing_cycle", moment, 15).day == 15
+    assert period_start("billing_cycle", moment, 15).month == 2
+    with pytest.raises(ValueError):
+        period_start("yearly", moment)
+
+
+def test_index_interpolates_and_adds_live_estimate(hass: HomeAssistant):
+    """Consumption between readings is interpolated, after the latest one the live estimate is added."""
+    start = dt_util.utcnow().replace(microsecond=0)
+    gas_consume = GasConsume()
+    for hours, value in ((0, 10.0), (2, 12.0), (4, 16.0)):
+        gas_consume.add_record(start + timedelta(hours=hours), value)
+    index = ConsumptionIndex(MODE_BOILER_TRACKING)
+    index.rebuild(gas_consume)
+
+    assert index.value_at(start - timedelta(hours=1)) == 10.0
+    assert index.value_at(start + timedelta(hours=3)) == pytest.approx(14.0)
+    assert index.consumption(start + timedelta(hours=1), start + timedelta(hours=3)) == pytest.approx(3.0)
+    assert index.consumption(start + timedelta(hours=3), start + timedelta(hours=5), 0.5) == pytest.approx(2.5)
+    assert index.positions_between(start + timedelta(hours=1), start + timedelta(hours=4)) == [1, 2]
+
+
+def test_index_update_appends_or_rebuilds(hass: HomeAssistant):
+    """A new latest reading is appended, an out-of-order one rebuilds the index."""
+    start = dt_util.utcnow().replace(microsecond=0)
+    gas_consume = GasConsume()
+    gas_consume.add_record(start, 10.0)
+    gas_consume.add_record(start + timedelta(hours=2), 12.0)
+    index = ConsumptionIndex(MODE_BOILER_TRACKING)
+    index.rebuild(gas_consume)
+
+    gas_consume.add_record(start + timedelta(hours=3), 13.0)
+    index.update(gas_consume)
+    assert index.values == [10.0, 12.0, 13.0]
+
+    gas_consume.add_record(start + timedelta(hours=1), 11.0)
+    index.update(gas_consume)
+    assert index.values == [10.0, 11.0, 12.0, 13.0]
+    assert index.positions == [0, 3, 1, 2]
+
+
+def test_bill_entries_use_cumulated_totals(hass: HomeAssistant):
+    """Bill entries store the period usage; the index uses the running total."""
+    start = dt_util.utcnow().replace(microsecond=0)
+    records = [
+        {"datetime": start, "consumed_gas": 30.0, "consumed_gas_cumulated": 30.0},
+        {"datetime": start + timedelta(days=30), "consumed_gas": 20.0, "consumed_gas_cumulated": 50.0},
+    ]
+    index = ConsumptionIndex(MODE_BILL_ENTRY)
+    index.rebuild(records)
+    assert index.consumption(start, start + timedelta(days=30)) == pytest.approx(20.0)
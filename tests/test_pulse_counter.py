@@ -0,0 +1,100 @@
+"""Tests for the pulse counter mode."""
+from datetime import timedelta
+
+from homeassistant.core import HomeAssistant
+from homeassistant.util import dt as dt_util
+
+import custom_components.gas_meter.file_handler as fh
+from custom_components.gas_meter.gas_consume import GasConsume
+from custom_components.gas_meter.pulse_counter import PulseCounter, append_readings, reading_end
+
+COUNTER = "sensor.gas_pulses"
+
+
+def test_reading_end_is_next_local_midnight(hass: HomeAssistant):
+    """A bucket belongs to the reading at the local midnight ending its day."""
+    midnight = dt_util.start_of_local_day(dt_util.now().date())
+    assert reading_end(midnight) == dt_util.as_utc(midnight)
+    assert reading_end(midnight + timedelta(minutes=15)) == dt_util.as_utc(midnight + timedelta(days=1))
+
+
+def test_append_readings_aggregates_days(hass: HomeAssistant):
+    """The buckets of a day become a single reading with the boiler tracking fields."""
+    midnight = dt_util.as_utc(dt_util.start_of_local_day(dt_util.now().date()))
+    buckets = [
+        (midnight - timedelta(hours=2), 10, 5.0),
+        (midnight - timedelta(hours=1), 20, 10.0),
+        (midnight + timedelta(hours=1), 30, 0.0),
+    ]
+    gas_consume = GasConsume()
+    gas_consume.add_record(midnight - timedelta(days=1), 100.0)
+
+    assert append_readings(gas_consume, buckets, 0.01, True) == 2
+    assert len(gas_consume) == 3
+    assert dt_util.as_utc(gas_consume[1]["datetime"]) == midnight
+    assert gas_consume[1]["pulses"] == 30
+    assert gas_consume[1]["consumed_gas"] == 100.3
+    assert gas_consume[1]["min_cumulated"] == 15.0
+    assert gas_consume[1]["m3/min for interval"] == 0.3 / 15
+    assert gas_consume[2]["pulses"] == 30
+    assert gas_consume[2]["min_cumulated"] == 15.0
+    assert gas_consume[2]["average m3/min"] == gas_consume[2]["consumed_gas_cumulated"] / 15
+
+    # Buckets already in the history are not appended again
+    assert append_readings(gas_consume, buckets[:2], 0.01, True) == 0
+
+
+async def test_counter_pulses_while_stopped(hass: HomeAssistant):
+    """A counter's increments while Home Assistant is stopped are counted on the next start."""
+    hass.states.async_set(COUNTER, "100")
+    counter = PulseCounter(hass, COUNTER, 0.01)
+    await counter.async_start(GasConsume())
+    hass.states.async_set(COUNTER, "103")
+    await hass.async_block_till_done()
+    assert counter.pulses == 3
+    counter.async_stop()
+    await counter.async_save()
+
+    # Unavailable on start: the first valid value counts from the stored one
+    hass.states.async_set(COUNTER, "unavailable")
+    counter = PulseCounter(hass, COUNTER, 0.01)
+    await counter.async_start(GasConsume())
+    assert counter.pulses == 3
+    hass.states.async_set(COUNTER, "110")
+    await hass.async_block_till_done()
+    assert counter.pulses == 10
+    counter.async_stop()
+    await counter.async_save()
+
+    hass.states.async_set(COUNTER, "115")
+    counter = PulseCounter(hass, COUNTER, 0.01)
+    await counter.async_start(GasConsume())
+    assert counter.pulses == 15
+    counter.async_stop()
+
+
+async def test_flush_writes_past_days_only(hass: HomeAssistant, tmp_path):
+    """Only the buckets of past days go to the history, today's stay in the pulse store."""
+    hass.config.config_dir = str(tmp_path)
+    hass.states.async_set(COUNTER, "0")
+    midnight = dt_util.as_utc(dt_util.start_of_local_day(dt_util.now().date()))
+    gas_consume = GasConsume()
+    gas_consume.add_record(dt_util.as_local(midnight - timedelta(days=1)), 100.0)
+    await fh.save_gas_actualdata(gas_consume, hass)
+
+    counter = PulseCounter(hass, COUNTER, 0.01)
+    await counter.async_start(gas_consume)
+    counter._pending = [
+        (midnight - timedelta(hours=3), 40, 0.0),
+        (midnight - timedelta(minutes=15), 60, 0.0),
+        (midnight + timedelta(minutes=15), 5, 0.0),
+    ]
+    await counter.async_flush()
+    counter.async_stop()
+
+    gas_consume = await fh.load_gas_actualdata(hass)
+    assert len(gas_consume) == 2
+    assert gas_consume[-1]["pulses"] == 100
+    assert gas_consume[-1]["consumed_gas"] == 101.0
+    assert counter._pending == [(midnight + timedelta(minutes=15), 5, 0.0)]
+    assert counter.pulses == 5
@@ -0,0 +1,60 @@
+"""Tests for the lean recorder access helpers."""
+from pytest_homeassistant_custom_component.components.recorder.common import async_wait_recording_done
+
+from homeassistant.core import HomeAssistant
+from homeassistant.util import dt as dt_util
+
+from custom_components.gas_meter.recorder_access import (
+    _query_attribute_states,
+    async_get_state_series,
+    extract_attribute,
+)
+
+
+def test_extract_attribute_top_level_only():
+    """A nested key of the same name is not the attribute."""
+    shared_attrs = '{"a":{"hvac_action":"idle"},"hvac_action":"heating"}'
+    assert extract_attribute(shared_attrs, "hvac_action") == "heating"
+    assert extract_attribute('{"a":{"hvac_action":"idle"}}', "hvac_action") is None
+
+
+def test_extract_attribute_values():
+    """The key text as a value, missing keys and empty or invalid sets."""
+    assert extract_attribute('{"a":"hvac_action","hvac_action":"heating"}', "hvac_action") == "heating"
+    assert extract_attribute('{"x": 1}', "hvac_action") is None
+    assert extract_attribute(None, "hvac_action") is None
+    assert extract_attribute("not json", "hvac_action") is None
+
+
+async def test_attribute_states_of_several_entities(recorder_mock, hass: HomeAssistant):
+    """The attribute rows of all entities come back per entity, from the state at the start on."""
+    hass.states.async_set("climate.boiler", "heat", {"hvac_action": "heating"})
+    hass.states.async_set("climate.water", "heat", {"hvac_action": "idle"})
+    await async_wait_recording_done(hass)
+    start = dt_util.utcnow()
+
+    hass.states.async_set("climate.boiler", "heat", {"hvac_action": "idle"})
+    hass.states.async_set("climate.water", "heat", {"hvac_action": "idle", "current_temperature": 40})
+    await async_wait_recording_done(hass)
+    hass.states.async_set("climate.water", "heat", {"hvac_action": "heating", "current_temperature": 41})
+    await async_wait_recording_done(hass)
+    end = dt_util.utcnow()
+
+    history = await recorder_mock.async_add_executor_job(
+        _query_attribute_states,
+        hass,
+        start,
+        end,
+        {"climate.boiler": "hvac_action", "climate.water": "hvac_action", "climate.unknown": "hvac_action"},
+    )
+
+    assert [value for _, value in history["climate.boiler"]] == ["heating", "idle"]
+    assert [value for _, value in history["climate.water"]] == ["idle", "idle", "heating"]
+    assert history["climate.boiler"][0][0] == start.timestamp()
+    assert history["climate.water"][0][0] == start.timestamp()
+    assert history["climate.unknown"] == []
+
+    series = await async_get_state_series(
+        hass, start, end, attribute_entities={"climate.water": ("hvac_action", lambda value: float(value == "heating"))}
+    )
+    assert series["climate.water"].values.tolist() == [0.0, 1.0]
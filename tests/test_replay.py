@@ -0,0 +1,64 @@
+"""Tests for the offline replay's recorder database access."""
+import json
+import sqlite3
+
+import numpy as np
+
+from homeassistant.core import HomeAssistant
+
+from custom_components.gas_meter.burner import BurnerSignal
+from custom_components.gas_meter.replay import load_state_series
+
+CLIMATE = "climate.boiler"
+# (epoch seconds, state, hvac_action)
+CHANGES = [(1000.0, "heat", "idle"), (1600.0, "heat", "heating"), (2200.0, "heat", "idle")]
+
+
+def make_database(path, legacy: bool):
+    """Create a recorder database with the current schema, or the one from before states_meta."""
+    connection = sqlite3.connect(path)
+    connection.execute("CREATE TABLE state_attributes (attributes_id INTEGER PRIMARY KEY, shared_attrs TEXT)")
+    for attributes_id, (_, _, action) in enumerate(CHANGES, 1):
+        connection.execute(
+            "INSERT INTO state_attributes VALUES (?, ?)", (attributes_id, json.dumps({"hvac_action": action}))
+        )
+    if legacy:
+        connection.execute(
+            "CREATE TABLE states (state_id INTEGER PRIMARY KEY, entity_id TEXT, state TEXT, "
+            "attributes TEXT, attributes_id INTEGER, last_updated DATETIME)"
+        )
+        for attributes_id, (timestamp, state, _) in enumerate(CHANGES, 1):
+            connection.execute(
+                "INSERT INTO states (entity_id, state, attributes_id, last_updated) "
+                "VALUES (?, ?, ?, datetime(?, 'unixepoch'))",
+                (CLIMATE, state, attributes_id, timestamp),
+            )
+    else:
+        connection.execute("CREATE TABLE states_meta (metadata_id INTEGER PRIMARY KEY, entity_id TEXT)")
+        connection.execute("INSERT INTO states_meta VALUES (1, ?)", (CLIMATE,))
+        connection.execute(
+            "CREATE TABLE states (state_id INTEGER PRIMARY KEY, metadata_id INTEGER, state TEXT, "
+            "attributes TEXT, attributes_id INTEGER, last_updated_ts FLOAT)"
+        )
+        for attributes_id, (timestamp, state, _) in enumerate(CHANGES, 1):
+            connection.execute(
+                "INSERT INTO states (metadata_id, state, attributes_id, last_updated_ts) VALUES (1, ?, ?, ?)",
+                (state, attributes_id, timestamp),
+            )
+    connection.commit()
+    connection.close()
+
+
+def test_climate_signal_from_both_schemas(hass: HomeAssistant, tmp_path):
+    """A climate boiler burns while hvac_action is heating, in current and legacy databases."""
+    signal = BurnerSignal.for_entity(CLIMATE)
+    for legacy in (False, True):
+        path = tmp_path / f"legacy_{legacy}.db"
+        make_database(path, legacy)
+        series = load_state_series(path, CLIMATE, 1200.0, 3000.0, signal.convert, signal.attribute)
+        np.testing.assert_allclose(series.timestamps, [1000.0, 1600.0, 2200.0])
+        np.testing.assert_array_equal(series.values, [0.0, 1.0, 0.0])
+
+        # The state itself is never "on"
+        series = load_state_series(path, CLIMATE, 1200.0, 3000.0, BurnerSignal.for_entity("switch.boiler").convert)
+        np.testing.assert_array_equal(series.values, [0.0, 0.0, 0.0])
@@ -0,0 +1,28 @@
+"""Tests for the gas meter sensors."""
+import pytest
+
+from homeassistant.components.sensor import SensorDeviceClass
+from homeassistant.core import HomeAssistant
+
+from custom_components.gas_meter.const import DOMAIN, UNIT_SYSTEM_KWH
+from custom_components.gas_meter.sensor import CustomTemplateSensor
+from custom_components.gas_meter.unit_converter import UnitEngine
+
+
+async def test_consumed_gas_in_configured_unit(hass: HomeAssistant):
+    """The consumed gas template sums m³ states and reports the configured unit."""
+    units = UnitEngine(hass, UNIT_SYSTEM_KWH, 36.0)
+    hass.states.async_set(f"{DOMAIN}.latest_gas_data", "100.0")
+    sensor = CustomTemplateSensor(
+        hass=hass,
+        friendly_name="Consumed gas",
+        unique_id="consumed_gas",
+        state_template=f"{{{{ states('{DOMAIN}.latest_gas_data') | float(0) + 0.5 }}}}",
+        unit_of_measurement=units.label,
+        device_class=units.device_class,
+        units=units,
+    )
+    await sensor.async_update()
+    assert sensor.native_value == pytest.approx(100.5 * 10)
+    assert sensor.unit_of_measurement == "kWh"
+    assert sensor.device_class == SensorDeviceClass.ENERGY
@@ -0,0 +1,108 @@
+"""Tests for the binary snapshot codec and the storage format conversion."""
+import math
+from datetime import datetime, timedelta, timezone
+from unittest.mock import patch
+from zoneinfo import ZoneInfo
+
+from homeassistant.core import HomeAssistant
+
+import custom_components.gas_meter.file_handler as fh
+from custom_components.gas_meter.const import CONF_STORAGE_FORMAT, DOMAIN, STORAGE_FORMAT_BINARY, STORAGE_FORMAT_JSON
+from custom_components.gas_meter.gas_consume import GasConsume
+from custom_components.gas_meter.snapshot_codec import decode_snapshot, encode_snapshot
+
+RECORDS = [
+    {
+        "datetime": datetime(2024, 3, 31, 1, 30, tzinfo=ZoneInfo("Europe/Prague")),
+        "consumed_gas": 100.0,
+        "pulses": 7,
+        "min_cumulated": 0,
+    },
+    {
+        "datetime": datetime(2024, 3, 31, 3, 30, tzinfo=ZoneInfo("Europe/Prague")),
+        "consumed_gas": 101.25,
+        "pulses": 2 ** 60,
+        "min_cumulated": 42.5,
+        "appliance_rates": {"switch.boiler": 0.03},
+        "appliance_runtime_uncovered": ["switch.boiler"],
+        "anomaly": None,
+        "flag": True,
+    },
+    {
+        "datetime": datetime(2024, 4, 1, 6, 0, 0, 123456),
+        "consumed_gas": 102.5,
+        "pulses": 3,
+        "m3/min for interval": math.nan,
+        "note": "naive",
+    },
+    {
+        "datetime": datetime(1969, 12, 31, 23, 0, tzinfo=timezone(timedelta(hours=-5, minutes=-30))),
+        "consumed_gas": -1.5,
+    },
+]
+
+
+def assert_same_records(decoded, records):
+    """Compare records field by field, with NaN equal to NaN and the value types kept."""
+    assert len(decoded) == len(records)
+    for decoded_record, record in zip(decoded, records):
+        assert decoded_record.keys() == record.keys()
+        for key, value in record.items():
+            decoded_value = decoded_record[key]
+            assert type(decoded_value) is type(value), key
+            if isinstance(value, float) and math.isnan(value):
+                assert math.isnan(decoded_value)
+            else:
+                assert decoded_value == value, key
+            if isinstance(value, datetime):
+                assert decoded_value.utcoffset() == value.utcoffset()
+
+
+def test_round_trip():
+    """Aware and naive datetimes, int/float columns, sparse fields and extras decode as encoded."""
+    assert_same_records(decode_snapshot(encode_snapshot(RECORDS)), RECORDS)
+
+
+def test_round_trip_empty():
+    """An empty history gives an empty snapshot."""
+    assert decode_snapshot(encode_snapshot([])) == []
+
+
+def test_int_columns_stay_ints():
+    """A field holding only ints is not decoded as floats."""
+    decoded = decode_snapshot(encode_snapshot([{"datetime": datetime(2024, 1, 1), "pulses": 7}]))
+    assert decoded == [{"datetime": datetime(2024, 1, 1), "pulses": 7}]
+    assert type(decoded[0]["pulses"]) is int
+
+
+async def test_conversion_keeps_json_backup(hass: HomeAssistant, hass_storage, tmp_path):
+    """Switching to the binary format keeps the JSON data as a backup."""
+    hass.config.config_dir = str(tmp_path)
+    hass.data[DOMAIN] = {"entry": {CONF_STORAGE_FORMAT: STORAGE_FORMAT_JSON}}
+    await fh.save_gas_actualdata(GasConsume(RECORDS[:2]), hass)
+
+    hass.data[DOMAIN]["entry"][CONF_STORAGE_FORMAT] = STORAGE_FORMAT_BINARY
+    gas_consume = await fh.load_gas_actualdata(hass)
+
+    assert_same_records(gas_consume, RECORDS[:2])
+    assert (tmp_path / ".storage" / "gas_meter_data.bin").exists()
+    assert "gas_meter_data" not in hass_storage
+    assert_same_records(fh._deserialize_records(hass_storage["gas_meter_data.bak"]["data"]["records"]), RECORDS[:2])
+    assert_same_records(await fh.load_gas_actualdata(hass), RECORDS[:2])
+
+
+async def test_conversion_keeps_json_if_snapshot_differs(hass: HomeAssistant, hass_storage, tmp_path):
+    """A snapshot that does not read back identical is dropped and the JSON Store kept."""
+    hass.config.config_dir = str(tmp_path)
+    hass.data[DOMAIN] = {"entry": {CONF_STORAGE_FORMAT: STORAGE_FORMAT_JSON}}
+    await fh.save_gas_actualdata(GasConsume(RECORDS[:2]), hass)
+
+    hass.data[DOMAIN]["entry"][CONF_STORAGE_FORMAT] = STORAGE_FORMAT_BINARY
+    with patch.object(fh, "decode_snapshot", return_value=RECORDS[:1]):
+        gas_consume = await fh.load_gas_actualdata(hass)
+
+    assert_same_records(gas_consume, RECORDS[:2])
+    assert "gas_meter_data" in hass_storage
+    assert "gas_meter_data.bak" not in hass_storage
+    assert not (tmp_path / ".storage" / "gas_meter_data.bin").exists()
+    assert hass.data[DOMAIN]["entry"][CONF_STORAGE_FORMAT] == STORAGE_FORMAT_JSON
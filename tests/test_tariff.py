@@ -0,0 +1,91 @@
+"""Tests for the tariff and cost engine."""
+from datetime import date, timedelta
+
+import pytest
+
+from homeassistant.core import HomeAssistant
+from homeassistant.util import dt as dt_util
+
+from custom_components.gas_meter.gas_consume import GasConsume
+from custom_components.gas_meter.period_meter import PeriodMeters
+from custom_components.gas_meter.tariff import CostEngine, Tariff, parse_tiers, parse_tou_rates
+
+
+def local_time(day: date, hours: float):
+    """Return the UTC time of a local hour of the given day."""
+    return dt_util.as_utc(dt_util.start_of_local_day(day) + timedelta(hours=hours))
+
+
+def test_parse_tiers():
+    """Tiers need increasing limits and non-negative prices."""
+    assert parse_tiers("100:0.12, 300:0.15") == [(100, 0.12), (300, 0.15)]
+    assert parse_tiers("100:0.12; 300:0.15") == [(100, 0.12), (300, 0.15)]
+    assert parse_tiers(None) == []
+    for text in ("300:0.1, 100:0.2", "100:-1", "0:0.1", "100"):
+        with pytest.raises(ValueError):
+            parse_tiers(text)
+
+
+def test_parse_tou_rates():
+    """Windows are minutes of the day and may wrap around midnight."""
+    assert parse_tou_rates("22:00-06:00=0.08, 13:00-16:00=0.1") == [(1320, 360, 0.08), (780, 960, 0.1)]
+    assert parse_tou_rates("00:00-24:00=0.2") == [(0, 1440, 0.2)]
+    for text in ("22:00=0.08", "22:00-22:00=0.08", "25:00-06:00=0.08", "22:00-06:00=-1"):
+        with pytest.raises(ValueError):
+            parse_tou_rates(text)
+
+
+def test_energy_cost_tiers(hass: HomeAssistant):
+    """Units are split across the tier boundaries, credits use the same prices."""
+    tariff = Tariff(0.3, "m3", 39.5, parse_tiers("100:0.1, 300:0.2"))
+    assert tariff.energy_cost(90, 20) == pytest.approx(10 * 0.1 + 10 * 0.2)
+    assert tariff.energy_cost(290, 20) == pytest.approx(10 * 0.2 + 10 * 0.3)
+    assert tariff.energy_cost(110, -20) == pytest.approx(-(10 * 0.1 + 10 * 0.2))
+    assert Tariff(0.1, "kWh", 36.0).energy_cost(0, 10) == pytest.approx(1.0)
+
+
+def test_energy_cost_between_windows(hass: HomeAssistant):
+    """Gas consumed across a time-of-use boundary is priced per window."""
+    tariff = Tariff(0.3, "m3", 39.5, tou_rates=parse_tou_rates("22:00-06:00=0.08"))
+    day = date(2026, 1, 10)
+    night = local_time(day, 23)
+    assert tariff.energy_cost(0, 10, night) == pytest.approx(0.8)
+
+    # 12:00-24:00: ten hours at the day price, two at the night price
+    assert tariff.energy_cost_between(0, 12, local_time(day, 12), local_time(day, 24)) == pytest.approx(10 * 0.3 + 2 * 0.08)
+    # 20:00-08:00: two day hours, eight night hours, two day hours
+    assert tariff.energy_cost_between(0, 12, local_time(day, 20), local_time(day, 32)) == pytest.approx(4 * 0.3 + 8 * 0.08)
+    # Without an interval, the price at its end
+    assert tariff.energy_cost_between(0, 12, night, night) == pytest.approx(12 * 0.08)
+
+
+async def test_late_reading_priced_in_its_windows(hass: HomeAssistant, freezer):
+    """A reading entered the next morning is priced over the interval it covers, not at entry time."""
+    day = date(2026, 1, 10)
+    freezer.move_to(local_time(day, 18))
+    gas_consume = GasConsume()
+    gas_consume.add_record(dt_util.as_local(local_time(day, 12)), 100.0)
+
+    live = {"estimate": 0.0}
+    period_meters = PeriodMeters(hass, "boiler_tracking", lambda: live["estimate"])
+    period_meters.async_start(gas_consume)
+    engine = CostEngine(hass, period_meters, Tariff(0.3, "m3", 39.5, tou_rates=parse_tou_rates("22:00-06:00=0.08")))
+    await engine.async_start()
+    assert engine.cycle_energy_cost == 0
+
+    # At 08:00, the reading of midnight: 4 m³ between 12:00 and 24:00
+    freezer.move_to(local_time(day, 32))
+    gas_consume.add_record(dt_util.as_local(local_time(day, 24)), 104.0)
+    period_meters._async_records_updated(gas_consume)
+    assert engine.consumption == pytest.approx(4.0)
+    assert engine.cycle_energy_cost == pytest.approx(4 * 10 / 12 * 0.3 + 4 * 2 / 12 * 0.08)
+    assert engine.day_energy_cost == 0
+
+    # Live estimate of the morning: priced since the previous update
+    freezer.move_to(local_time(day, 33))
+    live["estimate"] = 1.0
+    period_meters._async_notify()
+    assert engine.day_energy_cost == pytest.approx(0.3)
+
+    engine.async_stop()
+    period_meters.async_stop()
@@ -0,0 +1,54 @@
+"""Tests for the gas_meter/history and gas_meter/subscribe websocket commands."""
+from datetime import timedelta
+from unittest.mock import MagicMock, patch
+
+from pytest_homeassistant_custom_component.common import MockConfigEntry
+
+from homeassistant.core import HomeAssistant
+from homeassistant.util import dt as dt_util
+
+import custom_components.gas_meter as gas_meter
+import custom_components.gas_meter.file_handler as fh
+from custom_components.gas_meter.const import DOMAIN
+from custom_components.gas_meter.gas_consume import GasConsume
+from custom_components.gas_meter.websocket import ws_history, ws_subscribe
+
+
+async def test_history_page_and_deltas(hass: HomeAssistant):
+    """The history is paged and subscribers get only the appended and corrected records."""
+    entry = MockConfigEntry(domain=DOMAIN, data={"unit_system": "metric", "operating_mode": "bill_entry", "latest_gas_data": 0})
+    entry.add_to_hass(hass)
+    with patch.object(hass.config_entries, "async_forward_entry_setups", return_value=None):
+        assert await gas_meter.async_setup_entry(hass, entry)
+
+    start = dt_util.now() - timedelta(days=10)
+    gas_consume = GasConsume()
+    for day in range(5):
+        gas_consume.add_record(start + timedelta(days=day), 10 + day)
+    await fh.save_gas_actualdata(gas_consume, hass)
+
+    connection = MagicMock()
+    connection.subscriptions = {}
+    ws_history(hass, connection, {"id": 1, "type": "gas_meter/history", "offset": 1, "limit": 2})
+    await hass.async_block_till_done()
+    result = connection.send_result.call_args[0][1]
+    assert result["total"] == 5
+    assert [record["consumed_gas"] for record in result["records"]] == [11.0, 12.0]
+
+    ws_subscribe(hass, connection, {"id": 2, "type": "gas_meter/subscribe"})
+    messages = []
+    connection.send_message.side_effect = messages.append
+
+    gas_consume = await fh.load_gas_actualdata(hass)
+    gas_consume[1]["consumed_gas_cumulated"] = 99.0
+    gas_consume.mark_corrected(1)
+    gas_consume.add_record(start + timedelta(days=6), 20)
+    await fh.save_gas_actualdata(gas_consume, hass)
+
+    event = messages[-1]["event"]
+    assert event["total"] == 6
+    assert [record["position"] for record in event["corrected"]] == [1]
+    assert [record["position"] for record in event["appended"]] == [5]
+
+    connection.subscriptions[2]()
+    await gas_meter.async_unload_entry(hass, entry)